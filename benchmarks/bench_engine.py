@@ -0,0 +1,244 @@
+"""Benchmarks of the engine hot paths across grid sizes and bots / orbs counts.
+
+    python -m benchmarks.bench_engine                          # run everything, with the ratios to the baseline
+    python -m benchmarks.bench_engine --check                  # same, exit code 1 on regressions
+    python -m benchmarks.bench_engine --sizes 25 128 --save    # (re)write the baseline for these cases
+
+Every case runs in its own process (fixed seed, killed after --timeout seconds) and reports
+the µs per call, the calls per second (= ticks/s for World.update()) and the peak memory (tracemalloc).
+A case slower than its baseline by more than --tolerance is flagged as a regression, and a case without a baseline
+as missing (with --check, exit code 1 for both: record the missing ones with --save). The timings are absolute and depend
+on the machine and its load: --check is only meaningful on the machine that recorded the baseline, kept idle.
+The baseline is only compared with (and merged into) by the Python version that measured it.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from src.engine.ContinuousWorld import ContinuousWorld
+from src.engine.World import World, GameMode
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+SIZES = [25, 128, 512, 1024]
+LOADS = [(6, 20), (30, 150)] # (number of bots, number of orbs)
+
+
+class Case:
+    """setup(size, nb_bots, nb_orbs, seed) -> context (not timed), then run(context) is timed.
+    If fresh_setup, run() changes the context so setup() is called again before every run."""
+
+    def __init__(self, name: str, setup: Callable[[int, int, int, int], Any], run: Callable[[Any], Any], fresh_setup: bool = False):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.fresh_setup = fresh_setup
+
+
+def get_world(size: int, nb_bots: int = 0, nb_orbs: int = 0, seed: int = 0) -> World:
+    world = World(nb_col=size, nb_row=size, game_mode=GameMode.BOTS, auto_retry=True, seed=seed)
+    world.create_orbs(quantity=nb_orbs)
+    world.create_snakes(quantity=nb_bots)
+    return world
+
+def get_continuous_world(size: int, nb_bots: int = 0, nb_orbs: int = 0, seed: int = 0) -> ContinuousWorld:
+    """A plane with about as much room per snake as the grid of the same size."""
+    world = ContinuousWorld(width=size * 16, height=size * 16, seed=seed)
+    world.create_orbs(quantity=nb_orbs)
+    world.create_snakes(quantity=nb_bots)
+    return world
+
+def get_headless_game_view(world: World):
+    """GameView without an arcade window (only what resync_grid_with_map() needs)."""
+    from types import SimpleNamespace
+    from src.ui.views.game_view import GameView
+    game_view = GameView.__new__(GameView)
+    game_view.window = SimpleNamespace(debug_level=0)
+    game_view.world = world
+    game_view.nb_col, game_view.nb_row = world.nb_col, world.nb_row
+    game_view.grid_coordinates = []
+    game_view.create_grid_sprite_list()
+    return game_view
+
+CASES = [
+    Case('World.update',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.update()),
+    Case('World.get_state_snake',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.get_state_snake(snake_id=world.get_main_snake().id)),
+    Case('World.create_orbs',
+         setup=lambda size, nb_bots, nb_orbs, seed: (get_world(size, nb_bots, 0, seed), nb_orbs),
+         run=lambda context: context[0].create_orbs(quantity=context[1]),
+         fresh_setup=True),
+    Case('World.create_snakes',
+         setup=lambda size, nb_bots, nb_orbs, seed: (get_world(size, 0, nb_orbs, seed), nb_bots),
+         run=lambda context: context[0].create_snakes(quantity=context[1]),
+         fresh_setup=True),
+    Case('ChunkedMap.get_n_consecutive_empty_starts',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.map.get_n_consecutive_empty_starts(n=3)),
+    Case('World.get_random_n_consecutive_empty_cells',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.get_random_n_consecutive_empty_cells(n=3)),
+    Case('World.clone',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.clone()),
+    Case('ContinuousWorld.update',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_continuous_world(size, nb_bots, nb_orbs, seed),
+         run=lambda world: world.update()),
+    Case('GameView.resync_grid_with_map',
+         setup=lambda size, nb_bots, nb_orbs, seed: get_headless_game_view(get_world(size, nb_bots, nb_orbs, seed)),
+         run=lambda game_view: game_view.resync_grid_with_map()),
+]
+
+
+def get_key(case_name: str, size: int, nb_bots: int, nb_orbs: int) -> str:
+    return f'{case_name}[{size}x{size}, bots={nb_bots}, orbs={nb_orbs}]'
+
+def measure(case: Case, size: int, nb_bots: int, nb_orbs: int, seed: int, min_time: float, max_calls: int) -> Dict[str, float]:
+    """Times case.run() (median of at least 3 calls, until min_time seconds or max_calls) then measures its peak memory."""
+    context = case.setup(size, nb_bots, nb_orbs, seed)
+    durations = []
+    start = time.perf_counter()
+    while len(durations) < 3 or (time.perf_counter() - start < min_time and len(durations) < max_calls):
+        if case.fresh_setup and durations:
+            context = case.setup(size, nb_bots, nb_orbs, seed)
+        t0 = time.perf_counter()
+        case.run(context)
+        durations.append(time.perf_counter() - t0)
+
+    # second pass (tracemalloc slows everything down): memory used by setup + one call
+    tracemalloc.start()
+    context = case.setup(size, nb_bots, nb_orbs, seed)
+    case.run(context)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    us_per_call = statistics.median(durations) * 1e6
+    return {
+        'us_per_call': round(us_per_call, 2),
+        'calls_per_s': round(1e6 / us_per_call, 2) if us_per_call else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+        'nb_calls': len(durations),
+    }
+
+def _measure_in_child(connection, case_index: int, size: int, nb_bots: int, nb_orbs: int, seed: int, min_time: float, max_calls: int) -> None:
+    try:
+        connection.send(measure(CASES[case_index], size, nb_bots, nb_orbs, seed, min_time, max_calls))
+    except Exception as e:
+        connection.send({'error': f'{type(e).__name__}: {e}'})
+
+def run_case(case_index: int, size: int, nb_bots: int, nb_orbs: int, seed: int, timeout: float, min_time: float, max_calls: int) -> Dict[str, Any]:
+    """Runs one case in its own process so that a case that is too slow for this grid size can be stopped."""
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_measure_in_child, args=(child, case_index, size, nb_bots, nb_orbs, seed, min_time, max_calls))
+    process.start()
+    if parent.poll(timeout):
+        result = parent.recv()
+    else:
+        result = {'error': f'timeout ({timeout}s)'}
+    process.terminate()
+    process.join()
+    return result
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Keys of the cases slower than their baseline by more than 'tolerance' (0.2 = +20%)."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key, {})
+        if 'us_per_call' not in result or 'us_per_call' not in reference:
+            continue
+        if result['us_per_call'] > reference['us_per_call'] * (1 + tolerance):
+            regressions.append(key)
+    return regressions
+
+def get_missing(results: Dict[str, dict], baseline: Dict[str, dict]) -> List[str]:
+    """Keys of the cases that ran but have no baseline to be compared with."""
+    return [key for key, result in results.items() if 'us_per_call' in result and 'us_per_call' not in baseline.get(key, {})]
+
+def get_python_version() -> str:
+    return sys.version.split()[0]
+
+def load_baseline(path: str, python: str | None = None) -> Dict[str, dict]:
+    """Results of the baseline file, none if it was measured with another Python version than 'python' (if given)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        baseline = json.load(f)
+    return baseline['results'] if python in (None, baseline['python']) else {}
+
+def save_baseline(path: str, results: Dict[str, dict]) -> None:
+    """Merges the results into the baseline file (cases not run this time are kept if they were measured with the same
+    Python version, the file records only one)."""
+    baseline = load_baseline(path, python=get_python_version())
+    baseline.update({key: result for key, result in results.items() if 'us_per_call' in result})
+    with open(path, 'w') as f:
+        json.dump({
+            'python': get_python_version(),
+            'platform': platform.platform(),
+            'results': dict(sorted(baseline.items())),
+        }, f, indent=4)
+
+def get_ratio_str(result: dict, reference: dict) -> str:
+    if 'us_per_call' not in result or 'us_per_call' not in reference:
+        return ''
+    return f'x{result["us_per_call"] / reference["us_per_call"]:.2f}'
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the engine hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='grid sizes (size x size)')
+    parser.add_argument('--loads', type=str, nargs='+', default=[f'{bots}:{orbs}' for bots, orbs in LOADS],
+                        help='bots:orbs pairs, ex: 6:20 30:150')
+    parser.add_argument('--cases', type=str, nargs='+', default=None, help='only the cases containing one of these strings')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60, help='max seconds per case (setup included)')
+    parser.add_argument('--min-time', type=float, default=1, help='time spent calling each case (at least 3 calls)')
+    parser.add_argument('--max-calls', type=int, default=1000)
+    parser.add_argument('--tolerance', type=float, default=0.2, help='slowdown vs baseline flagged as regression')
+    parser.add_argument('--baseline', type=str, default=BASELINE_FILE)
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='exit code 1 on regressions or cases without baseline')
+    args = parser.parse_args()
+
+    loads = [tuple(int(value) for value in load.split(':')) for load in args.loads]
+    # timings of another Python version are not comparable: its cases count as without baseline
+    baseline = load_baseline(args.baseline, python=get_python_version())
+    if not baseline and load_baseline(args.baseline):
+        print(f'The baseline {args.baseline} was measured with another Python version than {get_python_version()}')
+    results = {}
+    for case_index, case in enumerate(CASES):
+        if args.cases and not any(name in case.name for name in args.cases):
+            continue
+        for size in args.sizes:
+            for nb_bots, nb_orbs in loads:
+                key = get_key(case.name, size, nb_bots, nb_orbs)
+                result = run_case(case_index, size, nb_bots, nb_orbs, args.seed, args.timeout, args.min_time, args.max_calls)
+                results[key] = result
+                if 'error' in result:
+                    print(f'{key:<80} {result["error"]}')
+                else:
+                    print(f'{key:<80} {result["us_per_call"]:>14.1f} µs/call {result["calls_per_s"]:>12.1f} calls/s '
+                          f'{result["peak_memory_kb"]:>10.1f} KB peak {get_ratio_str(result, baseline.get(key, {})):>8}')
+
+    regressions = compare(results=results, baseline=baseline, tolerance=args.tolerance)
+    for key in regressions:
+        print(f'REGRESSION: {key} {get_ratio_str(results[key], baseline[key])} vs baseline')
+    missing = get_missing(results=results, baseline=baseline)
+    for key in missing:
+        print(f'NO BASELINE: {key}')
+    if args.save:
+        save_baseline(path=args.baseline, results=results)
+        print(f'Baseline saved to {args.baseline}')
+    return 1 if (regressions or missing) and args.check and not args.save else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+from collections.abc import Mapping
+from enum import Enum
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from src.utils import conf
+
+# side of the square chunks of a ChunkedMap (in cells)
+CHUNK_SIZE = conf['engine']['map_chunk_size']
+# random tries of sample_n_consecutive_empty_cells() before scanning the whole map
+SPAWN_ATTEMPTS = 16
+
+class CellType(Enum):
+    EMPTY      = 0
+    ORB        = 1
+    SNAKE      = 2
+    MAIN_SNAKE = 3 # player or main bot
+
+# CELL_TYPES[value] -> CellType (the chunks hold the values)
+CELL_TYPES = list(CellType)
+
+
+class ChunkedMap(Mapping):
+    """World.map: the CellType of every cell, usable like the Dict[(x, y), CellType] it replaces
+    (a missing cell is EMPTY, len() = nb_col x nb_row, equal to a dict with the same content).
+    The map is cut into square chunks of 'chunk_size' cells: a chunk (a slot of the 'pool' array) only exists
+    while it holds something, and every chunk keeps its number of non-empty cells and of orbs.
+    Sampling empty cells, spawning snakes and listing what is on the map skip the empty (or full) chunks:
+    memory and time follow what is on the map, not its area."""
+
+    def __init__(self, nb_col: int, nb_row: int, chunk_size: int = CHUNK_SIZE):
+        self.nb_col = nb_col
+        self.nb_row = nb_row
+        self.chunk_size = chunk_size
+        self.nb_chunk_col = -(-nb_col // chunk_size)
+        self.nb_chunk_row = -(-nb_row // chunk_size)
+        shape = (self.nb_chunk_col, self.nb_chunk_row)
+        # slot in 'pool' of every chunk (-1 = no chunk: all its cells are EMPTY)
+        self.index = np.full(shape, -1, dtype=np.int64)
+        # pool[slot] -> array indexed by [x % chunk_size, y % chunk_size] of CellType values
+        self.pool = np.zeros((0, chunk_size, chunk_size), dtype=np.uint8)
+        self.free_slots: List[int] = []
+        self.nb_occupied = np.zeros(shape, dtype=np.int64)  # non-empty cells of each chunk
+        self.nb_orbs = np.zeros(shape, dtype=np.int64)      # orbs of each chunk
+        # cells of each chunk inside the map (the chunks of the last column / row can be cut)
+        widths = np.minimum(chunk_size, nb_col - np.arange(self.nb_chunk_col) * chunk_size)
+        heights = np.minimum(chunk_size, nb_row - np.arange(self.nb_chunk_row) * chunk_size)
+        self.nb_cells = np.outer(widths, heights)
+
+    def copy(self) -> 'ChunkedMap':
+        chunked_map = object.__new__(ChunkedMap)
+        chunked_map.__dict__.update(self.__dict__)
+        chunked_map.index = self.index.copy()
+        chunked_map.pool = self.pool.copy()
+        chunked_map.free_slots = self.free_slots.copy()
+        chunked_map.nb_occupied = self.nb_occupied.copy()
+        chunked_map.nb_orbs = self.nb_orbs.copy()
+        return chunked_map
+
+    def clear(self) -> None:
+        self.index[:] = -1
+        self.free_slots = list(range(len(self.pool) - 1, -1, -1))
+        self.nb_occupied[:] = 0
+        self.nb_orbs[:] = 0
+
+    def get_chunks(self) -> np.ndarray:
+        """(n, 2) array of the (chunk x, chunk y) of the existing chunks."""
+        return np.argwhere(self.index >= 0)
+
+    def allocate_chunks(self, chunk_x: np.ndarray, chunk_y: np.ndarray) -> np.ndarray:
+        """Slots of the given (distinct) chunks, the missing ones are created (the pool doubles when full)."""
+        missing = self.index[chunk_x, chunk_y] < 0
+        nb_missing = int(missing.sum())
+        if nb_missing > len(self.free_slots):
+            capacity = len(self.pool)
+            new_capacity = max(2 * capacity, capacity + nb_missing - len(self.free_slots))
+            self.pool = np.concatenate((self.pool, np.zeros((new_capacity - capacity, self.chunk_size, self.chunk_size), dtype=np.uint8)))
+            self.free_slots[:0] = range(new_capacity - 1, capacity - 1, -1)
+        if nb_missing:
+            slots = self.free_slots[-nb_missing:]
+            del self.free_slots[-nb_missing:]
+            self.pool[slots] = 0
+            self.index[chunk_x[missing], chunk_y[missing]] = slots
+        return self.index[chunk_x, chunk_y]
+
+    def release_empty_chunks(self, chunk_x: np.ndarray, chunk_y: np.ndarray) -> None:
+        empty = self.nb_occupied[chunk_x, chunk_y] == 0
+        if empty.any():
+            self.free_slots.extend(self.index[chunk_x[empty], chunk_y[empty]].tolist())
+            self.index[chunk_x[empty], chunk_y[empty]] = -1
+
+    # ----------------- MAPPING ----------------- #
+
+    def __getitem__(self, cell: Tuple[int, int]) -> CellType:
+        x, y = cell
+        if not (0 <= x < self.nb_col and 0 <= y < self.nb_row):
+            raise KeyError(cell)
+        slot = self.index[x // self.chunk_size, y // self.chunk_size]
+        if slot < 0:
+            return CellType.EMPTY
+        return CELL_TYPES[self.pool[slot, x % self.chunk_size, y % self.chunk_size]]
+
+    def __setitem__(self, cell: Tuple[int, int], cell_type: CellType) -> None:
+        x, y = cell
+        if not (0 <= x < self.nb_col and 0 <= y < self.nb_row):
+            raise KeyError(cell)
+        key = (x // self.chunk_size, y // self.chunk_size)
+        slot = self.index[key]
+        if slot < 0:
+            if cell_type == CellType.EMPTY:
+                return
+            slot = self.allocate_chunks(chunk_x=np.array([key[0]]), chunk_y=np.array([key[1]]))[0]
+        local = (slot, x % self.chunk_size, y % self.chunk_size)
+        previous = CELL_TYPES[self.pool[local]]
+        self.pool[local] = cell_type.value
+        self.nb_occupied[key] += (cell_type != CellType.EMPTY) - (previous != CellType.EMPTY)
+        self.nb_orbs[key] += (cell_type == CellType.ORB) - (previous == CellType.ORB)
+        if not self.nb_occupied[key]:
+            self.free_slots.append(int(slot))
+            self.index[key] = -1
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Every cell of the map, row by row (like get_empty_map())."""
+        for y in range(self.nb_row):
+            for x in range(self.nb_col):
+                yield x, y
+
+    def __len__(self) -> int:
+        return self.nb_col * self.nb_row
+
+    def __contains__(self, cell) -> bool:
+        return isinstance(cell, tuple) and len(cell) == 2 and 0 <= cell[0] < self.nb_col and 0 <= cell[1] < self.nb_row
+
+    # ----------------- BULK ----------------- #
+
+    def set_cells(self, x: np.ndarray, y: np.ndarray, values: np.ndarray | int) -> None:
+        """Sets many cells at once ('values': CellType values, one per cell or the same for all).
+        When a cell is given several times, the last value wins."""
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        if not len(x):
+            return
+        keys, inverse = np.unique((x // self.chunk_size) * self.nb_chunk_row + y // self.chunk_size, return_inverse=True)
+        chunk_x, chunk_y = np.divmod(keys, self.nb_chunk_row)
+        slots = self.allocate_chunks(chunk_x=chunk_x, chunk_y=chunk_y)
+        self.pool[slots[inverse], x % self.chunk_size, y % self.chunk_size] = values
+        chunks = self.pool[slots]
+        self.nb_occupied[chunk_x, chunk_y] = np.count_nonzero(chunks, axis=(1, 2))
+        self.nb_orbs[chunk_x, chunk_y] = np.count_nonzero(chunks == CellType.ORB.value, axis=(1, 2))
+        self.release_empty_chunks(chunk_x=chunk_x, chunk_y=chunk_y)
+
+    def get_non_empty_cells(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """x, y and CellType value of every non-empty cell (only the existing chunks are read)."""
+        chunks = self.get_chunks()
+        pool = self.pool[self.index[chunks[:, 0], chunks[:, 1]]]
+        chunk, x, y = np.nonzero(pool)
+        return x + chunks[chunk, 0] * self.chunk_size, y + chunks[chunk, 1] * self.chunk_size, pool[chunk, x, y]
+
+    def get_cell_array(self) -> np.ndarray:
+        """The whole map as a (nb_col, nb_row) array of CellType values."""
+        cells = np.zeros((self.nb_col, self.nb_row), dtype=np.uint8)
+        x, y, values = self.get_non_empty_cells()
+        cells[x, y] = values
+        return cells
+
+    # ----------------- EMPTY CELLS ----------------- #
+
+    def get_nb_empty(self) -> int:
+        return int(self.nb_cells.sum() - self.nb_occupied.sum())
+
+    def get_chunk_empty_cells(self, chunk_x: int, chunk_y: int) -> Tuple[np.ndarray, np.ndarray]:
+        """x and y of the empty cells of one chunk, in the order of the cells of the chunk (x, then y)."""
+        width = min(self.chunk_size, self.nb_col - chunk_x * self.chunk_size)
+        height = min(self.chunk_size, self.nb_row - chunk_y * self.chunk_size)
+        slot = self.index[chunk_x, chunk_y]
+        if slot < 0:
+            x, y = np.divmod(np.arange(width * height), height)
+        else:
+            x, y = np.nonzero(self.pool[slot, :width, :height] == CellType.EMPTY.value)
+        return x + chunk_x * self.chunk_size, y + chunk_y * self.chunk_size
+
+    def get_empty_cells(self) -> np.ndarray:
+        """(n, 2) array of the (x, y) of every empty cell (chunk by chunk, the full chunks are skipped)."""
+        cells = [np.zeros((0, 2), dtype=np.int64)]
+        for chunk_x, chunk_y in np.argwhere(self.nb_occupied < self.nb_cells).tolist():
+            cells.append(np.stack(self.get_chunk_empty_cells(chunk_x=chunk_x, chunk_y=chunk_y), axis=1))
+        return np.concatenate(cells)
+
+    def sample_empty_cells(self, quantity: int, rng: np.random.Generator) -> np.ndarray:
+        """(quantity, 2) array of distinct empty cells drawn uniformly (there must be enough, see get_nb_empty()).
+        Only the chunks holding a drawn cell are read."""
+        nb_empty = (self.nb_cells - self.nb_occupied).ravel()
+        cumulated = np.cumsum(nb_empty)
+        indexes = rng.choice(int(cumulated[-1]), size=quantity, replace=False)
+        chunk_indexes = np.searchsorted(cumulated, indexes, side='right')
+        locals_ = indexes - (cumulated[chunk_indexes] - nb_empty[chunk_indexes])
+        cells = np.zeros((quantity, 2), dtype=np.int64)
+        for chunk_index in np.unique(chunk_indexes).tolist():
+            drawn = chunk_indexes == chunk_index
+            x, y = self.get_chunk_empty_cells(*divmod(chunk_index, self.nb_chunk_row))
+            cells[drawn, 0] = x[locals_[drawn]]
+            cells[drawn, 1] = y[locals_[drawn]]
+        return cells
+
+    def sample_n_consecutive_empty_cells(self, n: int, rng: np.random.Generator) -> List[dict] | None:
+        """'n' aligned (horizontally or vertically) empty cells as {'x':…, 'y':…}, ascending, None if there are none.
+        First tries from random empty cells (cheap on a sparse map), then looks for them in the whole map."""
+        if self.get_nb_empty() < n:
+            return None
+        for _ in range(SPAWN_ATTEMPTS):
+            (x, y), = self.sample_empty_cells(quantity=1, rng=rng).tolist()
+            dx, dy = ((1, 0), (0, 1))[rng.integers(2)]
+            cells = [(x + i * dx, y + i * dy) for i in range(n)]
+            if all(cell in self and self[cell] == CellType.EMPTY for cell in cells):
+                return [{'x': cell_x, 'y': cell_y} for cell_x, cell_y in cells]
+        starts = self.get_n_consecutive_empty_starts(n=n)
+        if not len(starts):
+            return None
+        x, y, dx, dy = starts[rng.integers(len(starts))].tolist()
+        return [{'x': x + i * dx, 'y': y + i * dy} for i in range(n)]
+
+    def get_n_consecutive_empty_starts(self, n: int) -> np.ndarray:
+        """(m, 4) array of (x, y, dx, dy): the first cell and the direction of every run of 'n' aligned empty cells."""
+        empty = self.get_cell_array() == CellType.EMPTY.value
+        starts = [np.zeros((0, 4), dtype=np.int64)]
+        for axis, (dx, dy) in enumerate(((1, 0), (0, 1))):
+            if empty.shape[axis] < n:
+                continue
+            # number of empty cells in every window of n cells along the axis
+            cumulated = np.cumsum(np.insert(empty, 0, False, axis=axis), axis=axis, dtype=np.int64)
+            windows = np.take(cumulated, np.arange(n, empty.shape[axis] + 1), axis=axis) \
+                    - np.take(cumulated, np.arange(0, empty.shape[axis] - n + 1), axis=axis)
+            x, y = np.nonzero(windows == n)
+            starts.append(np.stack((x, y, np.full_like(x, dx), np.full_like(x, dy)), axis=1))
+        return np.concatenate(starts)
@@ -0,0 +1,136 @@
+from typing import Tuple
+
+import numpy as np
+
+from src.engine.EntityStore import EntityStore, StoreField
+from src.engine.Snake import Direction
+
+# heading (radians) of each grid Direction
+DIRECTION_ANGLE = {direction: float(np.arctan2(direction.value['y'], direction.value['x'])) for direction in Direction}
+
+
+def get_direction(angle: float) -> Direction:
+    """The grid Direction closest to a heading."""
+    return min(Direction, key=lambda direction: abs((angle - DIRECTION_ANGLE[direction] + np.pi) % (2 * np.pi) - np.pi))
+
+
+class ContinuousSnake:
+    """Lightweight view of one snake of a ContinuousSnakeStore: a head at (x, y) followed by a chain of circles
+    (the segments) whose centers live in the store 'trail' array, like all its fields."""
+
+    __slots__ = ('store', 'id')
+
+    is_alive = StoreField()
+    is_bot = StoreField()
+    x = StoreField()
+    y = StoreField()
+    angle = StoreField()        # heading (radians, 0 = +x, counterclockwise)
+    target_angle = StoreField() # where the snake wants to go: the heading turns toward it, 'turn_rate' per tick at most
+    speed = StoreField()        # distance covered by the head per tick (without boost)
+    is_boosting = StoreField()  # the head goes 'boost_factor' times faster and the snake loses length
+    boost_debt = StoreField()   # length lost by boosting and not yet taken from the tail (< 1 segment)
+    length = StoreField()       # number of segments
+    head_index = StoreField()   # index of the newest segment in the ring of the trail (the older ones follow)
+    growth = StoreField()       # segments still to grow (as the snake moves)
+    iteration = StoreField()
+    nb_orbs = StoreField()
+
+    def __init__(self, store: 'ContinuousSnakeStore', id: int):
+        self.store = store
+        self.id = id
+
+    @property
+    def head(self) -> Tuple[float, float]:
+        return self.x, self.y
+
+    @property
+    def direction(self) -> Direction:
+        return get_direction(angle=self.angle)
+
+    def segments(self) -> np.ndarray:
+        """(length, 2) centers of the segments, from the head to the tail."""
+        ring = (self.head_index + np.arange(self.length)) % self.store.max_segments
+        return self.store.trail[self.id, ring]
+
+
+class ContinuousSnakeStore(EntityStore):
+    """The snakes of a ContinuousWorld (see EntityStore): ContinuousWorld.snakes[snake_id] -> ContinuousSnake.
+    The segments of snake i are trail[i], a ring of 'max_segments' (x, y) one 'segment_spacing' apart: moving writes
+    the new segments before the newest one and the tail is implicit (head_index + length - 1), whatever the length.
+    The head itself (x, y) is ahead of the newest segment by less than one spacing."""
+
+    fields = {
+        'is_alive':     np.bool_,
+        'is_bot':       np.bool_,
+        'x':            np.float64,
+        'y':            np.float64,
+        'angle':        np.float64,
+        'target_angle': np.float64,
+        'speed':        np.float64,
+        'is_boosting':  np.bool_,
+        'boost_debt':   np.float64,
+        'length':       np.int32,
+        'head_index':   np.int32,
+        'growth':       np.int32,
+        'iteration':    np.int64,
+        'nb_orbs':      np.int32,
+    }
+    first_slot = 1
+
+    def __init__(self, max_segments: int, capacity: int = 64):
+        self.max_segments = max_segments
+        self.trail = np.zeros((0, max_segments, 2), dtype=np.float64)
+        super().__init__(capacity=capacity)
+
+    def new_handle(self, slot: int) -> ContinuousSnake:
+        return ContinuousSnake(store=self, id=slot)
+
+    def grow(self, capacity: int) -> None:
+        if capacity > self.capacity:
+            self.trail = np.concatenate((self.trail, np.zeros((capacity - self.capacity, self.max_segments, 2))))
+        super().grow(capacity=capacity)
+
+    def copy(self) -> 'ContinuousSnakeStore':
+        store = super().copy()
+        store.max_segments = self.max_segments
+        store.trail = self.trail.copy()
+        return store
+
+    def spawn(self, segments: np.ndarray, angle: float, speed: float, is_bot: bool = True) -> int:
+        """Creates a snake whose segments are 'segments' (from the head to the tail) and returns its id."""
+        slot = self.allocate()
+        arrays = self.arrays
+        length = min(len(segments), self.max_segments)
+        self.trail[slot, :length] = segments[:length]
+        arrays['is_alive'][slot] = True
+        arrays['is_bot'][slot] = is_bot
+        arrays['x'][slot], arrays['y'][slot] = segments[0]
+        arrays['angle'][slot] = angle
+        arrays['target_angle'][slot] = angle
+        arrays['speed'][slot] = speed
+        arrays['is_boosting'][slot] = False
+        arrays['boost_debt'][slot] = 0
+        arrays['length'][slot] = length
+        arrays['head_index'][slot] = 0
+        arrays['growth'][slot] = 0
+        arrays['iteration'][slot] = 0
+        arrays['nb_orbs'][slot] = 0
+        return slot
+
+    def heads(self, ids: np.ndarray) -> np.ndarray:
+        """(len(ids), 2) positions of the heads of the snakes 'ids'."""
+        return np.stack((self.arrays['x'][ids], self.arrays['y'][ids]), axis=1)
+
+    def segments(self, ids: np.ndarray, start: np.ndarray | int = 0, stop: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Centers of the segments [start, stop[ (0 = newest, default stop = length) of the snakes 'ids',
+        each snake from its head to its tail, and the id of their snake."""
+        arrays = self.arrays
+        start = np.broadcast_to(start, ids.shape)
+        counts = np.maximum((arrays['length'][ids] if stop is None else stop) - start, 0)
+        if not len(ids) or not counts.any():
+            return np.zeros((0, 2), dtype=np.float64), np.zeros(0, dtype=np.int64)
+        k = np.arange(counts.max())
+        ring = (arrays['head_index'][ids][:, None] + start[:, None] + k) % self.max_segments
+        # np.take() of flat indexes is much faster than indexing trail with 2 index arrays
+        flat = (ids[:, None] * self.max_segments + ring)[k < counts[:, None]]
+        return np.take(self.trail.reshape(-1, 2), flat, axis=0), np.repeat(ids, counts)
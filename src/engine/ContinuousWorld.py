@@ -0,0 +1,325 @@
+import logging
+import os.path
+from typing import Tuple
+
+import numpy as np
+
+from src.engine.ChunkedMap import SPAWN_ATTEMPTS
+from src.engine.ContinuousSnake import ContinuousSnakeStore, DIRECTION_ANGLE
+from src.engine.Orb import ContinuousOrbStore
+from src.engine.Profiler import TickProfiler
+from src.engine.Snake import Snake, Direction
+from src.engine.SpatialHash import SpatialHash
+from src.utils import conf
+
+logger = logging.getLogger(__name__)
+
+CONTINUOUS = conf['continuous']
+# spawns drawn for each missing snake at every attempt of create_snakes() (a long snake is often not clear)
+SPAWN_CANDIDATES = 8
+
+
+class ContinuousWorld:
+    """Phase 2 of the README: a plane of width x height (float positions) instead of a grid.
+    A snake is a chain of circles of radius 'snake_radius', one 'segment_spacing' apart, whose head goes forward by
+    'speed' per tick ('boost_factor' times more while boosting, which costs length) toward its 'target_angle';
+    the orbs are points of radius 'orb_radius'. Collisions are distances:
+        - a head touching a segment or the head of another snake, or leaving the plane, dies,
+        - a head touching an orb eats it (the snake grows by one segment).
+    Every tick, the segments and the orbs are bucketed in a SpatialHash: a head is only compared with
+    what is around it. The snakes are all bots here; dead ones turn into orbs and, with 'respawn', are replaced.
+    With use_grid_adapter(), the snakes move like in the grid World (see create_snake_from_grid())."""
+
+    def __init__(self, width: float = CONTINUOUS['width'], height: float = CONTINUOUS['height'],
+                 seed: int | np.random.SeedSequence | None = None, respawn: bool = True):
+        logger.debug(f'[{os.path.basename(__file__)}] : Creating continuous world {width}x{height}.')
+        self.width = float(width)
+        self.height = float(height)
+        self.rng = np.random.default_rng(seed)
+        self.respawn = respawn
+        self.snake_radius = CONTINUOUS['snake_radius']
+        self.orb_radius = CONTINUOUS['orb_radius']
+        self.speed = CONTINUOUS['speed']
+        self.segment_spacing = CONTINUOUS['segment_spacing']
+        self.turn_rate = CONTINUOUS['turn_rate']
+        self.boost_factor = CONTINUOUS['boost']['factor']
+        self.boost_cost = CONTINUOUS['boost']['cost'] # segments lost per tick of boost
+        self.boost_min_length = CONTINUOUS['boost']['min_length'] # a shorter snake cannot boost
+        self.length_initial = CONTINUOUS['length_initial']
+        self.death_orbs_every = CONTINUOUS['death_orbs_every']
+        # the orbs left by dead (or boosting) snakes beyond this number are dropped
+        self.max_orbs = CONTINUOUS['max_orbs']
+        self.turn_probability = CONTINUOUS['bots']['turn_probability']
+        self.boost_probability = CONTINUOUS['bots']['boost_probability']
+        self.border_margin = CONTINUOUS['bots']['border_margin']
+        # True: the bots only take the 4 grid Directions (see use_grid_adapter())
+        self.directions_only = False
+        self.settings = {
+            'nb_snakes': 0,
+            'nb_orbs': 0
+        }
+        self.snakes = ContinuousSnakeStore(max_segments=CONTINUOUS['max_segments'])
+        self.orbs = ContinuousOrbStore()
+        self.create_hashes(cell_size=CONTINUOUS['hash_cell_size'])
+        self.nb_deaths = 0
+        self.nb_ticks = 0
+        # timings of the phases of update(), None = not measured (no cost)
+        self.profiler: TickProfiler | None = None
+
+    def create_hashes(self, cell_size: float) -> None:
+        # the cells must hold the largest query: head vs segment (2 radii) and head vs orb
+        cell_size = max(cell_size, 2 * self.snake_radius, self.snake_radius + self.orb_radius)
+        self.segments_hash = SpatialHash(width=self.width, height=self.height, cell_size=cell_size)
+        self.orbs_hash = SpatialHash(width=self.width, height=self.height, cell_size=cell_size)
+
+    def use_grid_adapter(self) -> None:
+        """Moves like the grid World, 1 cell = 1 unit: the heads go from cell center to cell center
+        ('speed' = Snake.speed cells per tick, one segment per cell), the headings are the 4 Directions
+        (a 90° turn per tick at most, see set_direction_snake()) and the bots only take Directions.
+        Two snakes (or a snake and an orb) touch when they are on the same cell."""
+        self.speed = 1
+        self.segment_spacing = 1
+        self.turn_rate = np.pi / 2
+        self.snake_radius = 0.45
+        self.orb_radius = 0.45
+        self.length_initial = conf['snakes']['length_initial']
+        self.border_margin = 2
+        self.directions_only = True
+        self.create_hashes(cell_size=1)
+
+    def create_snakes(self, quantity: int, change_settings: bool = True) -> np.ndarray:
+        """Creates 'quantity' bots, straight lines with a random heading, fully inside the plane and clear of the other
+        snakes: none of their segments (nor their head after the first move) is in a cell of the segments_hash next to
+        a segment or a head of another snake (now and after its next move), so they are at least one cell away.
+        SPAWN_CANDIDATES spawns are drawn for each of them, up to SPAWN_ATTEMPTS times: fewer bots are created when
+        there is no room (the missing ones respawn on the next ticks). Returns their ids."""
+        if change_settings:
+            self.settings['nb_snakes'] += quantity
+        ids = self.snakes.ids()
+        segments, _ = self.snakes.segments(ids=ids)
+        heads = self.snakes.heads(ids=ids)
+        ahead = self.get_heads_ahead(heads=heads, angles=self.snakes.arrays['angle'][ids], speeds=self.snakes.arrays['speed'][ids])
+        taken = self.segments_hash.get_cells_around(points=np.concatenate((segments, heads, ahead)))
+        snake_ids = []
+        for _ in range(SPAWN_ATTEMPTS):
+            if len(snake_ids) == quantity:
+                break
+            bodies, angles = self.get_random_bodies(quantity=(quantity - len(snake_ids)) * SPAWN_CANDIDATES)
+            points = np.concatenate((bodies, self.get_heads_ahead(heads=bodies[:, 0], angles=angles, speeds=self.speed)[:, None]), axis=1)
+            keys = self.segments_hash.get_keys(points=points.reshape(-1, 2)).reshape(len(points), -1)
+            for i in np.flatnonzero(~taken[keys].any(axis=1)).tolist():
+                # (the cells taken by the snakes created since)
+                if taken[keys[i]].any():
+                    continue
+                snake_ids.append(self.snakes.spawn(segments=bodies[i], angle=angles[i], speed=self.speed))
+                taken |= self.segments_hash.get_cells_around(points=points[i])
+                if len(snake_ids) == quantity:
+                    break
+        return np.array(snake_ids, dtype=np.int64)
+
+    def get_random_bodies(self, quantity: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(quantity, length_initial, 2) segments (from the head to the tail) and headings of straight snakes
+        fully inside the plane."""
+        spacing = self.segment_spacing
+        margin = min(self.length_initial * spacing + self.snake_radius, self.width / 2, self.height / 2)
+        heads = self.rng.uniform(low=(margin, margin), high=(self.width - margin, self.height - margin), size=(quantity, 2))
+        if self.directions_only:
+            heads = np.floor(heads) + 0.5
+            angles = self.rng.choice(list(DIRECTION_ANGLE.values()), size=quantity)
+        else:
+            angles = self.rng.uniform(-np.pi, np.pi, size=quantity)
+        # segment k is k * spacing behind the head
+        backward = -np.stack((np.cos(angles), np.sin(angles)), axis=1) * spacing
+        return heads[:, None, :] + np.arange(self.length_initial)[None, :, None] * backward[:, None, :], angles
+
+    @staticmethod
+    def get_heads_ahead(heads: np.ndarray, angles: np.ndarray, speeds: np.ndarray | float) -> np.ndarray:
+        """Where the heads are after one move straight ahead."""
+        return heads + np.stack((np.cos(angles), np.sin(angles)), axis=1) * np.reshape(speeds, (-1, 1))
+
+    def create_snake_from_grid(self, snake: Snake) -> int:
+        """Copy of a snake of the grid World (see use_grid_adapter()): its cells become segments at the cell centers,
+        its direction a heading and its Snake.speed (cells per tick) its speed. Returns the id of the copy."""
+        segments = np.array(list(snake.cells())[::-1], dtype=np.float64) + 0.5
+        angle = DIRECTION_ANGLE[snake.direction or Direction.UP]
+        return self.snakes.spawn(segments=segments, angle=angle, speed=snake.speed, is_bot=snake.is_bot)
+
+    def create_orbs(self, quantity: int, change_settings: bool = True) -> np.ndarray:
+        """Creates 'quantity' orbs anywhere on the plane. Returns their ids."""
+        if change_settings:
+            self.settings['nb_orbs'] += quantity
+        positions = self.rng.uniform(low=(0, 0), high=(self.width, self.height), size=(quantity, 2))
+        if self.directions_only:
+            positions = np.floor(positions) + 0.5
+        return self.orbs.spawn_many(x=positions[:, 0], y=positions[:, 1])
+
+    def set_target_angle(self, snake_id: int, angle: float) -> None:
+        self.snakes[snake_id].target_angle = angle
+
+    def set_direction_snake(self, snake_id: int, direction: Direction) -> None:
+        """Grid API: heads toward a Direction (reached this tick with the 90° turn rate of the grid adapter)."""
+        self.snakes[snake_id].target_angle = DIRECTION_ANGLE[direction]
+
+    def set_boost(self, snake_id: int, is_boosting: bool) -> None:
+        self.snakes[snake_id].is_boosting = is_boosting
+
+    def enable_profiler(self, window: int | None = None) -> TickProfiler:
+        if self.profiler is None:
+            self.profiler = TickProfiler(window=window or conf['engine']['profiler']['window'])
+        return self.profiler
+
+    def disable_profiler(self) -> None:
+        self.profiler = None
+
+    def update(self) -> None:
+        """Called every tick."""
+        profiler = self.profiler
+        if profiler:
+            profiler.start()
+        self.steer_bots()
+        if profiler:
+            profiler.lap('directions')
+        ids = self.snakes.ids()
+        self.move_snakes(ids=ids)
+        if profiler:
+            profiler.lap('moves')
+        heads = self.snakes.heads(ids=ids)
+        dead = self.get_dead_snakes(ids=ids, heads=heads)
+        if profiler:
+            profiler.lap('collisions')
+        alive = ~np.isin(ids, dead)
+        self.eat_orbs(ids=ids[alive], heads=heads[alive])
+        if profiler:
+            profiler.lap('orbs')
+        self.kill_snakes(snake_ids=dead)
+        if self.respawn and len(self.snakes) < self.settings['nb_snakes']:
+            self.create_snakes(quantity=self.settings['nb_snakes'] - len(self.snakes), change_settings=False)
+        self.nb_ticks += 1
+        if profiler:
+            profiler.lap('kill_snakes')
+            profiler.end_tick()
+
+    def steer_bots(self) -> None:
+        """Bots pick a new random heading (and boost or not) now and then ('turn_probability'),
+        and head back to the center near the borders."""
+        arrays = self.snakes.arrays
+        ids = np.flatnonzero(self.snakes.used & arrays['is_bot'])
+        if not len(ids):
+            return
+        turns = ids[self.rng.random(len(ids)) < self.turn_probability]
+        arrays['target_angle'][turns] = self.rng.uniform(-np.pi, np.pi, size=len(turns))
+        arrays['is_boosting'][turns] = self.rng.random(len(turns)) < self.boost_probability
+        heads = self.snakes.heads(ids=ids)
+        margin = self.border_margin
+        near_border = ((heads[:, 0] < margin) | (heads[:, 0] > self.width - margin)
+                       | (heads[:, 1] < margin) | (heads[:, 1] > self.height - margin))
+        to_center = np.array([self.width / 2, self.height / 2]) - heads[near_border]
+        arrays['target_angle'][ids[near_border]] = np.arctan2(to_center[:, 1], to_center[:, 0])
+        if self.directions_only:
+            # closest Direction
+            arrays['target_angle'][ids] = np.round(arrays['target_angle'][ids] / (np.pi / 2)) * (np.pi / 2)
+
+    def move_snakes(self, ids: np.ndarray) -> None:
+        """All the snakes at once, without any loop over the snakes or their segments:
+            - the heading turns toward the target angle ('turn_rate' at most),
+            - the head goes forward by speed (x 'boost_factor' for the boosting snakes long enough to boost),
+            - the trail is resampled: new segments every 'segment_spacing' from the newest one toward the head,
+              the oldest ones drop off the tail unless the snake grows,
+            - boosting costs 'boost_cost' segments per tick, taken from the tail (they become orbs)."""
+        if not len(ids):
+            return
+        snakes = self.snakes
+        arrays = snakes.arrays
+        max_segments = snakes.max_segments
+        angles = arrays['angle'][ids]
+        # shortest signed turn, limited to turn_rate
+        turn = (arrays['target_angle'][ids] - angles + np.pi) % (2 * np.pi) - np.pi
+        angles = angles + np.clip(turn, -self.turn_rate, self.turn_rate)
+        arrays['angle'][ids] = angles
+        lengths = arrays['length'][ids]
+        boosting = arrays['is_boosting'][ids] & (lengths > self.boost_min_length)
+        speeds = arrays['speed'][ids] * np.where(boosting, self.boost_factor, 1.0)
+        heads = snakes.heads(ids=ids) + np.stack((np.cos(angles), np.sin(angles)), axis=1) * speeds[:, None]
+        arrays['x'][ids] = heads[:, 0]
+        arrays['y'][ids] = heads[:, 1]
+
+        # trail resampling: nb_new segments on the line from the newest segment to the head
+        trail = snakes.trail.reshape(-1, 2)
+        head_index = arrays['head_index'][ids]
+        newest = trail[ids * max_segments + head_index]
+        offsets = heads - newest
+        distances = np.sqrt(np.sum(offsets ** 2, axis=1))
+        # (+ epsilon: a head exactly one spacing ahead gets its segment despite the rounding errors)
+        nb_new = np.minimum(np.floor(distances / self.segment_spacing + 1e-9), max_segments).astype(np.int32)
+        if nb_new.any():
+            k = np.arange(1, nb_new.max() + 1)
+            written = k <= nb_new[:, None]
+            steps = k[None, :] * self.segment_spacing / np.where(distances > 0, distances, 1)[:, None]
+            points = newest[:, None, :] + steps[:, :, None] * offsets[:, None, :]
+            ring = (head_index[:, None] - k) % max_segments
+            trail[(ids[:, None] * max_segments + ring)[written]] = points[written]
+            arrays['head_index'][ids] = (head_index - nb_new) % max_segments
+
+        # length: growing keeps as many old segments as new ones were written, boosting takes from the tail
+        growth = arrays['growth'][ids]
+        grows = np.minimum(np.minimum(nb_new, growth), max_segments - lengths)
+        arrays['growth'][ids] = growth - np.minimum(nb_new, growth)
+        lengths = lengths + grows
+        debts = arrays['boost_debt'][ids] + np.where(boosting, self.boost_cost, 0.0)
+        shrinks = np.clip(np.floor(debts).astype(np.int32), 0, np.maximum(lengths - self.boost_min_length, 0))
+        arrays['boost_debt'][ids] = np.where(boosting, debts - shrinks, 0.0)
+        arrays['length'][ids] = lengths - shrinks
+        if shrinks.any():
+            dropped, _ = snakes.segments(ids=ids, start=lengths - shrinks, stop=lengths)
+            self.create_orbs_at(positions=dropped)
+        arrays['iteration'][ids] += 1
+
+    def get_dead_snakes(self, ids: np.ndarray, heads: np.ndarray) -> np.ndarray:
+        """Ids of the snakes whose head left the plane or touches a segment or the head of another snake."""
+        outside = ((heads[:, 0] < 0) | (heads[:, 0] >= self.width) | (heads[:, 1] < 0) | (heads[:, 1] >= self.height))
+        segments, owners = self.snakes.segments(ids=ids)
+        points, owners = np.concatenate((segments, heads)), np.concatenate((owners, ids))
+        self.segments_hash.build(points=points, near=heads)
+        query_ids, point_ids = self.segments_hash.query_pairs(queries=heads, radius=2 * self.snake_radius)
+        hit = owners[point_ids] != ids[query_ids]
+        return np.union1d(ids[outside], ids[query_ids[hit]])
+
+    def eat_orbs(self, ids: np.ndarray, heads: np.ndarray) -> None:
+        """Orbs touched by a head are eaten (by the snake with the lowest id if several touch it)
+        and replaced as long as there are fewer orbs than settings['nb_orbs']."""
+        orb_ids = self.orbs.ids()
+        self.orbs_hash.build(points=self.orbs.positions(), near=heads)
+        query_ids, orb_indexes = self.orbs_hash.query_pairs(queries=heads, radius=self.snake_radius + self.orb_radius)
+        if not len(query_ids):
+            return
+        # query_ids are sorted by cell offset, not by snake: the first eater of an orb = its lowest query index
+        order = np.lexsort((query_ids, orb_indexes))
+        orb_indexes, first = np.unique(orb_indexes[order], return_index=True)
+        eaters = ids[query_ids[order][first]]
+        arrays = self.snakes.arrays
+        np.add.at(arrays['growth'], eaters, 1)
+        np.add.at(arrays['nb_orbs'], eaters, 1)
+        for orb_id in orb_ids[orb_indexes].tolist():
+            del self.orbs[orb_id]
+        self.create_orbs(quantity=min(len(orb_indexes), max(0, self.settings['nb_orbs'] - len(self.orbs))), change_settings=False)
+
+    def create_orbs_at(self, positions: np.ndarray) -> None:
+        """Orbs left by the snakes (the ones outside the plane or beyond 'max_orbs' are dropped)."""
+        positions = positions[(positions[:, 0] >= 0) & (positions[:, 0] < self.width)
+                              & (positions[:, 1] >= 0) & (positions[:, 1] < self.height)]
+        positions = positions[:max(0, self.max_orbs - len(self.orbs))]
+        self.orbs.spawn_many(x=positions[:, 0], y=positions[:, 1])
+
+    def kill_snakes(self, snake_ids: np.ndarray) -> None:
+        """Dead snakes turn into orbs (one every 'death_orbs_every' segments, up to 'max_orbs') and leave the game."""
+        if not len(snake_ids):
+            return
+        segments, _ = self.snakes.segments(ids=snake_ids)
+        lengths = self.snakes.arrays['length'][snake_ids]
+        # index of every segment in its snake (0 = head)
+        ranks = np.arange(len(segments)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        self.create_orbs_at(positions=segments[ranks % self.death_orbs_every == 0])
+        for snake_id in snake_ids.tolist():
+            self.snakes.arrays['is_alive'][snake_id] = False
+            del self.snakes[snake_id]
+        self.nb_deaths += len(snake_ids)
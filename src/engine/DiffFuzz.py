@@ -0,0 +1,237 @@
+"""Differential fuzzing: the reference engine (World.update()) and a candidate engine run side by side
+from the same seed on random scenarios, and everything observable is compared after every tick
+(map, bodies, directions, scores, rewards, radar states, orbs). A divergence is shrunk to a minimal scenario.
+
+    python -m src.engine.DiffFuzz --candidate clone --scenarios 200 --seed 0
+
+A candidate is a class like ReferenceEngine (built from a Scenario, step() = one tick, 'world' = what is observed),
+registered in CANDIDATES: any faster engine must pass here before replacing World.update().
+"""
+import argparse
+import copy
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from src.engine.World import World, GameMode
+
+RESOLUTIONS = ('sequential', 'simultaneous')
+BOTS_POLICIES = ('random', 'distance_field')
+
+
+class Scenario:
+    """Everything needed to build the same World twice: grid, population, rules, seed and number of ticks."""
+
+    def __init__(self, seed: int, nb_col: int, nb_row: int, nb_snakes: int, nb_orbs: int, nb_ticks: int,
+                 resolution: str = 'sequential', bots_policy: str = 'random'):
+        self.seed = seed
+        self.nb_col = nb_col
+        self.nb_row = nb_row
+        self.nb_snakes = nb_snakes
+        self.nb_orbs = nb_orbs
+        self.nb_ticks = nb_ticks
+        self.resolution = resolution
+        self.bots_policy = bots_policy
+
+    @staticmethod
+    def random(rng: np.random.Generator, nb_ticks: int = 100) -> 'Scenario':
+        return Scenario(seed=int(rng.integers(2 ** 31)),
+                        nb_col=int(rng.integers(4, 31)), nb_row=int(rng.integers(4, 31)),
+                        nb_snakes=int(rng.integers(1, 13)), nb_orbs=int(rng.integers(0, 41)), nb_ticks=nb_ticks,
+                        resolution=RESOLUTIONS[rng.integers(len(RESOLUTIONS))],
+                        bots_policy=BOTS_POLICIES[rng.integers(len(BOTS_POLICIES))])
+
+    def replace(self, **changes) -> 'Scenario':
+        scenario = copy.copy(self)
+        scenario.__dict__.update(changes)
+        return scenario
+
+    def get_smaller(self) -> Iterator['Scenario']:
+        """Simpler variants of this scenario, the most aggressive first (see shrink())."""
+        for name, minimum in (('nb_snakes', 1), ('nb_orbs', 0), ('nb_col', 4), ('nb_row', 4)):
+            value = getattr(self, name)
+            for smaller in sorted({minimum, value // 2, value - 1}):
+                if minimum <= smaller < value:
+                    yield self.replace(**{name: smaller})
+        if self.resolution != 'sequential':
+            yield self.replace(resolution='sequential')
+        if self.bots_policy != 'random':
+            yield self.replace(bots_policy='random')
+
+    def get_world(self) -> World:
+        """A new World in BOTS mode (resets itself on game over), always the same for the same scenario.
+        It does not learn: restore() keeps what was learned, and the q_tables are not part of what is compared."""
+        world = World(nb_col=self.nb_col, nb_row=self.nb_row, game_mode=GameMode.BOTS, auto_retry=True, seed=self.seed)
+        world.learns = False
+        world.resolution = self.resolution
+        world.bots_policy = self.bots_policy
+        world.create_orbs(quantity=self.nb_orbs)
+        world.create_snakes(quantity=self.nb_snakes)
+        return world
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Scenario) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        return 'Scenario(' + ', '.join(f'{name}={value!r}' for name, value in self.__dict__.items()) + ')'
+
+
+class ReferenceEngine:
+    """The engine every candidate is compared with: World.update()."""
+
+    def __init__(self, scenario: Scenario):
+        self.world = scenario.get_world()
+
+    def step(self) -> None:
+        self.world.update()
+
+
+class CloneEngine(ReferenceEngine):
+    """Plays a World.clone() of the initial World (copied map, bodies and orbs, copied RNG state)."""
+
+    def __init__(self, scenario: Scenario):
+        self.world = scenario.get_world().clone()
+
+
+class RestoreEngine(ReferenceEngine):
+    """Plays the initial World after it has been played for a while and restored (see World.snapshot())."""
+
+    nb_ticks_before_restore = 50
+
+    def __init__(self, scenario: Scenario):
+        world = scenario.get_world()
+        snapshot = world.snapshot()
+        for _ in range(self.nb_ticks_before_restore):
+            world.update()
+        world.restore(snapshot=snapshot)
+        self.world = world
+
+
+class CopyEveryTickEngine(ReferenceEngine):
+    """Goes on with a fresh World.clone() after every tick: every tick runs on copied stores and map."""
+
+    def step(self) -> None:
+        self.world.update()
+        self.world = self.world.clone()
+
+
+CANDIDATES: Dict[str, Callable[[Scenario], ReferenceEngine]] = {
+    'clone': CloneEngine,
+    'restore': RestoreEngine,
+    'copy_every_tick': CopyEveryTickEngine,
+}
+
+
+def get_observation(world: World) -> dict:
+    """Everything a tick can change, in comparable form (the rewards are the score differences between two ticks)."""
+    snakes = list(world.snakes.items())
+    return {
+        'map': {(x, y): value for x, y, value in zip(*(array.tolist() for array in world.map.get_non_empty_cells()))},
+        'bodies': {snake_id: tuple(snake.cells()) for snake_id, snake in snakes},
+        'directions': {snake_id: snake.direction for snake_id, snake in snakes},
+        'scores': {snake_id: (snake.score, snake.iteration, snake.nb_orbs, snake.is_main_snake) for snake_id, snake in snakes},
+        'radar': {snake_id: world.get_state_snake(snake_id=snake_id) for snake_id, _ in snakes},
+        'orbs': {orb_id: world.orbs.position(orb_id=orb_id) for orb_id in world.orbs},
+        'game': (world.game_over, world.nb_deaths, world.nb_games),
+    }
+
+def get_rewards(before: dict, after: dict) -> dict:
+    """Score won by each snake during the tick (the snakes born during the tick are counted from 0)."""
+    return {snake_id: score - before['scores'].get(snake_id, (0,))[0] for snake_id, (score, *_) in after['scores'].items()}
+
+
+class Divergence:
+    """First tick after which the candidate differs from the reference, and what differs (reference, candidate)."""
+
+    def __init__(self, scenario: Scenario, tick: int, differences: Dict[str, Tuple]):
+        self.scenario = scenario
+        self.tick = tick
+        self.differences = differences
+
+    def __repr__(self) -> str:
+        details = '\n'.join(f'  {key}: reference={reference!r}\n  {" " * len(key)}  candidate={candidate!r}'
+                            for key, (reference, candidate) in self.differences.items())
+        return f'Divergence after tick {self.tick} of {self.scenario}\n{details}'
+
+
+def get_differences(reference: dict, candidate: dict) -> Dict[str, Tuple]:
+    """For every observed field that differs, the entries that differ (reference values, candidate values)."""
+    differences = {}
+    for key, reference_value in reference.items():
+        candidate_value = candidate[key]
+        if reference_value == candidate_value:
+            continue
+        if isinstance(reference_value, dict):
+            keys = [k for k in reference_value.keys() | candidate_value.keys() if reference_value.get(k) != candidate_value.get(k)]
+            keys = sorted(keys, key=repr)[:5]
+            differences[key] = ({k: reference_value.get(k) for k in keys}, {k: candidate_value.get(k) for k in keys})
+        else:
+            differences[key] = (reference_value, candidate_value)
+    return differences
+
+def run_scenario(scenario: Scenario, candidate: Callable[[Scenario], ReferenceEngine]) -> Divergence | None:
+    """Runs the reference and the candidate in lockstep, returns the first divergence (None if they always agree).
+    Tick 0 is the initial World (before any update)."""
+    reference_engine, candidate_engine = ReferenceEngine(scenario), candidate(scenario)
+    reference = get_observation(reference_engine.world)
+    differences = get_differences(reference, get_observation(candidate_engine.world))
+    if differences:
+        return Divergence(scenario=scenario, tick=0, differences=differences)
+    for tick in range(1, scenario.nb_ticks + 1):
+        reference_engine.step()
+        candidate_engine.step()
+        next_reference, next_candidate = get_observation(reference_engine.world), get_observation(candidate_engine.world)
+        next_reference['rewards'] = get_rewards(reference, next_reference)
+        next_candidate['rewards'] = get_rewards(reference, next_candidate)
+        differences = get_differences(next_reference, next_candidate)
+        if differences:
+            return Divergence(scenario=scenario, tick=tick, differences=differences)
+        reference = next_reference
+    return None
+
+def shrink(divergence: Divergence, candidate: Callable[[Scenario], ReferenceEngine]) -> Divergence:
+    """Greedy shrinking: stop at the divergent tick, then keep the first simpler scenario that still diverges
+    until none does. The result is a local minimum: no single simplification of it diverges."""
+    divergence = run_scenario(divergence.scenario.replace(nb_ticks=divergence.tick), candidate) or divergence
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for scenario in divergence.scenario.get_smaller():
+            smaller = run_scenario(scenario, candidate)
+            if smaller:
+                divergence = run_scenario(scenario.replace(nb_ticks=smaller.tick), candidate) or smaller
+                shrunk = True
+                break
+    return divergence
+
+def fuzz(candidate: Callable[[Scenario], ReferenceEngine], nb_scenarios: int, seed: int | None = None,
+         nb_ticks: int = 100) -> Tuple[int, Divergence | None]:
+    """Random scenarios until the first divergence (shrunk). Returns the number of scenarios run and the divergence."""
+    rng = np.random.default_rng(seed)
+    for index in range(nb_scenarios):
+        scenario = Scenario.random(rng=rng, nb_ticks=nb_ticks)
+        divergence = run_scenario(scenario, candidate)
+        if divergence:
+            return index + 1, shrink(divergence, candidate)
+    return nb_scenarios, None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Differential fuzzing of an engine against World.update()')
+    parser.add_argument('--candidate', choices=list(CANDIDATES), nargs='+', default=list(CANDIDATES))
+    parser.add_argument('--scenarios', type=int, default=100, help='random scenarios per candidate')
+    parser.add_argument('--ticks', type=int, default=100, help='ticks per scenario')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    failures: List[str] = []
+    for name in args.candidate:
+        nb_run, divergence = fuzz(candidate=CANDIDATES[name], nb_scenarios=args.scenarios, seed=args.seed, nb_ticks=args.ticks)
+        if divergence:
+            failures.append(name)
+            print(f'{name}: DIVERGES (scenario {nb_run}/{args.scenarios}), minimal scenario:\n{divergence}')
+        else:
+            print(f'{name}: OK ({nb_run} scenarios of {args.ticks} ticks)')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class DistanceField:
+    """Navigation costs shared by every bot for one tick.
+    Computed once per tick (whatever the number of bots): a bot only has to read
+    the cost of its candidate cells and go to the cheapest one."""
+
+    def __init__(self, distance: np.ndarray, danger: np.ndarray):
+        self.distance = distance
+        self.danger = danger
+        self.cost = distance + danger
+
+    @classmethod
+    def compute(cls, occupancy: np.ndarray, orb_cells: np.ndarray, heads: np.ndarray,
+                danger_radius: int, danger_weight: int) -> 'DistanceField':
+        """occupancy: [x, y] array where 0 = no snake (see World.get_occupancy_grid()).
+        orb_cells / heads: (n, 2) arrays of x, y coordinates."""
+        distance = get_distance_field(passable=occupancy == 0, sources=orb_cells)
+        danger = get_danger_field(shape=occupancy.shape, heads=heads, radius=danger_radius, weight=danger_weight)
+        return cls(distance=distance, danger=danger)
+
+
+def get_distance_field(passable: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """Multi-source BFS: number of moves from every cell to the nearest source, only through passable cells.
+    Cells that cannot reach any source are set to nb_col * nb_row (more than any real distance)."""
+    nb_col, nb_row = passable.shape
+    unreachable = nb_col * nb_row
+    distance = np.full(passable.shape, unreachable, dtype=np.int64)
+    if unreachable == 0 or len(sources) == 0:
+        return distance
+
+    # work on flat indices (index = x * nb_row + y) so that each BFS level is a few array operations
+    passable_flat = passable.ravel()
+    distance_flat = distance.ravel()
+    sources = np.asarray(sources, dtype=np.int64).reshape(-1, 2)
+    frontier = np.unique(sources[:, 0] * nb_row + sources[:, 1])
+    frontier = frontier[passable_flat[frontier]]
+    distance_flat[frontier] = 0
+
+    level = 0
+    while frontier.size:
+        level += 1
+        x, y = np.divmod(frontier, nb_row)
+        neighbours = np.concatenate((
+            frontier[x + 1 < nb_col] + nb_row, # RIGHT
+            frontier[x > 0] - nb_row,          # LEFT
+            frontier[y + 1 < nb_row] + 1,      # UP
+            frontier[y > 0] - 1,               # DOWN
+        ))
+        neighbours = neighbours[passable_flat[neighbours] & (distance_flat[neighbours] == unreachable)]
+        frontier = np.unique(neighbours)
+        distance_flat[frontier] = level
+    return distance
+
+def get_danger_field(shape: tuple, heads: np.ndarray, radius: int, weight: int) -> np.ndarray:
+    """Extra cost around snake heads (where a snake can be next): weight * (radius + 1 - manhattan distance)
+    for every cell within 'radius' cells of a head, summed over all heads."""
+    danger = np.zeros(shape, dtype=np.int64)
+    heads = np.asarray(heads, dtype=np.int64).reshape(-1, 2)
+    if radius < 0 or weight == 0 or len(heads) == 0:
+        return danger
+
+    nb_col, nb_row = shape
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius + abs(dx), radius - abs(dx) + 1):
+            x, y = heads[:, 0] + dx, heads[:, 1] + dy
+            inside = (0 <= x) & (x < nb_col) & (0 <= y) & (y < nb_row)
+            np.add.at(danger, (x[inside], y[inside]), weight * (radius + 1 - abs(dx) - abs(dy)))
+    return danger
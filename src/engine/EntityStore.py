@@ -0,0 +1,149 @@
+import heapq
+from abc import abstractmethod
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+class StoreField:
+    """Attribute of an entity handle whose value lives in the arrays of the handle's EntityStore."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, handle, owner=None):
+        if handle is None:
+            return self
+        return handle.store.arrays[self.name][handle.id].item()
+
+    def __set__(self, handle, value) -> None:
+        handle.store.arrays[self.name][handle.id] = value
+
+
+class EntityStore(MutableMapping):
+    """All the entities of one kind for one World, usable like a Dict[id, handle].
+    Their scalar fields (see 'fields') live in preallocated numpy arrays indexed by slot (= entity id).
+    The slot of a removed entity is reused (lowest first) by the next spawned one, so ids no longer grow forever.
+    Handles are only created when an entity is accessed as an object, and never reused: a handle kept after its entity
+    was removed still reads and writes the slot, which may hold another entity since (check 'store.get(handle.id) is handle')."""
+
+    # name -> numpy dtype of every scalar field
+    fields: Dict[str, type] = {}
+    # slots before this one are never used (ex: id 0 can mean "no entity")
+    first_slot = 0
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = 0
+        self.arrays = {name: np.zeros(0, dtype=dtype) for name, dtype in self.fields.items()}
+        self.used = np.zeros(0, dtype=bool)
+        self.handles: List = []
+        self.free_slots: List[int] = []  # heap (may contain slots that have been used since: skipped when popped)
+        self.nb_used = 0
+        self.grow(capacity=max(capacity, self.first_slot + 1))
+
+    @abstractmethod
+    def new_handle(self, slot: int):
+        """Creates the handle (object view) of the entity in 'slot'."""
+
+    def grow(self, capacity: int) -> None:
+        """Extends the arrays so that slots [0, capacity[ exist."""
+        if capacity <= self.capacity:
+            return
+        for name, array in self.arrays.items():
+            self.arrays[name] = np.concatenate((array, np.zeros(capacity - self.capacity, dtype=array.dtype)))
+        self.used = np.concatenate((self.used, np.zeros(capacity - self.capacity, dtype=bool)))
+        self.handles.extend([None] * (capacity - self.capacity))
+        for slot in range(max(self.capacity, self.first_slot), capacity):
+            heapq.heappush(self.free_slots, slot)
+        self.capacity = capacity
+
+    def allocate(self, slot: int | None = None) -> int:
+        """Reserves the lowest free slot (the arrays double in size when full) or the given one (ex: replays)."""
+        if slot is not None:
+            if slot < self.first_slot or slot in self:
+                raise KeyError(slot)
+            self.grow(capacity=max(self.capacity, slot + 1))
+            self.used[slot] = True
+            self.nb_used += 1
+            return slot
+        while self.free_slots and self.used[self.free_slots[0]]:
+            heapq.heappop(self.free_slots)
+        if not self.free_slots:
+            self.grow(capacity=self.capacity * 2)
+        slot = heapq.heappop(self.free_slots)
+        self.used[slot] = True
+        self.nb_used += 1
+        return slot
+
+    def add(self, handle) -> int:
+        """Moves a handle (ex: created outside any World) into a free slot of this store and returns its new id."""
+        slot = self.allocate()
+        self.used[slot] = False
+        self.nb_used -= 1
+        self[slot] = handle
+        return slot
+
+    def clear(self) -> None:
+        """Removes every entity (the slots are kept for reuse)."""
+        self.used[:] = False
+        self.handles = [None] * self.capacity
+        self.nb_used = 0
+        self.free_slots = list(range(self.first_slot, self.capacity))
+
+    def copy(self) -> 'EntityStore':
+        """Independent copy of the store (arrays and free slots); handles are created again when accessed."""
+        store = object.__new__(type(self))
+        store.capacity = self.capacity
+        store.arrays = {name: array.copy() for name, array in self.arrays.items()}
+        store.used = self.used.copy()
+        store.handles = [None] * self.capacity
+        store.free_slots = self.free_slots.copy()
+        store.nb_used = self.nb_used
+        return store
+
+    def ids(self) -> np.ndarray:
+        """Ids of the entities, ascending."""
+        return np.flatnonzero(self.used)
+
+    # ----------------- MAPPING ----------------- #
+
+    def __getitem__(self, slot: int):
+        if not (0 <= slot < self.capacity and self.used[slot]):
+            raise KeyError(slot)
+        handle = self.handles[slot]
+        if handle is None:
+            handle = self.handles[slot] = self.new_handle(slot=slot)
+        return handle
+
+    def __setitem__(self, slot: int, handle) -> None:
+        """Puts the handle in 'slot': its fields are copied into this store and it now reads/writes them here.
+        The slot must be free (or already hold this handle): use add() to put it in any free slot."""
+        if slot < self.first_slot or (slot in self and self.handles[slot] is not handle):
+            raise KeyError(slot)
+        self.grow(capacity=max(self.capacity, slot + 1))
+        if handle.store is not self or handle.id != slot:
+            for name, array in self.arrays.items():
+                array[slot] = handle.store.arrays[name][handle.id]
+            handle.store, handle.id = self, slot
+        if not self.used[slot]:
+            self.used[slot] = True
+            self.nb_used += 1
+        self.handles[slot] = handle
+
+    def __delitem__(self, slot: int) -> None:
+        if not (0 <= slot < self.capacity and self.used[slot]):
+            raise KeyError(slot)
+        self.used[slot] = False
+        self.nb_used -= 1
+        self.handles[slot] = None
+        heapq.heappush(self.free_slots, slot)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids().tolist())
+
+    def __len__(self) -> int:
+        return self.nb_used
+
+    def __contains__(self, slot) -> bool:
+        return isinstance(slot, (int, np.integer)) and 0 <= slot < self.capacity and bool(self.used[slot])
@@ -0,0 +1,104 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# columns of QTableArray.values, same order as the q_table actions ({'UP': …, 'RIGHT': …, 'DOWN': …, 'LEFT': …})
+ACTIONS = ('UP', 'RIGHT', 'DOWN', 'LEFT')
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+
+class QTableArray:
+    """Array copy of a q_table (Dict[state, Dict[action, value]]) for batched updates:
+    each state seen gets a row of 'values' (rows are added on demand, the array doubles when full).
+    The q_table stays the reference (save / load, choice of the direction): write_rows() copies updated rows back."""
+
+    def __init__(self, capacity: int = 1024):
+        self.values = np.zeros((capacity, len(ACTIONS)), dtype=np.float64)
+        self.rows: Dict[Tuple, int] = {}
+        self.states: List[Tuple] = []
+        self.q_table: dict | None = None
+
+    def bind(self, q_table: dict) -> bool:
+        """Uses the values of this q_table (again if it was replaced, ex: loaded from a file).
+        Returns True when the q_table changed: the rows given before belong to the previous one."""
+        if q_table is self.q_table:
+            return False
+        self.rows.clear()
+        self.states.clear()
+        self.values[:] = 0
+        for state, actions in q_table.items():
+            row = self.get_row(state)
+            self.values[row] = [actions[action] for action in ACTIONS]
+        self.q_table = q_table
+        return True
+
+    def get_row(self, state: Tuple) -> int:
+        row = self.rows.get(state)
+        if row is None:
+            row = self.rows[state] = len(self.states)
+            self.states.append(state)
+            if row >= len(self.values):
+                self.values = np.concatenate((self.values, np.zeros_like(self.values)))
+        return row
+
+    def td_update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray, next_states: np.ndarray,
+                  dones: np.ndarray, learning_rate: float, discount_factor: float) -> None:
+        """One TD step for a whole batch of transitions (rows, action indexes...):
+        Q(s, a) += alpha * [r + gamma * max Q(s') - Q(s, a)] (no max Q(s') when done).
+        Every delta is computed from the values before the batch, deltas of the same (s, a) add up."""
+        targets = rewards + discount_factor * self.values[next_states].max(axis=1) * ~dones
+        deltas = learning_rate * (targets - self.values[states, actions])
+        np.add.at(self.values, (states, actions), deltas)
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Copies these rows back into the bound q_table."""
+        values = self.values
+        for row in np.unique(rows).tolist():
+            self.q_table[self.states[row]] = dict(zip(ACTIONS, values[row].tolist()))
+
+
+class ReplayBuffer:
+    """Last 'capacity' transitions (state row, action index, reward, next state row, done) in preallocated ring arrays."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0 # where the next transition is written
+        self.size = 0
+
+    def add(self, state: int, action: int, reward: float, next_state: int, done: bool) -> None:
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray, next_states: np.ndarray, dones: np.ndarray) -> None:
+        """Same as add() for several transitions at once (ex: one per snake)."""
+        indexes = (self.position + np.arange(len(states))) % self.capacity
+        self.states[indexes] = states
+        self.actions[indexes] = actions
+        self.rewards[indexes] = rewards
+        self.next_states[indexes] = next_states
+        self.dones[indexes] = dones
+        self.position = (self.position + len(states)) % self.capacity
+        self.size = min(self.size + len(states), self.capacity)
+
+    def clear(self) -> None:
+        self.position = 0
+        self.size = 0
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> Tuple[np.ndarray, ...]:
+        """(states, actions, rewards, next_states, dones) of 'batch_size' transitions drawn uniformly (with replacement)."""
+        indexes = rng.integers(self.size, size=batch_size)
+        return self.states[indexes], self.actions[indexes], self.rewards[indexes], self.next_states[indexes], self.dones[indexes]
+
+    def __len__(self) -> int:
+        return self.size
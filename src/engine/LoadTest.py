@@ -0,0 +1,189 @@
+"""Headless load tests: worlds in BOTS mode, or PLAY mode with a scripted player, updated at full speed.
+
+    python -m src.engine.LoadTest --mode bots --worlds 4 --workers 4 --bots 300 --orbs 200 --size 128 --ticks 2000
+    python -m src.engine.LoadTest --engine continuous --bots 500 --orbs 1000 --size 6000 --ticks 2000 --length 100
+
+Reports the ticks/s, the deaths per 1000 ticks and the percentiles of the duration of World.update() (one tick).
+Every world gets its own seed (see get_worlds_seeds()), the worlds are spread over 'workers' processes.
+With '--engine continuous', the worlds are ContinuousWorlds of size width x height (bots only),
+whose bots (and the ones that respawn) start with '--length' segments.
+"""
+import argparse
+import multiprocessing
+import time
+from typing import List
+
+import numpy as np
+
+from src.engine.ContinuousWorld import ContinuousWorld
+from src.engine.Snake import Direction
+from src.engine.World import World, GameMode, get_worlds_seeds
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class ScriptedPlayer:
+    """Stand-in for the keyboard in PLAY mode: keeps its direction, turns now and then ('turn_probability' per tick)
+    and, like a player paying attention, avoids a wall or a snake right in front of it.
+    Its random choices come from its own generator: they do not change the random stream of the World."""
+
+    def __init__(self, turn_probability: float = 0.1, seed: int | np.random.SeedSequence | None = None):
+        self.turn_probability = turn_probability
+        self.rng = np.random.default_rng(seed)
+
+    def choose_direction(self, world: World) -> Direction:
+        player = world.get_snake_player()
+        directions = player.authorized_direction()
+        safe = [direction for direction in directions if not world.is_collision(*player.next_head(direction), snake_id=player.id)]
+        if player.direction in safe and self.rng.random() >= self.turn_probability:
+            return player.direction
+        candidates = safe or directions
+        return candidates[self.rng.integers(len(candidates))]
+
+    def play(self, world: World) -> None:
+        if world.get_snake_player():
+            world.set_direction_player(self.choose_direction(world=world))
+
+
+class LoadTestResult:
+    """Measures of one or several worlds: 'latencies' holds the duration of every tick (seconds)."""
+
+    def __init__(self, nb_worlds: int, nb_ticks: int, nb_deaths: int, nb_resets: int, latencies: np.ndarray, elapsed: float):
+        self.nb_worlds = nb_worlds
+        self.nb_ticks = nb_ticks
+        self.nb_deaths = nb_deaths
+        self.nb_resets = nb_resets
+        self.latencies = latencies
+        self.elapsed = elapsed # wall time of the whole run (the worlds can run in parallel)
+
+    def get_ticks_per_s(self) -> float:
+        """All worlds together (what the machine sustains)."""
+        return self.nb_ticks / self.elapsed if self.elapsed else 0.0
+
+    def get_ticks_per_s_per_world(self) -> float:
+        """Speed of one world updated without pause."""
+        total = float(self.latencies.sum())
+        return len(self.latencies) / total if total else 0.0
+
+    def get_deaths_per_1k_ticks(self) -> float:
+        return 1000 * self.nb_deaths / self.nb_ticks if self.nb_ticks else 0.0
+
+    def get_latency_percentiles_ms(self) -> dict:
+        if not len(self.latencies):
+            return {p: 0.0 for p in PERCENTILES}
+        return dict(zip(PERCENTILES, (np.percentile(self.latencies, PERCENTILES) * 1000).tolist()))
+
+    def get_summary_str(self) -> str:
+        percentiles = ' - '.join(f'p{p:g} {ms:.2f}ms' for p, ms in self.get_latency_percentiles_ms().items())
+        return (f'{self.nb_worlds} world(s) - {self.nb_ticks} ticks - {self.get_ticks_per_s():.0f} ticks/s '
+                f'({self.get_ticks_per_s_per_world():.0f} per world) - {self.get_deaths_per_1k_ticks():.1f} deaths/1k ticks - '
+                f'{self.nb_resets} resets - {percentiles}')
+
+    @staticmethod
+    def merge(results: List['LoadTestResult'], elapsed: float) -> 'LoadTestResult':
+        return LoadTestResult(nb_worlds=sum(result.nb_worlds for result in results),
+                              nb_ticks=sum(result.nb_ticks for result in results),
+                              nb_deaths=sum(result.nb_deaths for result in results),
+                              nb_resets=sum(result.nb_resets for result in results),
+                              latencies=np.concatenate([result.latencies for result in results]),
+                              elapsed=elapsed)
+
+
+def get_load_test_world(game_mode: GameMode, nb_col: int, nb_row: int, nb_bots: int, nb_orbs: int,
+                        seed: int | np.random.SeedSequence | None = None) -> World:
+    """World that resets itself on game over, with 'nb_bots' bots (+ the player in PLAY mode)."""
+    world = World(nb_col=nb_col, nb_row=nb_row, game_mode=game_mode, auto_retry=True, seed=seed)
+    world.create_orbs(quantity=nb_orbs)
+    first_is_a_player = game_mode == GameMode.PLAY
+    world.create_snakes(quantity=nb_bots + 1 if first_is_a_player else nb_bots, first_is_a_player=first_is_a_player)
+    return world
+
+def run_ticks(world: World, nb_ticks: int, player: ScriptedPlayer | None = None, respawn: bool = True) -> LoadTestResult:
+    """Updates 'world' 'nb_ticks' times (or until game over if it does not retry) and measures every update().
+    With 'respawn', dead bots are replaced after each tick so that the load stays the same."""
+    latencies = np.zeros(nb_ticks, dtype=np.float64)
+    nb_games = world.nb_games
+    nb_deaths = world.nb_deaths
+    start = time.perf_counter()
+    tick = 0
+    while tick < nb_ticks and not world.game_over:
+        if player:
+            player.play(world=world)
+        tick_start = time.perf_counter()
+        world.update()
+        latencies[tick] = time.perf_counter() - tick_start
+        tick += 1
+        missing = world.settings['nb_snakes'] - len(world.snakes)
+        if respawn and missing > 0 and not world.game_over:
+            world.create_snakes(quantity=missing, change_settings=False, only_bots=True)
+    return LoadTestResult(nb_worlds=1, nb_ticks=tick, nb_deaths=world.nb_deaths - nb_deaths,
+                          nb_resets=world.nb_games - nb_games, latencies=latencies[:tick],
+                          elapsed=time.perf_counter() - start)
+
+def run_continuous_ticks(world: ContinuousWorld, nb_ticks: int) -> LoadTestResult:
+    """Same as run_ticks() for a ContinuousWorld (it replaces its dead bots itself when it respawns)."""
+    latencies = np.zeros(nb_ticks, dtype=np.float64)
+    nb_deaths = world.nb_deaths
+    start = time.perf_counter()
+    for tick in range(nb_ticks):
+        tick_start = time.perf_counter()
+        world.update()
+        latencies[tick] = time.perf_counter() - tick_start
+    return LoadTestResult(nb_worlds=1, nb_ticks=nb_ticks, nb_deaths=world.nb_deaths - nb_deaths, nb_resets=0,
+                          latencies=latencies, elapsed=time.perf_counter() - start)
+
+def run_world(game_mode: GameMode, nb_col: int, nb_row: int, nb_bots: int, nb_orbs: int, nb_ticks: int,
+              seed: np.random.SeedSequence | None = None, respawn: bool = True, engine: str = 'grid',
+              length: int | None = None) -> LoadTestResult:
+    """One world of a load test (in PLAY mode, the player gets its own stream derived from the seed).
+    engine: 'grid' (World) or 'continuous' (ContinuousWorld of nb_col x nb_row, bots only, 'length' segments long)."""
+    if engine == 'continuous':
+        world = ContinuousWorld(width=nb_col, height=nb_row, seed=seed, respawn=respawn)
+        world.length_initial = length or world.length_initial
+        world.create_orbs(quantity=nb_orbs)
+        world.create_snakes(quantity=nb_bots)
+        return run_continuous_ticks(world=world, nb_ticks=nb_ticks)
+    world_seed, player_seed = (seed or np.random.SeedSequence()).spawn(2)
+    world = get_load_test_world(game_mode=game_mode, nb_col=nb_col, nb_row=nb_row, nb_bots=nb_bots, nb_orbs=nb_orbs, seed=world_seed)
+    world.learns = False
+    player = ScriptedPlayer(seed=player_seed) if game_mode == GameMode.PLAY else None
+    return run_ticks(world=world, nb_ticks=nb_ticks, player=player, respawn=respawn)
+
+def run_load_test(game_mode: GameMode, nb_col: int, nb_row: int, nb_bots: int, nb_orbs: int, nb_ticks: int,
+                  nb_worlds: int = 1, workers: int = 1, seed: int | None = None, respawn: bool = True,
+                  engine: str = 'grid', length: int | None = None) -> LoadTestResult:
+    """'nb_worlds' worlds of 'nb_ticks' ticks each, run by 'workers' processes (1 = in this process)."""
+    arguments = [(game_mode, nb_col, nb_row, nb_bots, nb_orbs, nb_ticks, world_seed, respawn, engine, length)
+                 for world_seed in get_worlds_seeds(seed=seed, nb_worlds=nb_worlds)]
+    start = time.perf_counter()
+    if workers > 1:
+        with multiprocessing.Pool(processes=min(workers, nb_worlds)) as pool:
+            results = pool.starmap(run_world, arguments)
+    else:
+        results = [run_world(*world_arguments) for world_arguments in arguments]
+    return LoadTestResult.merge(results=results, elapsed=time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Headless load test of the engine')
+    parser.add_argument('--engine', choices=['grid', 'continuous'], default='grid', help='continuous: ContinuousWorld (bots only)')
+    parser.add_argument('--mode', choices=['bots', 'play'], default='bots', help='play: the first snake is a scripted player')
+    parser.add_argument('--worlds', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1, help='processes running the worlds')
+    parser.add_argument('--bots', type=int, default=100)
+    parser.add_argument('--orbs', type=int, default=100)
+    parser.add_argument('--size', type=int, nargs='+', default=[128], help='grid size (one value for a square grid, or columns rows), or width height of a continuous world')
+    parser.add_argument('--ticks', type=int, default=1000, help='ticks per world')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-respawn', action='store_true', help='do not replace dead bots')
+    parser.add_argument('--length', type=int, default=None, help='segments of the continuous bots (default: from conf)')
+    args = parser.parse_args()
+    nb_col, nb_row = (args.size * 2)[:2]
+    result = run_load_test(game_mode=GameMode.PLAY if args.mode == 'play' else GameMode.BOTS,
+                           nb_col=nb_col, nb_row=nb_row, nb_bots=args.bots, nb_orbs=args.orbs, nb_ticks=args.ticks,
+                           nb_worlds=args.worlds, workers=args.workers, seed=args.seed, respawn=not args.no_respawn,
+                           engine=args.engine, length=args.length)
+    print(result.get_summary_str())
+
+if __name__ == '__main__':
+    main()
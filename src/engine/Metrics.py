@@ -0,0 +1,81 @@
+"""Per-episode learning metrics (one record per game over), streamed to an append-only binary file.
+
+The file is a small header followed by fixed-size records (see EPISODE_DTYPE): read_metrics() maps it
+without loading it, and downsample() reduces any column to a few min / mean / max points to plot.
+"""
+import os
+from typing import Tuple
+
+import numpy as np
+
+MAGIC = b'MWMET1\n\0'
+
+EPISODE_DTYPE = np.dtype([
+    ('episode', '<u8'),
+    ('score', '<i8'),
+    ('length', '<i8'),       # number of ticks played by the main snake
+    ('orbs', '<i8'),         # number of orbs eaten by the main snake
+    ('q_table_size', '<i8'),
+    ('exploration', '<f8'),
+])
+
+
+class MetricsLog:
+    """Appends one record per episode to 'path' (created if needed, continued otherwise).
+    Records are buffered and written every 'flush_every' episodes (and on close())."""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self.nb_episodes = get_nb_records(path) if os.path.exists(path) else 0
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.buffer = np.zeros(flush_every, dtype=EPISODE_DTYPE)
+        self.nb_buffered = 0
+
+    def append(self, score: int, length: int, orbs: int, q_table_size: int, exploration: float) -> None:
+        self.buffer[self.nb_buffered] = (self.nb_episodes, score, length, orbs, q_table_size, exploration)
+        self.nb_buffered += 1
+        self.nb_episodes += 1
+        if self.nb_buffered == self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write(self.buffer[:self.nb_buffered].tobytes())
+        self.file.flush()
+        self.nb_buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+def get_nb_records(path: str) -> int:
+    size = os.path.getsize(path)
+    return max(size - len(MAGIC), 0) // EPISODE_DTYPE.itemsize
+
+def read_metrics(path: str) -> np.ndarray:
+    """The records of the file as a read-only memory map (nothing is loaded until a column is used)."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a MegaWorm metrics file.')
+    nb_records = get_nb_records(path)
+    if nb_records == 0:
+        return np.zeros(0, dtype=EPISODE_DTYPE)
+    return np.memmap(path, dtype=EPISODE_DTYPE, mode='r', offset=len(MAGIC), shape=(nb_records,))
+
+def downsample(values: np.ndarray, nb_points: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Splits 'values' into (at most) 'nb_points' consecutive buckets of the same size (the last one can be smaller).
+    Returns the index of the middle of each bucket and the min, mean and max of each bucket."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        empty = np.zeros(0)
+        return empty, empty, empty, empty
+    bucket_size = -(-len(values) // nb_points)
+    starts = np.arange(0, len(values), bucket_size)
+    sizes = np.diff(np.append(starts, len(values)))
+    return (starts + (sizes - 1) / 2,
+            np.minimum.reduceat(values, starts),
+            np.add.reduceat(values, starts) / sizes,
+            np.maximum.reduceat(values, starts))
@@ -1,14 +1,81 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from src.engine.EntityStore import EntityStore, StoreField
+
+
 class Orb:
+    """Lightweight view of one orb of an OrbStore (its position lives in the store arrays)."""
+
+    __slots__ = ('store', 'id')
 
-    number_of_orbs = 0
+    x = StoreField()
+    y = StoreField()
 
-    def __init__(self):
-        self.id = self.number_of_orbs+1
-        self.x = None
-        self.y = None
-        self.is_alive = True
-        Orb.number_of_orbs += 1
+    def __init__(self, store: 'OrbStore | None' = None, id: int | None = None):
+        if store is None:
+            # orb outside any World: it gets its own store (see EntityStore.__setitem__() to put it in a World)
+            store = OrbStore(capacity=1)
+            id = store.allocate()
+            store.handles[id] = self
+        self.store = store
+        self.id = id
+
+    @property
+    def is_alive(self) -> bool:
+        return self.store.get(self.id) is self
 
     def set_position(self, x: int, y: int):
         self.x = x
         self.y = y
+
+
+class OrbStore(EntityStore):
+    """The orbs of a World (see EntityStore): World.orbs[orb_id] -> Orb."""
+
+    fields = {
+        'x': np.int32,
+        'y': np.int32,
+    }
+
+    def new_handle(self, slot: int) -> Orb:
+        return Orb(store=self, id=slot)
+
+    def spawn(self, x: int, y: int, orb_id: int | None = None) -> int:
+        """Creates one orb at position (x,y) and returns its id (no object is created)."""
+        slot = self.allocate(slot=orb_id)
+        self.arrays['x'][slot] = x
+        self.arrays['y'][slot] = y
+        return slot
+
+    def spawn_many(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Creates one orb at every (x[i], y[i]) and returns their ids."""
+        slots = np.array([self.allocate() for _ in range(len(x))], dtype=np.int64)
+        self.arrays['x'][slots] = x
+        self.arrays['y'][slots] = y
+        return slots
+
+    def position(self, orb_id: int) -> Tuple[int, int]:
+        return self.arrays['x'][orb_id].item(), self.arrays['y'][orb_id].item()
+
+    def positions(self) -> np.ndarray:
+        """(nb_orbs, 2) array of the x, y of every orb (ids ascending)."""
+        return np.stack((self.arrays['x'][self.used], self.arrays['y'][self.used]), axis=1)
+
+    def cells(self) -> List[Tuple[int, int]]:
+        """Same as positions() but as a list of (x, y) tuples."""
+        return list(zip(self.arrays['x'][self.used].tolist(), self.arrays['y'][self.used].tolist()))
+
+    def get_id_at_position(self, x: int, y: int) -> int | None:
+        found = np.flatnonzero(self.used & (self.arrays['x'] == x) & (self.arrays['y'] == y))
+        return found[0].item() if len(found) else None
+
+
+class ContinuousOrbStore(OrbStore):
+    """The orbs of a ContinuousWorld: same as OrbStore, with float positions."""
+
+    fields = {
+        'x': np.float64,
+        'y': np.float64,
+    }
@@ -0,0 +1,101 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.utils import conf
+
+if TYPE_CHECKING:
+    from src.engine.World import World
+
+
+class FenwickTree:
+    """Prefix sums of non-negative weights: change one weight or find where a cumulated weight falls in O(log n)."""
+
+    def __init__(self, weights: np.ndarray):
+        self.size = len(weights)
+        self.weights = np.asarray(weights, dtype=np.float64).copy()
+        # tree[i] (1-based) = sum of the weights (i - lowbit(i), i], built from the prefix sums in one pass
+        prefix = np.concatenate(([0.0], np.cumsum(self.weights)))
+        index = np.arange(1, self.size + 1)
+        self.tree = np.concatenate(([0.0], prefix[index] - prefix[index - (index & -index)])).tolist()
+        self.total = float(prefix[-1])
+        self.high_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def set(self, i: int, weight: float) -> None:
+        delta = weight - self.weights[i]
+        self.weights[i] = weight
+        self.total += delta
+        i += 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, value: float) -> int:
+        """Index i such that sum(weights[:i]) <= value < sum(weights[:i + 1]) (0 <= value < total)."""
+        i = 0
+        step = self.high_bit
+        while step:
+            if i + step <= self.size and self.tree[i + step] <= value:
+                i += step
+                value -= self.tree[i]
+            step >>= 1
+        # (rounding errors) never return an index outside the tree or with no weight
+        if i >= self.size or self.weights[i] <= 0:
+            i = int(np.flatnonzero(self.weights > 0)[-1])
+        return i
+
+
+class OrbSpawner:
+    """Where and when orbs appear in a World.
+
+    Where: in a chunk of World.map drawn with a weight = its empty cells / (1 + its orbs) ** sparsity,
+    then on one of its empty cells. sparsity = 0 means every empty cell is equally likely; the higher it is,
+    the more new orbs go to the regions that have few of them (refilling). With sparsity > 0, the chunk weights
+    live in a FenwickTree: each orb costs O(log chunks) plus the cells of its chunk, the map is never scanned.
+    When: besides replacing the eaten orbs, a burst of 'burst_size' orbs every 'burst_every' ticks (0 = never)
+    as long as the World has fewer than 'max_orbs' orbs (the number of orbs is a running total, see OrbStore)."""
+
+    def __init__(self, sparsity: float | None = None, burst_every: int | None = None, burst_size: int | None = None,
+                 max_orbs: int | None = None):
+        spawner_conf = conf['orbs']['spawner']
+        self.sparsity = sparsity if sparsity is not None else spawner_conf['sparsity']
+        self.burst_every = burst_every if burst_every is not None else spawner_conf['burst_every']
+        self.burst_size = burst_size if burst_size is not None else spawner_conf['burst_size']
+        self.max_orbs = max_orbs if max_orbs is not None else spawner_conf['max_orbs']
+        self.nb_ticks = 0
+
+    def spawn(self, world: 'World', quantity: int) -> int:
+        """Creates 'quantity' orbs (none if there are not that many empty cells), returns how many were created."""
+        chunked_map = world.map
+        if not quantity or chunked_map.get_nb_empty() < quantity:
+            return 0
+        if not self.sparsity:
+            for x, y in chunked_map.sample_empty_cells(quantity=quantity, rng=world.rng).tolist():
+                world.create_orb(x=x, y=y)
+            return quantity
+        # chunks are numbered like the ravelled count arrays of the ChunkedMap: chunk_x * nb_chunk_row + chunk_y
+        tree = FenwickTree(weights=self.get_weights(nb_empty=chunked_map.nb_cells - chunked_map.nb_occupied,
+                                                    nb_orbs=chunked_map.nb_orbs).ravel())
+        for _ in range(quantity):
+            chunk = tree.find(world.rng.random() * tree.total)
+            chunk_x, chunk_y = divmod(chunk, chunked_map.nb_chunk_row)
+            x, y = chunked_map.get_chunk_empty_cells(chunk_x=chunk_x, chunk_y=chunk_y)
+            cell = world.rng.integers(len(x))
+            world.create_orb(x=int(x[cell]), y=int(y[cell]))
+            tree.set(chunk, self.get_weights(nb_empty=len(x) - 1, nb_orbs=chunked_map.nb_orbs[chunk_x, chunk_y]))
+        return quantity
+
+    def get_weights(self, nb_empty: np.ndarray | int, nb_orbs: np.ndarray | int) -> np.ndarray | float:
+        """Spawn weight of chunks with 'nb_empty' empty cells and 'nb_orbs' orbs (0 for the full ones)."""
+        return nb_empty / (1.0 + nb_orbs) ** self.sparsity
+
+    def on_tick(self, world: 'World') -> int:
+        """Called every tick: bursts of orbs (see 'burst_every'), returns the number of orbs created."""
+        self.nb_ticks += 1
+        if not self.burst_every or self.nb_ticks % self.burst_every:
+            return 0
+        max_orbs = self.max_orbs or 2 * world.settings['nb_orbs']
+        return self.spawn(world=world, quantity=max(0, min(self.burst_size, max_orbs - len(world.orbs))))
+
+    def reset(self) -> None:
+        self.nb_ticks = 0
@@ -0,0 +1,205 @@
+import math
+import time
+from typing import Dict, List, TYPE_CHECKING
+
+import numpy as np
+
+from src.utils import conf
+from src.engine.Snake import Direction
+
+if TYPE_CHECKING:
+    from src.engine.World import World
+
+
+class PlanNode:
+    """Statistics of one sequence of directions of the planned snake (the path from the root):
+    how many rollouts went through it and the sum of the rewards they got from there."""
+
+    __slots__ = ('visits', 'total', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.children: Dict[Direction, PlanNode] = {}
+
+    def get_mean(self) -> float:
+        return self.total / self.visits if self.visits else -math.inf
+
+    def decay(self, factor: float) -> None:
+        """Lowers the weight of the statistics of this subtree (they were measured in an older state of the World)."""
+        self.visits *= factor
+        self.total *= factor
+        for child in self.children.values():
+            child.decay(factor=factor)
+
+
+class RolloutPlanner:
+    """Chooses the direction of a snake by simulating the next ticks on clones of the World (see World.clone()).
+
+    Each rollout goes down the search tree (UCB1 among the directions that do not collide right away), adds one new node,
+    then plays 'rollout_policy' ('random': random direction that does not collide, 'greedy': towards the nearest orb)
+    until 'depth' ticks or the death of the snake. Its score is the sum of the Reward values the snake got
+    (discounted by 'discount' per tick: an orb or a collision matters less the farther it is).
+    The other snakes play as usual on the clone, with their own random stream for each rollout.
+
+    Budget per tick: one rollout starting with each authorized direction, then 'rollouts_per_tick' rollouts if > 0,
+    else as many as fit in 'time_budget_ms' (shared by all the snakes planned in the tick, see choose_directions()).
+    The subtree of the chosen direction becomes the root of the next tick, its statistics weighted by 'tree_decay'."""
+
+    def __init__(self, depth: int | None = None, rollouts_per_tick: int | None = None, time_budget_ms: float | None = None,
+                 rollout_policy: str | None = None, exploration: float | None = None, discount: float | None = None,
+                 tree_decay: float | None = None, seed: int | None = None):
+        self.depth = depth if depth is not None else conf['planner']['depth']
+        self.rollouts_per_tick = rollouts_per_tick if rollouts_per_tick is not None else conf['planner']['rollouts_per_tick']
+        self.time_budget_ms = time_budget_ms if time_budget_ms is not None else conf['planner']['time_budget_ms']
+        self.rollout_policy = rollout_policy or conf['planner']['rollout_policy']
+        self.exploration = exploration if exploration is not None else conf['planner']['exploration']
+        self.discount = discount if discount is not None else conf['planner']['discount']
+        self.tree_decay = tree_decay if tree_decay is not None else conf['planner']['tree_decay']
+        self.rng = np.random.default_rng(seed)
+        self.trees: Dict[int, PlanNode] = {} # snake id -> root of its search tree
+        self.nb_rollouts = 0
+        self.rollouts_time = 0.0
+        self.nb_planned = 0 # snakes planned so far: the next tick starts with the following ones
+
+    def choose_directions(self, world: 'World', snake_ids: List[int]) -> Dict[int, Direction]:
+        """Directions of several snakes for this tick (see choose_direction()).
+        With a time budget, 'time_budget_ms' is for all of them: each snake gets an equal share of the time left.
+        Once it is spent, the snakes left get no direction (the World drives them as bots)
+        and the next tick starts with them."""
+        if self.rollouts_per_tick > 0:
+            return {snake_id: self.choose_direction(world=world, snake_id=snake_id) for snake_id in snake_ids}
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
+        first = self.nb_planned % len(snake_ids) if snake_ids else 0
+        order = snake_ids[first:] + snake_ids[:first]
+        directions = {}
+        for i, snake_id in enumerate(order):
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            directions[snake_id] = self.choose_direction(world=world, snake_id=snake_id,
+                                                         deadline=now + (deadline - now) / (len(order) - i))
+        self.nb_planned += len(directions)
+        return directions
+
+    def choose_direction(self, world: 'World', snake_id: int, deadline: float | None = None) -> Direction:
+        """Runs the rollouts of this tick and returns the direction with the best mean score.
+        Without 'rollouts_per_tick', the rollouts stop at 'deadline' (time.perf_counter(), default: 'time_budget_ms' from now)."""
+        root = self.trees.get(snake_id) or PlanNode()
+        candidates = self.get_candidates(world=world, snake_id=snake_id)
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = start + self.time_budget_ms / 1000
+        # whatever the budget, every candidate direction is tried at least once in the current state
+        for direction in candidates:
+            self.rollout(world=world, snake_id=snake_id, root=root, first_direction=direction)
+        nb_rollouts = len(candidates)
+        while nb_rollouts < self.rollouts_per_tick or (self.rollouts_per_tick <= 0 and time.perf_counter() < deadline):
+            self.rollout(world=world, snake_id=snake_id, root=root)
+            nb_rollouts += 1
+        self.nb_rollouts += nb_rollouts
+        self.rollouts_time += time.perf_counter() - start
+
+        direction = max(candidates, key=lambda d: root.children[d].get_mean() if d in root.children else -math.inf)
+        subtree = root.children[direction]
+        subtree.decay(factor=self.tree_decay)
+        self.trees[snake_id] = subtree
+        return direction
+
+    def rollout(self, world: 'World', snake_id: int, root: PlanNode, first_direction: Direction | None = None) -> None:
+        simulation = self.get_simulation_world(world=world, snake_id=snake_id)
+        path = [root]
+        rewards: List[float] = []
+        node = root
+        for _ in range(self.depth):
+            snake = simulation.snakes[snake_id]
+            if node is not None:
+                if first_direction is not None:
+                    direction, first_direction = first_direction, None
+                else:
+                    direction = self.select_direction(node=node, candidates=self.get_candidates(world=simulation, snake_id=snake_id))
+                is_new = direction not in node.children
+                if is_new:
+                    node.children[direction] = PlanNode()
+                path.append(node.children[direction])
+                # below the new node, the rollout policy plays
+                node = None if is_new else node.children[direction]
+            else:
+                direction = self.get_rollout_direction(world=simulation, snake_id=snake_id)
+            snake.set_direction(direction)
+            score = snake.score
+            simulation.update()
+            if snake_id not in simulation.snakes or not simulation.snakes[snake_id].is_alive:
+                rewards.append(self.get_collision_reward())
+                break
+            rewards.append(simulation.snakes[snake_id].score - score)
+        # path[k] is reached by the k-th direction: it gets the (discounted) rewards from this direction on,
+        # so that its children still compare the right returns once it becomes a root
+        returns = [0.0] * (len(rewards) + 1)
+        for step in range(len(rewards) - 1, -1, -1):
+            returns[step] = rewards[step] + self.discount * returns[step + 1]
+        for depth, path_node in enumerate(path):
+            path_node.visits += 1
+            path_node.total += returns[max(depth - 1, 0)]
+
+    def get_simulation_world(self, world: 'World', snake_id: int) -> 'World':
+        """Clone where only the planned snake is driven from outside, that neither learns nor resets."""
+        from src.engine.World import GameMode
+        simulation = world.clone(seed=self.rng.integers(2**63))
+        simulation.game_mode = GameMode.BOTS
+        simulation.auto_retry = False
+        simulation.learns = False
+        simulation.snakes[snake_id].is_bot = False
+        return simulation
+
+    @staticmethod
+    def get_candidates(world: 'World', snake_id: int) -> List[Direction]:
+        """The authorized directions that do not collide on the next move (all of them if they all do)."""
+        snake = world.snakes[snake_id]
+        directions = snake.authorized_direction()
+        safe = [direction for direction in directions if not world.is_collision(*snake.next_head(direction), snake_id=snake_id)]
+        return safe or directions
+
+    def select_direction(self, node: PlanNode, candidates: List[Direction]) -> Direction:
+        """UCB1: an untried direction first (random), else the best mean + exploration bonus."""
+        untried = [direction for direction in candidates if direction not in node.children]
+        if untried:
+            return untried[self.rng.integers(len(untried))]
+        log_visits = math.log(max(node.visits, 1))
+        return max(candidates, key=lambda d: node.children[d].get_mean()
+                                             + self.exploration * math.sqrt(log_visits / node.children[d].visits))
+
+    def get_rollout_direction(self, world: 'World', snake_id: int) -> Direction:
+        if self.rollout_policy == 'greedy':
+            return self.get_greedy_direction(world=world, snake_id=snake_id)
+        return world.get_direction_authorized_random_that_does_not_collide(snake_id=snake_id)
+
+    def get_greedy_direction(self, world: 'World', snake_id: int) -> Direction:
+        """Safe direction that gets the closest to the nearest orb (Manhattan distance), random on ties."""
+        candidates = self.get_candidates(world=world, snake_id=snake_id)
+        orbs = world.orbs.positions()
+        if not len(orbs):
+            return candidates[self.rng.integers(len(candidates))]
+        snake = world.snakes[snake_id]
+        heads = np.array([snake.next_head(direction) for direction in candidates])
+        distances = np.abs(heads[:, None, :] - orbs[None, :, :]).sum(axis=2).min(axis=1)
+        keys = distances + self.rng.random(len(candidates)) * 0.5
+        return candidates[int(np.argmin(keys))]
+
+    @staticmethod
+    def get_collision_reward() -> float:
+        from src.engine.World import Reward
+        return Reward.COLLISION.value
+
+    def forget(self, snake_id: int | None = None) -> None:
+        """Drops the search tree of a snake (dead or replaced), or every tree."""
+        if snake_id is None:
+            self.trees.clear()
+        else:
+            self.trees.pop(snake_id, None)
+
+    def get_rollouts_per_s(self) -> float:
+        return self.nb_rollouts / self.rollouts_time if self.rollouts_time else 0.0
+
+    def get_summary_str(self) -> str:
+        return f'Planner: {self.nb_rollouts} rollouts - {self.get_rollouts_per_s():.0f} rollouts/s - depth {self.depth}'
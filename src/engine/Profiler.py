@@ -0,0 +1,58 @@
+import time
+from collections import deque, Counter
+from typing import Dict
+
+
+class TickProfiler:
+    """Rolling timings of the phases of World.update() (map rebuilds, radar, bots directions, moves...).
+    Call start() at the beginning of a tick, lap(phase) at the end of each phase and end_tick() at the end:
+    the time between two calls is added to the phase, the last 'window' ticks are kept."""
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.durations: Dict[str, deque] = {}  # phase -> seconds spent in the phase during each of the last ticks
+        self.calls = Counter()                 # phase -> number of laps since the profiler was created
+        self.ticks = 0
+        self.current: Dict[str, float] = {}
+        self.last_time = 0.0
+
+    def start(self) -> None:
+        self.current = {}
+        self.last_time = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + now - self.last_time
+        self.calls[phase] += 1
+        self.last_time = now
+
+    def end_tick(self) -> None:
+        for phase, duration in self.current.items():
+            if phase not in self.durations:
+                self.durations[phase] = deque(maxlen=self.window)
+            self.durations[phase].append(duration)
+        self.ticks += 1
+
+    def get_stats(self) -> Dict[str, dict]:
+        """phase -> mean / max µs per tick (last 'window' ticks), share of the tick time and total number of calls."""
+        means = {phase: sum(durations) / len(durations) for phase, durations in self.durations.items()}
+        total = sum(means.values())
+        return {
+            phase: {
+                'mean_us': means[phase] * 1e6,
+                'max_us': max(durations) * 1e6,
+                'share': means[phase] / total if total else 0.0,
+                'calls': self.calls[phase],
+            }
+            for phase, durations in self.durations.items()
+        }
+
+    def get_tick_us(self) -> float:
+        """Mean duration (µs) of a whole tick over the last 'window' ticks."""
+        return sum(stats['mean_us'] for stats in self.get_stats().values())
+
+    def get_summary_str(self) -> str:
+        """One line, the most expensive phases first."""
+        stats = sorted(self.get_stats().items(), key=lambda item: item[1]['mean_us'], reverse=True)
+        phases = ' | '.join(f'{phase} {values["mean_us"]:.0f}µs ({values["share"]:.0%})' for phase, values in stats)
+        return f'Tick: {self.get_tick_us():.0f}µs - {phases}'
@@ -0,0 +1,302 @@
+"""Compact binary recording of episodes (see EpisodeRecorder) and their replay (see EpisodeReader).
+
+File = header + segments. A segment starts with a keyframe (the whole World state) followed by the
+events of the next 'keyframe_every' ticks, and is compressed on its own (zlib): seeking to a tick
+only decompresses the segment holding it and replays at most 'keyframe_every' ticks of events.
+The keyframe is written at the end of the last tick of the previous segment: what happens between two ticks
+(ex: bots created after an update()) is replayed with the next tick, in the segment of that tick.
+
+Events (all little-endian, snake ids and coordinates are u16, orb ids are u32):
+    MOVES        n, then n x (snake id, direction index, outcome) with outcome = index in OUTCOMES
+    ORB_SPAWN    orb id, x, y
+    ORB_REMOVE   orb id
+    SNAKE_SPAWN  snake id, flags, body length (u32), body cells (x, y) from the tail to the head
+    SNAKE_REMOVE snake id
+    RESET        (the World has been reset: every snake and orb is removed)
+    END_TICK
+"""
+import io
+import struct
+import zlib
+from typing import List, Tuple, Dict, TYPE_CHECKING
+
+import numpy as np
+
+from src.engine.Snake import Direction, pack_cell
+
+if TYPE_CHECKING:
+    from src.engine.World import World, Reward
+
+MAGIC = b'MWREC'
+VERSION = 2
+
+HEADER = struct.Struct('<5sHHHIB')   # magic, version, nb_col, nb_row, keyframe_every, compressed
+SEGMENT = struct.Struct('<III')      # first tick, number of ticks, payload length
+KEYFRAME_SNAKE = struct.Struct('<HBqqBI')   # id, flags, score, iteration, direction (NO_DIRECTION = None), body length
+KEYFRAME_SIZES = struct.Struct('<HI')       # number of snakes, number of orbs
+U8 = struct.Struct('<B')
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+MOVE = struct.Struct('<HBB')
+ORB = struct.Struct('<IHH')
+SNAKE_SPAWN = struct.Struct('<HBI')
+
+MOVES, ORB_SPAWN, ORB_REMOVE, SNAKE_SPAWN_EVENT, SNAKE_REMOVE, RESET, END_TICK = range(7)
+
+DIRECTIONS = list(Direction)
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+NO_DIRECTION = 255
+# index in this tuple = outcome stored in MOVES events (names of Reward)
+OUTCOMES = ('DEFAULT', 'ORB', 'COLLISION')
+# snake flags
+IS_BOT, IS_MAIN_SNAKE, IS_ALIVE = 1, 2, 4
+
+
+def get_snake_flags(snake) -> int:
+    return IS_BOT * snake.is_bot | IS_MAIN_SNAKE * snake.is_main_snake | IS_ALIVE * snake.is_alive
+
+def set_snake_flags(snake, flags: int) -> None:
+    snake.is_bot = bool(flags & IS_BOT)
+    snake.is_main_snake = bool(flags & IS_MAIN_SNAKE)
+    snake.is_alive = bool(flags & IS_ALIVE)
+
+
+class EpisodeRecorder:
+    """Writes what happens in a World, tick by tick (see World.start_recording()).
+    Events are appended to an in-memory buffer, which is compressed and written once per keyframe."""
+
+    def __init__(self, path: str, nb_col: int, nb_row: int, keyframe_every: int = 200, compress: bool = True):
+        self.file = open(path, 'wb')
+        self.nb_col = nb_col
+        self.nb_row = nb_row
+        self.keyframe_every = keyframe_every
+        self.compress = compress
+        self.tick = 0
+        self.segment = io.BytesIO()
+        self.segment_first_tick = 0
+        self.has_keyframe = False
+        self.file.write(HEADER.pack(MAGIC, VERSION, nb_col, nb_row, keyframe_every, compress))
+
+    def start_tick(self, world: 'World') -> None:
+        """Called before each tick: the first one writes the first keyframe
+        (which already holds what happened since the recording started)."""
+        if not self.has_keyframe:
+            self.segment = io.BytesIO()
+            self.write_keyframe(world=world)
+            self.has_keyframe = True
+
+    def end_tick(self, world: 'World') -> None:
+        """Called after each tick: every 'keyframe_every' ticks, a new segment starts with a keyframe."""
+        self.segment.write(U8.pack(END_TICK))
+        self.tick += 1
+        if self.tick % self.keyframe_every == 0:
+            self.flush_segment()
+            self.write_keyframe(world=world)
+
+    def record_moves(self, world: 'World', rewards: Dict[int, 'Reward']) -> None:
+        """Direction and outcome (see OUTCOMES) of every snake that played this tick."""
+        write = self.segment.write
+        write(U8.pack(MOVES) + U16.pack(len(rewards)))
+        for snake_id, reward in rewards.items():
+            write(MOVE.pack(snake_id, DIRECTION_INDEX[world.snakes[snake_id].direction], OUTCOMES.index(reward.name)))
+
+    def record_orb_spawn(self, orb_id: int, x: int, y: int) -> None:
+        self.segment.write(U8.pack(ORB_SPAWN) + ORB.pack(orb_id, x, y))
+
+    def record_orb_remove(self, orb_id: int) -> None:
+        self.segment.write(U8.pack(ORB_REMOVE) + U32.pack(orb_id))
+
+    def record_snake_spawn(self, snake) -> None:
+        body = np.array(list(snake.cells()), dtype='<u2')
+        self.segment.write(U8.pack(SNAKE_SPAWN_EVENT) + SNAKE_SPAWN.pack(snake.id, get_snake_flags(snake), len(body)) + body.tobytes())
+
+    def record_snake_remove(self, snake_id: int) -> None:
+        self.segment.write(U8.pack(SNAKE_REMOVE) + U16.pack(snake_id))
+
+    def record_reset(self) -> None:
+        self.segment.write(U8.pack(RESET))
+
+    def write_keyframe(self, world: 'World') -> None:
+        """The whole state: the cell array, the snakes (with their body) and the orbs."""
+        write = self.segment.write
+        write(world.get_cell_array().astype(np.uint8).tobytes())
+        orb_ids = world.orbs.ids()
+        write(KEYFRAME_SIZES.pack(len(world.snakes), len(orb_ids)))
+        for snake in world.snakes.values():
+            body = np.array(list(snake.cells()), dtype='<u2')
+            direction = DIRECTION_INDEX[snake.direction] if snake.direction is not None else NO_DIRECTION
+            write(KEYFRAME_SNAKE.pack(snake.id, get_snake_flags(snake), snake.score, snake.iteration, direction, len(body)))
+            write(body.tobytes())
+        write(orb_ids.astype('<u4').tobytes())
+        orbs = np.stack((world.orbs.arrays['x'][orb_ids], world.orbs.arrays['y'][orb_ids]), axis=1)
+        write(orbs.astype('<u2').tobytes())
+
+    def flush_segment(self) -> None:
+        payload = self.segment.getvalue()
+        if payload:
+            if self.compress:
+                payload = zlib.compress(payload, 1)
+            self.file.write(SEGMENT.pack(self.segment_first_tick, self.tick - self.segment_first_tick, len(payload)))
+            self.file.write(payload)
+        self.segment = io.BytesIO()
+        self.segment_first_tick = self.tick
+
+    def close(self) -> None:
+        if self.has_keyframe: # otherwise nothing was played: an empty recording
+            self.flush_segment()
+        self.file.close()
+
+
+class EpisodeReader:
+    """Rebuilds the World of any recorded tick: load the keyframe of the segment holding the tick,
+    then replay the events of the ticks in between."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.nb_col, self.nb_row, self.keyframe_every, self.compressed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a MegaWorm recording (version {VERSION}).')
+        self.data = data
+        # (first tick, number of ticks, payload offset, payload length) of every segment
+        self.segments: List[Tuple[int, int, int, int]] = []
+        offset = HEADER.size
+        while offset < len(data):
+            first_tick, nb_ticks, length = SEGMENT.unpack_from(data, offset)
+            offset += SEGMENT.size
+            self.segments.append((first_tick, nb_ticks, offset, length))
+            offset += length
+        self.nb_ticks = self.segments[-1][0] + self.segments[-1][1] if self.segments else 0
+
+    def get_payload(self, segment_index: int) -> memoryview:
+        _first_tick, _nb_ticks, offset, length = self.segments[segment_index]
+        payload = self.data[offset:offset + length]
+        return memoryview(zlib.decompress(payload) if self.compressed else payload)
+
+    def get_segment_index(self, tick: int) -> int:
+        """Index of the segment whose keyframe is the closest one before 'tick' (IndexError without any segment)."""
+        for index in range(len(self.segments) - 1, -1, -1):
+            if self.segments[index][0] <= tick:
+                return index
+        raise IndexError(tick)
+
+    def get_world(self, tick: int) -> 'World':
+        """The World as it was after 'tick' ticks (0 = when the recording started)."""
+        replay = Replay(reader=self)
+        replay.seek(tick=tick)
+        return replay.world
+
+
+class Replay:
+    """A World driven by a recording: seek() to any tick, then step() one tick at a time."""
+
+    def __init__(self, reader: EpisodeReader):
+        from src.engine.World import World, GameMode
+        self.reader = reader
+        self.world = World(nb_col=reader.nb_col, nb_row=reader.nb_row, game_mode=GameMode.BOTS, auto_retry=False)
+        self.tick = 0
+        self.cells: np.ndarray | None = None # cell array of the last keyframe loaded
+        self.segment_index = -1
+        self.payload = memoryview(b'')
+        self.offset = 0
+
+    def seek(self, tick: int) -> None:
+        if not self.reader.segments:
+            return # empty recording: nothing to replay
+        tick = max(0, min(tick, self.reader.nb_ticks))
+        segment_index = self.reader.get_segment_index(tick=tick)
+        # keep replaying the current segment when going forward in it (no need for its keyframe)
+        if not (segment_index == self.segment_index and self.tick <= tick):
+            self.load_keyframe(segment_index=segment_index)
+        while self.tick < tick:
+            self.step()
+
+    def step(self) -> bool:
+        """Replays the events of the next tick. Returns False at the end of the recording."""
+        if self.tick >= self.reader.nb_ticks:
+            return False
+        if self.offset >= len(self.payload):
+            self.load_keyframe(segment_index=self.segment_index + 1)
+        payload = self.payload
+        world = self.world
+        while True:
+            event = payload[self.offset]
+            self.offset += 1
+            if event == END_TICK:
+                break
+            elif event == MOVES:
+                (nb_moves,) = U16.unpack_from(payload, self.offset)
+                self.offset += U16.size
+                for _ in range(nb_moves):
+                    snake_id, direction, outcome = MOVE.unpack_from(payload, self.offset)
+                    self.offset += MOVE.size
+                    self.apply_move(snake_id=snake_id, direction=DIRECTIONS[direction], outcome=OUTCOMES[outcome])
+            elif event == ORB_SPAWN:
+                orb_id, x, y = ORB.unpack_from(payload, self.offset)
+                self.offset += ORB.size
+                world.orbs.spawn(x=x, y=y, orb_id=orb_id)
+            elif event == ORB_REMOVE:
+                (orb_id,) = U32.unpack_from(payload, self.offset)
+                self.offset += U32.size
+                del world.orbs[orb_id]
+            elif event == SNAKE_SPAWN_EVENT:
+                snake_id, flags, length = SNAKE_SPAWN.unpack_from(payload, self.offset)
+                self.offset += SNAKE_SPAWN.size
+                body = np.frombuffer(payload, dtype='<u2', count=2 * length, offset=self.offset).reshape(-1, 2)
+                self.offset += body.nbytes
+                snake = world.snakes.spawn(length=length, speed=1, snake_id=snake_id)
+                set_snake_flags(snake=snake, flags=flags)
+                snake.body.extend(pack_cell(x, y) for x, y in body.tolist())
+            elif event == SNAKE_REMOVE:
+                (snake_id,) = U16.unpack_from(payload, self.offset)
+                self.offset += U16.size
+                del world.snakes[snake_id]
+            elif event == RESET:
+                world.snakes.clear()
+                world.orbs.clear()
+            else:
+                raise ValueError(f'Unknown event {event} at tick {self.tick}')
+        self.tick += 1
+        return True
+
+    def apply_move(self, snake_id: int, direction: Direction, outcome: str) -> None:
+        from src.engine.World import Reward
+        snake = self.world.snakes[snake_id]
+        snake.set_direction(direction)
+        if outcome == 'COLLISION':
+            snake.is_alive = False
+        else:
+            snake.move(grow=outcome == 'ORB')
+        snake.score += Reward[outcome].value
+        snake.iteration += 1
+
+    def load_keyframe(self, segment_index: int) -> None:
+        world = self.world
+        world.snakes.clear()
+        world.orbs.clear()
+        payload = self.reader.get_payload(segment_index=segment_index)
+        nb_cells = self.reader.nb_col * self.reader.nb_row
+        self.cells = np.frombuffer(payload, dtype=np.uint8, count=nb_cells).reshape(self.reader.nb_col, self.reader.nb_row)
+        offset = nb_cells
+        nb_snakes, nb_orbs = KEYFRAME_SIZES.unpack_from(payload, offset)
+        offset += KEYFRAME_SIZES.size
+        for _ in range(nb_snakes):
+            snake_id, flags, score, iteration, direction, length = KEYFRAME_SNAKE.unpack_from(payload, offset)
+            offset += KEYFRAME_SNAKE.size
+            body = np.frombuffer(payload, dtype='<u2', count=2 * length, offset=offset).reshape(-1, 2)
+            offset += body.nbytes
+            snake = world.snakes.spawn(length=length, speed=1, snake_id=snake_id)
+            set_snake_flags(snake=snake, flags=flags)
+            snake.score = score
+            snake.iteration = iteration
+            snake.direction = DIRECTIONS[direction] if direction != NO_DIRECTION else None
+            snake.body.extend(pack_cell(x, y) for x, y in body.tolist())
+        orb_ids = np.frombuffer(payload, dtype='<u4', count=nb_orbs, offset=offset)
+        offset += orb_ids.nbytes
+        orbs = np.frombuffer(payload, dtype='<u2', count=2 * nb_orbs, offset=offset).reshape(-1, 2)
+        for orb_id, (x, y) in zip(orb_ids.tolist(), orbs.tolist()):
+            world.orbs.spawn(x=x, y=y, orb_id=orb_id)
+        self.payload = payload
+        self.offset = offset + orbs.nbytes
+        self.segment_index = segment_index
+        self.tick = self.reader.segments[segment_index][0]
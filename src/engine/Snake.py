@@ -1,8 +1,12 @@
 import logging
 
+from collections import deque
 from enum import Enum
-from typing import List
+from typing import List, Iterator, Tuple
 
+import numpy as np
+
+from src.engine.EntityStore import EntityStore, StoreField
 from src.utils import conf
 
 logger = logging.getLogger(__name__)
@@ -13,29 +17,89 @@ class Direction(Enum):
     DOWN  = {'x':  0, 'y': -1}
     LEFT  = {'x': -1, 'y':  0}
 
+# Same as Direction.value but as (x, y) tuples (avoids building dicts when moving)
+DIRECTION_XY = {direction: (direction.value['x'], direction.value['y']) for direction in Direction}
+
+# A cell (x, y) of a snake body is packed into one int: x in the high bits and y in the low bits
+# (a body is always inside the map so 0 <= x, y < 2^CELL_SHIFT)
+CELL_SHIFT = 16
+CELL_MASK = (1 << CELL_SHIFT) - 1
+
+def pack_cell(x: int, y: int) -> int:
+    return (x << CELL_SHIFT) | y
+
+def unpack_cell(cell: int) -> Tuple[int, int]:
+    return cell >> CELL_SHIFT, cell & CELL_MASK
+
+# Read once: every new snake starts with these AI parameters
+AI_DEFAULTS = {
+    'exploration':     conf['AI']['exploration'],
+    'learning_rate':   conf['AI']['learning_rate'],
+    'discount_factor': conf['AI']['discount_factor'],
+    'radar_nb_cells':  conf['AI']['radar_nb_cells'],
+}
+
 class Snake:
+    """One snake of a SnakeStore: its scalar fields live in the store arrays,
+    its body / direction / AI state in the handle itself."""
 
-    number_of_snakes = 0
+    __slots__ = ('store', 'id', 'body', 'direction', 'state', 'q_table')
 
-    def __init__(self, length: int, speed: int):
-        self.id = self.number_of_snakes+1
-        self.is_alive = True
-        self.length = length
-        self.speed = speed
-        self.positions = []
+    is_alive = StoreField()
+    length = StoreField()
+    speed = StoreField()
+    is_bot = StoreField()
+    is_main_snake = StoreField()
+    iteration = StoreField()
+    score = StoreField()
+    nb_orbs = StoreField()
+    # AI
+    exploration = StoreField()
+    learning_rate = StoreField()
+    discount_factor = StoreField()
+    radar_nb_cells = StoreField()
+    is_greedy = StoreField() # bot following its own q_table without exploring nor learning (frozen policy)
+
+    def __init__(self, length: int, speed: int, store: 'SnakeStore | None' = None, id: int | None = None):
+        if store is None:
+            # snake outside any World: it gets its own store (see EntityStore.__setitem__() to put it in a World)
+            store = SnakeStore(capacity=2)
+            id = store.allocate()
+            store.handles[id] = self
+        self.store = store
+        self.id = id
+        self.reset(length=length, speed=speed)
+
+    def reset(self, length: int, speed: int) -> None:
+        """Initialize the fields of the snake (in its store) and its own state."""
+        self.store.set_defaults(snake_id=self.id, length=length, speed=speed)
+        # packed cells (see pack_cell()) from the tail (left) to the head (right): O(1) move and growth
+        self.body: deque[int] = deque()
         self.direction = None
-        self.is_bot = True
-        self.is_main_snake = False
-        self.iteration = 0
-        self.score = length
-        # AI
-        self.exploration = conf['AI']['exploration']
-        self.learning_rate = conf['AI']['learning_rate']
-        self.discount_factor = conf['AI']['discount_factor']
-        self.radar_nb_cells = conf['AI']['radar_nb_cells']
         self.state = None # current state (before moving)
         self.q_table = {}
-        Snake.number_of_snakes += 1
+
+    @property
+    def positions(self) -> List[dict]:
+        """The body as a list of {'x':…, 'y':…} from the tail to the head (built on each call: prefer cells() / head)."""
+        return [{'x': cell >> CELL_SHIFT, 'y': cell & CELL_MASK} for cell in self.body]
+
+    @positions.setter
+    def positions(self, positions: List[dict]) -> None:
+        self.body = deque(pack_cell(x=position['x'], y=position['y']) for position in positions)
+
+    @property
+    def head(self) -> Tuple[int, int]:
+        return unpack_cell(self.body[-1])
+
+    @property
+    def tail(self) -> Tuple[int, int]:
+        return unpack_cell(self.body[0])
+
+    def cells(self) -> Iterator[Tuple[int, int]]:
+        """The (x, y) cells of the body from the tail to the head."""
+        for cell in self.body:
+            yield cell >> CELL_SHIFT, cell & CELL_MASK
 
     def set_snake_as_player(self) -> None:
         """The snake is controlled by (human) keyboard input"""
@@ -75,16 +139,11 @@ class Snake:
         if self.length <= 1:
             return all_directions
 
-        head = self.positions[-1]
-        neck = self.positions[-2]
+        neck = unpack_cell(self.body[-2])
 
         authorized = []
         for direction in all_directions:
-            target_cell = {
-                'x': head['x'] + direction.value['x'],
-                'y': head['y'] + direction.value['y']
-            }
-            if target_cell != neck:
+            if self.next_head(direction=direction) != neck:
                 authorized.append(direction)
 
         return authorized
@@ -93,22 +152,25 @@ class Snake:
         self.direction = direction
         logger.debug(f'Snake {self.id} new direction = {self.direction}')
 
-    def next_position(self, direction: Direction | None = None) -> dict:
-        """Give the next x/y position for the snake head if it were to move
+    def next_head(self, direction: Direction | None = None) -> Tuple[int, int]:
+        """Give the next (x, y) cell for the snake head if it were to move
         1 cell in its current direction or the direction provided."""
-        direction_ = direction if direction is not None else self.direction
-        head = self.positions[-1]
-        return {
-            'x': head['x'] + direction_.value['x'],
-            'y': head['y'] + direction_.value['y']
-        }
+        dx, dy = DIRECTION_XY[direction if direction is not None else self.direction]
+        head = self.body[-1]
+        return (head >> CELL_SHIFT) + dx, (head & CELL_MASK) + dy
+
+    def next_position(self, direction: Direction | None = None) -> dict:
+        """Same as next_head() but as {'x':…, 'y':…}."""
+        x, y = self.next_head(direction=direction)
+        return {'x': x, 'y': y}
 
     def move(self, grow: bool) -> None:
-        """Actually moves the snake."""
-        self.positions.append( self.next_position() )
+        """Actually moves the snake: O(1) whatever its length."""
+        self.body.append(pack_cell(*self.next_head()))
         if not grow:
-            self.positions.pop(0)
-        logger.debug(f'Snake {self.id} moved to {self.positions} - {self.direction} - Grow = {grow}')
+            self.body.popleft()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'Snake {self.id} moved to {self.positions} - {self.direction} - Grow = {grow}')
 
     def snake_str(self) -> str:
         """Used for debugging."""
@@ -133,3 +195,71 @@ class Snake:
                f'   - Radar            = {self.radar_nb_cells}\n'
                f'   - State            = {self.state}\n'
                f'   - QTable (len={len(self.q_table.items())}), last 10 =  {dict(list(self.q_table.items())[:10])}\n')
+
+
+class SnakeStore(EntityStore):
+    """The snakes of a World (see EntityStore): World.snakes[snake_id] -> Snake.
+    Ids start at 1 so that 0 can mean "no snake" (see World.get_occupancy_grid()).
+    A snake handle always exists (it holds the body), a new one is created for every spawned snake."""
+
+    fields = {
+        'is_alive':        np.bool_,
+        'length':          np.int32,
+        'speed':           np.int32,
+        'is_bot':          np.bool_,
+        'is_main_snake':   np.bool_,
+        'iteration':       np.int64,
+        'score':           np.int64,
+        'nb_orbs':         np.int32,
+        'exploration':     np.float64,
+        'learning_rate':   np.float64,
+        'discount_factor': np.float64,
+        'radar_nb_cells':  np.int32,
+        'is_greedy':       np.bool_,
+    }
+    first_slot = 1
+
+    def __init__(self, capacity: int = 64):
+        # AI parameters of every new snake (see World.set_ai_parameters())
+        self.ai_defaults = AI_DEFAULTS.copy()
+        super().__init__(capacity=capacity)
+
+    def spawn(self, length: int, speed: int, snake_id: int | None = None) -> Snake:
+        """Creates a new snake (not placed yet)."""
+        slot = self.allocate(slot=snake_id)
+        snake = self.handles[slot] = Snake(length=length, speed=speed, store=self, id=slot)
+        return snake
+
+    def new_handle(self, slot: int) -> Snake:
+        """Handle of a slot allocated without spawn(): its fields are kept, its body is empty."""
+        snake = Snake.__new__(Snake)
+        snake.store, snake.id = self, slot
+        snake.body = deque()
+        snake.direction, snake.state, snake.q_table = None, None, {}
+        return snake
+
+    def copy(self) -> 'SnakeStore':
+        """The bodies are copied, the AI state and the q_table are shared (see World.clone())."""
+        store = super().copy()
+        store.ai_defaults = self.ai_defaults.copy()
+        for slot in self.ids().tolist():
+            snake = self.handles[slot]
+            handle = store.handles[slot] = Snake.__new__(Snake)
+            handle.store, handle.id = store, slot
+            handle.body = snake.body.copy()
+            handle.direction, handle.state, handle.q_table = snake.direction, snake.state, snake.q_table
+        return store
+
+    def set_defaults(self, snake_id: int, length: int, speed: int) -> None:
+        arrays = self.arrays
+        arrays['is_alive'][snake_id] = True
+        arrays['length'][snake_id] = length
+        arrays['speed'][snake_id] = speed
+        arrays['is_bot'][snake_id] = True
+        arrays['is_main_snake'][snake_id] = False
+        arrays['iteration'][snake_id] = 0
+        arrays['score'][snake_id] = length
+        arrays['nb_orbs'][snake_id] = 0
+        arrays['is_greedy'][snake_id] = False
+        for name, value in self.ai_defaults.items():
+            arrays[name][snake_id] = value
@@ -0,0 +1,87 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform grid over a width x height plane: the points are bucketed by cell so that finding the points near
+    a query only looks at its cell and the 8 around it (the cost follows the local density, not the number of points).
+    Rebuilt with build() when the points move (a sort of their cell keys), the points outside the plane go to the
+    border cells. Queries need a radius <= cell_size (and the query points given to build() if any)."""
+
+    def __init__(self, width: float, height: float, cell_size: float):
+        self.cell_size = float(cell_size)
+        self.nb_cell_col = max(1, int(np.ceil(width / cell_size)))
+        self.nb_cell_row = max(1, int(np.ceil(height / cell_size)))
+        self.nb_cells = self.nb_cell_col * self.nb_cell_row
+        # the stable sort of 16 bits keys is a radix sort (linear time)
+        self.key_dtype = np.uint16 if self.nb_cells <= np.iinfo(np.uint16).max else np.int64
+        self.points = np.zeros((0, 2), dtype=np.float64)
+        self.order = np.zeros(0, dtype=np.int64)        # indexes of the points, sorted by cell
+        self.starts = np.zeros(self.nb_cells + 1, dtype=np.int64) # points of cell k = order[starts[k]:starts[k + 1]]
+
+    def get_cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(cell column, cell row) of every point, clipped to the grid."""
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        return (np.clip(cells[:, 0], 0, self.nb_cell_col - 1),
+                np.clip(cells[:, 1], 0, self.nb_cell_row - 1))
+
+    def get_keys(self, points: np.ndarray) -> np.ndarray:
+        """Index of the cell of every point (clipped to the grid), as in get_cells_around()."""
+        cell_x, cell_y = self.get_cells(points=points)
+        return cell_x * self.nb_cell_row + cell_y
+
+    def build(self, points: np.ndarray, near: np.ndarray | None = None) -> None:
+        """Buckets the (n, 2) 'points' (their indexes are the ones returned by the queries).
+        If the query points are known, 'near' = these points: only the points around them are bucketed (sorted)."""
+        self.points = points
+        keys = self.get_keys(points=points)
+        kept = None
+        if near is not None:
+            kept = np.flatnonzero(self.get_cells_around(points=near)[keys])
+            keys = keys[kept]
+        keys = keys.astype(self.key_dtype)
+        order = np.argsort(keys, kind='stable')
+        self.order = order if kept is None else kept[order]
+        self.starts[1:] = np.cumsum(np.bincount(keys, minlength=self.nb_cells))
+
+    def get_cells_around(self, points: np.ndarray) -> np.ndarray:
+        """(nb_cells,) True for the cells of the 'points' and their neighbours."""
+        cells = np.zeros((self.nb_cell_col, self.nb_cell_row), dtype=bool)
+        cells[self.get_cells(points=points)] = True
+        # 3x3 dilation, one axis then the other
+        around = cells.copy()
+        around[1:] |= cells[:-1]
+        around[:-1] |= cells[1:]
+        cells = around.copy()
+        around[:, 1:] |= cells[:, :-1]
+        around[:, :-1] |= cells[:, 1:]
+        return around.reshape(-1)
+
+    def query_pairs(self, queries: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(query indexes, point indexes) of every point at a distance < 'radius' from a query point."""
+        if radius > self.cell_size:
+            raise ValueError(f'radius {radius} > cell size {self.cell_size}')
+        cell_x, cell_y = self.get_cells(points=queries)
+        query_ids, point_ids = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                x, y = cell_x + dx, cell_y + dy
+                inside = (0 <= x) & (x < self.nb_cell_col) & (0 <= y) & (y < self.nb_cell_row)
+                keys = np.where(inside, x * self.nb_cell_row + y, 0)
+                begins = self.starts[keys]
+                counts = np.where(inside, self.starts[keys + 1] - begins, 0)
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # one row per (query, point of the cell): point k of a cell is order[begin + k]
+                ends = np.cumsum(counts)
+                offsets = np.arange(total) - np.repeat(ends - counts, counts)
+                query_ids.append(np.repeat(np.arange(len(queries)), counts))
+                point_ids.append(self.order[np.repeat(begins, counts) + offsets])
+        if not query_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        query_ids, point_ids = np.concatenate(query_ids), np.concatenate(point_ids)
+        distances = np.sum((queries[query_ids] - self.points[point_ids]) ** 2, axis=1)
+        close = distances < radius * radius
+        return query_ids[close], point_ids[close]
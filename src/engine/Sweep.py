@@ -0,0 +1,259 @@
+"""Hyperparameter sweeps of the Q-learner: every configuration of AI parameters learns headless (LEARN mode, from an
+empty q_table) for a fixed number of ticks, with several seeds, in a pool of processes.
+
+    python -m src.engine.Sweep --grid learning_rate=0.05,0.1,0.2 discount_factor=0.8,0.9,0.95 --seeds 3 --ticks 200000 --out sweeps/grid
+    python -m src.engine.Sweep --random learning_rate=loguniform:0.01:0.5 exploration=uniform:0.5:1 radar_nb_cells=1,2,3 \\
+                               --samples 40 --seeds 2 --ticks 100000 --out sweeps/random
+
+Each run writes its learning curve to <out>/runs/<run id>.metrics (see Metrics, plot it with src.ui.plots)
+and its final scores as one row of <out>/results.csv. Running the same command again resumes the sweep:
+finished runs are skipped and interrupted runs go on from their last checkpoint (the whole World is pickled,
+so a resumed run ends exactly like an uninterrupted one). The seed 'i' of every configuration is the same
+(common random numbers: the configurations are compared on the same games).
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import pickle
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.engine.Metrics import EPISODE_DTYPE, MAGIC, read_metrics
+from src.engine.Snake import AI_DEFAULTS
+from src.engine.World import World, GameMode, get_worlds_seeds
+
+PARAMETERS = tuple(AI_DEFAULTS)
+INTEGER_PARAMETERS = ('radar_nb_cells',)
+DISTRIBUTIONS = ('uniform', 'loguniform')
+RESULT_COLUMNS = ('run_id', *PARAMETERS, 'seed', 'seed_index', 'ticks', 'episodes',
+                  'final_score', 'best_score', 'final_orbs', 'q_table_size', 'elapsed_s')
+
+
+def parse_value(name: str, text: str) -> int | float:
+    return int(text) if name in INTEGER_PARAMETERS else float(text)
+
+def parse_spec(items: List[str]) -> Dict[str, list]:
+    """['learning_rate=0.05,0.1', 'exploration=uniform:0.5:1'] -> {'learning_rate': [0.05, 0.1], 'exploration': ['uniform', 0.5, 1.0]}"""
+    spec = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in PARAMETERS or not values:
+            raise ValueError(f'Expected <parameter>=<values> with a parameter in {PARAMETERS}, got {item!r}')
+        distribution, _, bounds = values.partition(':')
+        if distribution in DISTRIBUTIONS:
+            low, high = (parse_value(name, bound) for bound in bounds.split(':'))
+            spec[name] = [distribution, low, high]
+        else:
+            spec[name] = [parse_value(name, value) for value in values.split(',')]
+    return spec
+
+def sample(rng: np.random.Generator, name: str, values: list) -> int | float:
+    """One value of a random search spec: a uniform or log-uniform draw between 2 bounds, or one of the values."""
+    distribution = values[0]
+    if distribution == 'uniform' and name in INTEGER_PARAMETERS:
+        return int(rng.integers(values[1], values[2] + 1))
+    if distribution == 'uniform':
+        value = rng.uniform(values[1], values[2])
+    elif distribution == 'loguniform':
+        value = np.exp(rng.uniform(np.log(values[1]), np.log(values[2])))
+    else:
+        return values[rng.integers(len(values))]
+    return float(f'{value:.4g}') # short enough to be read in a run id
+
+def get_configurations(grid: Dict[str, list] | None = None, random: Dict[str, list] | None = None,
+                       nb_samples: int = 1, seed: int | None = 0) -> List[dict]:
+    """Every combination of the grid values, each with 'nb_samples' random draws of the 'random' parameters
+    (the parameters in neither keep their value from conf)."""
+    grid, random = grid or {}, random or {}
+    rng = np.random.default_rng(seed)
+    configurations = []
+    for values in itertools.product(*grid.values()):
+        for _ in range(nb_samples if random else 1):
+            configuration = AI_DEFAULTS.copy()
+            configuration.update(zip(grid, values))
+            configuration.update({name: sample(rng=rng, name=name, values=spec) for name, spec in random.items()})
+            configurations.append(configuration)
+    return configurations
+
+def get_run_id(parameters: dict, seed: int, seed_index: int) -> str:
+    return '-'.join(f'{name}={parameters[name]:g}' for name in PARAMETERS) + f'-seed={seed}.{seed_index}'
+
+
+class SweepSettings:
+    """What every run of a sweep shares: the world, the tick budget and where the results go."""
+
+    def __init__(self, out_dir: str, nb_ticks: int, nb_col: int = 25, nb_row: int = 25, nb_bots: int = 0,
+                 nb_orbs: int = 10, checkpoint_every: int = 10000, final_episodes: int = 100):
+        self.out_dir = out_dir
+        self.nb_ticks = nb_ticks
+        self.nb_col = nb_col
+        self.nb_row = nb_row
+        self.nb_bots = nb_bots
+        self.nb_orbs = nb_orbs
+        self.checkpoint_every = checkpoint_every # ticks between 2 checkpoints of a run (0 = no checkpoint)
+        self.final_episodes = final_episodes     # the final score is the mean score of the last episodes
+
+    def get_run_path(self, run_id: str, extension: str) -> str:
+        return os.path.join(self.out_dir, 'runs', f'{run_id}.{extension}')
+
+    def get_results_path(self) -> str:
+        return os.path.join(self.out_dir, 'results.csv')
+
+
+def get_sweep_world(parameters: dict, settings: SweepSettings, seed: np.random.SeedSequence) -> World:
+    """LEARN mode world that retries on game over, whose main snake learns from an empty q_table."""
+    world = World(nb_col=settings.nb_col, nb_row=settings.nb_row, game_mode=GameMode.LEARN, auto_retry=True, seed=seed)
+    world.agent_file = None
+    world.set_ai_parameters(**parameters)
+    world.create_orbs(quantity=settings.nb_orbs)
+    world.create_snakes(quantity=settings.nb_bots + 1)
+    return world
+
+def save_checkpoint(path: str, world: World, tick: int, elapsed: float) -> None:
+    """Pickles the World (without its metrics file) and how far the run went, atomically."""
+    metrics = world.metrics
+    metrics.flush()
+    world.metrics = None
+    try:
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump((world, tick, metrics.nb_episodes, elapsed), file)
+        os.replace(path + '.tmp', path)
+    finally:
+        world.metrics = metrics
+
+def load_checkpoint(path: str, metrics_path: str) -> Tuple[World, int, float]:
+    """The World and tick of the checkpoint, the metrics file cut back to the episodes it had then."""
+    with open(path, 'rb') as file:
+        world, tick, nb_episodes, elapsed = pickle.load(file)
+    with open(metrics_path, 'r+b') as file:
+        file.truncate(len(MAGIC) + nb_episodes * EPISODE_DTYPE.itemsize)
+    return world, tick, elapsed
+
+def run_configuration(parameters: dict, seed: int, seed_index: int, settings: SweepSettings) -> dict:
+    """One run of a sweep (from its checkpoint if it was interrupted), returns its row of the results table."""
+    run_id = get_run_id(parameters=parameters, seed=seed, seed_index=seed_index)
+    checkpoint_path, metrics_path = settings.get_run_path(run_id, 'checkpoint'), settings.get_run_path(run_id, 'metrics')
+    if os.path.exists(checkpoint_path):
+        world, tick, elapsed = load_checkpoint(path=checkpoint_path, metrics_path=metrics_path)
+    else:
+        if os.path.exists(metrics_path):
+            os.remove(metrics_path)
+        world_seed = get_worlds_seeds(seed=seed, nb_worlds=seed_index + 1)[seed_index]
+        world, tick, elapsed = get_sweep_world(parameters=parameters, settings=settings, seed=world_seed), 0, 0.0
+    world.start_metrics(path=metrics_path)
+    start = time.perf_counter() - elapsed
+    while tick < settings.nb_ticks:
+        world.update()
+        tick += 1
+        if settings.checkpoint_every and tick % settings.checkpoint_every == 0 and tick < settings.nb_ticks:
+            save_checkpoint(path=checkpoint_path, world=world, tick=tick, elapsed=time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    world.stop_metrics()
+    episodes = read_metrics(metrics_path)
+    final = episodes[-settings.final_episodes:]
+    row = {
+        'run_id': run_id, **parameters, 'seed': seed, 'seed_index': seed_index, 'ticks': tick,
+        'episodes': len(episodes),
+        'final_score': float(final['score'].mean()) if len(final) else 0.0,
+        'best_score': int(episodes['score'].max()) if len(episodes) else 0,
+        'final_orbs': float(final['orbs'].mean()) if len(final) else 0.0,
+        'q_table_size': len(world.last_q_table),
+        'elapsed_s': round(elapsed, 3),
+    }
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return row
+
+def run_configuration_star(arguments: tuple) -> dict:
+    return run_configuration(*arguments)
+
+
+def read_results(path: str) -> List[dict]:
+    """Rows of a results table (numbers parsed), [] if it does not exist yet."""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='') as file:
+        return [{name: value if name == 'run_id' else float(value) for name, value in row.items()}
+                for row in csv.DictReader(file)]
+
+def run_sweep(configurations: List[dict], settings: SweepSettings, nb_seeds: int = 1, seed: int = 0,
+              workers: int | None = None) -> List[dict]:
+    """Runs every configuration with 'nb_seeds' seeds (except the runs already in the results table),
+    'workers' processes at a time (default: one per core). Returns every row of the results table."""
+    os.makedirs(os.path.join(settings.out_dir, 'runs'), exist_ok=True)
+    results_path = settings.get_results_path()
+    rows = read_results(results_path)
+    done = {row['run_id'] for row in rows}
+    pending = [(parameters, seed, seed_index, settings) for parameters in configurations for seed_index in range(nb_seeds)
+               if get_run_id(parameters=parameters, seed=seed, seed_index=seed_index) not in done]
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    with open(results_path, 'a', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+        if file.tell() == 0:
+            writer.writeheader()
+        if workers > 1:
+            with multiprocessing.Pool(processes=workers) as pool:
+                results = pool.imap_unordered(run_configuration_star, pending)
+                for row in results:
+                    writer.writerow(row)
+                    file.flush()
+                    rows.append(row)
+        else:
+            for arguments in pending:
+                row = run_configuration_star(arguments)
+                writer.writerow(row)
+                file.flush()
+                rows.append(row)
+    return rows
+
+def get_best_configurations(rows: List[dict], top: int = 10) -> List[dict]:
+    """Configurations sorted by mean final score over their seeds (best first)."""
+    groups: Dict[tuple, List[float]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row[name] for name in PARAMETERS), []).append(row['final_score'])
+    best = [{**dict(zip(PARAMETERS, values)), 'nb_seeds': len(scores),
+             'mean_final_score': float(np.mean(scores)), 'std_final_score': float(np.std(scores))}
+            for values, scores in groups.items()]
+    return sorted(best, key=lambda configuration: configuration['mean_final_score'], reverse=True)[:top]
+
+def get_best_configurations_str(best: List[dict]) -> str:
+    lines = [' '.join(f'{name:>16}' for name in (*PARAMETERS, 'seeds', 'final score'))]
+    for configuration in best:
+        lines.append(' '.join(f'{configuration[name]:>16g}' for name in PARAMETERS)
+                     + f' {configuration["nb_seeds"]:>16}'
+                     + f' {configuration["mean_final_score"]:>9.1f} ± {configuration["std_final_score"]:.1f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep of the Q-learner (resumable)')
+    parser.add_argument('--out', required=True, help='directory of the sweep (results.csv and runs/)')
+    parser.add_argument('--grid', nargs='*', default=[], help='<parameter>=<v1>,<v2>,... (every combination)')
+    parser.add_argument('--random', nargs='*', default=[], help='<parameter>=uniform:<low>:<high>, loguniform:<low>:<high> or <v1>,<v2>,...')
+    parser.add_argument('--samples', type=int, default=20, help='random draws (per grid combination)')
+    parser.add_argument('--seeds', type=int, default=1, help='runs per configuration')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=100000, help='ticks per run')
+    parser.add_argument('--size', type=int, nargs='+', default=[25], help='grid size (one value for a square grid, or columns rows)')
+    parser.add_argument('--bots', type=int, default=0, help='bots besides the main snake')
+    parser.add_argument('--orbs', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core)')
+    parser.add_argument('--checkpoint-every', type=int, default=10000, help='ticks between checkpoints of a run')
+    parser.add_argument('--final-episodes', type=int, default=100, help='episodes averaged into the final score')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    nb_col, nb_row = (args.size * 2)[:2]
+    configurations = get_configurations(grid=parse_spec(args.grid), random=parse_spec(args.random),
+                                        nb_samples=args.samples, seed=args.seed)
+    settings = SweepSettings(out_dir=args.out, nb_ticks=args.ticks, nb_col=nb_col, nb_row=nb_row, nb_bots=args.bots,
+                             nb_orbs=args.orbs, checkpoint_every=args.checkpoint_every, final_episodes=args.final_episodes)
+    print(f'{len(configurations)} configuration(s) x {args.seeds} seed(s) -> {settings.get_results_path()}')
+    rows = run_sweep(configurations=configurations, settings=settings, nb_seeds=args.seeds, seed=args.seed, workers=args.workers)
+    print(get_best_configurations_str(get_best_configurations(rows=rows, top=args.top)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Tournaments between saved agents: every agent file (agent_v<version>.qtable, see World.save_q_table()) plays as a frozen
+greedy policy (see World.set_direction_snake_greedy()) against the other agents and the random bots, in many seeded worlds
+spread over a pool of processes.
+
+    python -m src.engine.Tournament agent_v7x7-radar=2_v6.qtable agent_v7x7-radar=3_v1.qtable:3 --games 400 --workers 8
+
+'path:N' gives the radar (radar_nb_cells) the agent learned with (default: the one from conf). 'random' is a plain bot
+entered like an agent (the baseline). Reports, for each agent, the mean score, survival time (ticks) and kills per game
+with their 95% confidence intervals, and a rating table (Bradley-Terry ratings on the Elo scale, from the rankings by score
+of the agents of every game).
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import pickle
+from typing import List, Tuple
+
+import numpy as np
+
+from src.utils import conf
+from src.engine.World import World, GameMode, get_worlds_seeds
+
+RANDOM_AGENT = 'random'
+Z_95 = 1.96
+# all columns of a result are per game of an agent (one line per snake of the agent in a game)
+RESULT_DTYPE = np.dtype([('game', '<i8'), ('agent', '<i8'), ('score', '<i8'), ('survival', '<i8'), ('kills', '<i8'), ('orbs', '<i8')])
+
+
+class Agent:
+    """A saved q_table played greedily, or the random bot (path RANDOM_AGENT)."""
+
+    def __init__(self, path: str, radar_nb_cells: int | None = None):
+        self.path = path
+        self.radar_nb_cells = radar_nb_cells or conf['AI']['radar_nb_cells']
+
+    @staticmethod
+    def parse(text: str) -> 'Agent':
+        """'path' or 'path:radar_nb_cells'."""
+        path, separator, radar_nb_cells = text.rpartition(':')
+        if separator and radar_nb_cells.isdigit():
+            return Agent(path=path, radar_nb_cells=int(radar_nb_cells))
+        return Agent(path=text)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def __repr__(self) -> str:
+        return f'Agent({self.path!r}, radar_nb_cells={self.radar_nb_cells})'
+
+
+@functools.lru_cache(maxsize=None)
+def load_q_table(path: str) -> dict:
+    """The q_table of an agent file (read once per process)."""
+    with open(path, 'rb') as file:
+        q_table, _ = pickle.load(file)
+    return q_table
+
+
+class TournamentSettings:
+    """What every game of a tournament shares."""
+
+    def __init__(self, nb_col: int = 40, nb_row: int = 40, nb_bots: int = 10, nb_orbs: int = 30, max_ticks: int = 2000,
+                 copies: int = 1, respawn: bool = True):
+        self.nb_col = nb_col
+        self.nb_row = nb_row
+        self.nb_bots = nb_bots
+        self.nb_orbs = nb_orbs
+        self.max_ticks = max_ticks # a game ends when all the agents are dead or after 'max_ticks' ticks
+        self.copies = copies       # snakes per agent in every game
+        self.respawn = respawn     # dead bots are replaced (the agents are not)
+
+
+def play_game(agents: List[Agent], settings: TournamentSettings, game: int, seed: np.random.SeedSequence) -> np.ndarray:
+    """One game (BOTS mode, no main snake: it does not end early) of every agent against the others and the bots.
+    The order of the agents (the order in which their snakes move) rotates with 'game'. Returns one result per snake."""
+    world = World(nb_col=settings.nb_col, nb_row=settings.nb_row, game_mode=GameMode.BOTS, auto_retry=False, seed=seed)
+    world.learns = False
+    world.create_orbs(quantity=settings.nb_orbs)
+    order = np.roll(np.repeat(np.arange(len(agents)), settings.copies), game)
+    world.create_snakes(quantity=len(order) + settings.nb_bots, only_bots=True)
+    # the agents are the first snakes created (unless there was no room for them)
+    entrants = dict(zip(world.snakes.ids().tolist(), order.tolist()))
+    for snake_id, agent_index in entrants.items():
+        agent, snake = agents[agent_index], world.snakes[snake_id]
+        if agent.path != RANDOM_AGENT:
+            snake.is_greedy = True
+            snake.q_table = load_q_table(agent.path)
+            snake.radar_nb_cells = agent.radar_nb_cells
+            snake.exploration = 0
+    results = np.zeros(len(entrants), dtype=RESULT_DTYPE)
+    results['game'] = game
+    results['agent'] = list(entrants.values())
+    index = {snake_id: i for i, snake_id in enumerate(entrants)}
+    alive = set(entrants)
+    arrays = world.snakes.arrays
+
+    def set_result(snake_id: int) -> None:
+        # a dead snake leaves the store during update(), its slot keeps its values until it is reused
+        results['score'][index[snake_id]] = arrays['score'][snake_id]
+        results['survival'][index[snake_id]] = arrays['iteration'][snake_id]
+        results['orbs'][index[snake_id]] = arrays['nb_orbs'][snake_id]
+
+    tick = 0
+    while alive and tick < settings.max_ticks:
+        world.update()
+        tick += 1
+        for killer_id in world.killers.values():
+            if killer_id in alive:
+                results['kills'][index[killer_id]] += 1
+        for snake_id in [snake_id for snake_id in alive if snake_id not in world.snakes]:
+            alive.discard(snake_id)
+            set_result(snake_id=snake_id)
+        missing = settings.nb_bots + len(alive) - len(world.snakes)
+        if settings.respawn and missing > 0:
+            world.create_snakes(quantity=missing, change_settings=False, only_bots=True)
+    for snake_id in alive:
+        set_result(snake_id=snake_id)
+    return results
+
+def play_game_star(arguments: tuple) -> np.ndarray:
+    return play_game(*arguments)
+
+def run_tournament(agents: List[Agent], settings: TournamentSettings, nb_games: int, seed: int | None = 0,
+                   workers: int | None = None) -> np.ndarray:
+    """'nb_games' seeded games, 'workers' processes at a time (default: one per core). Returns every result."""
+    arguments = [(agents, settings, game, game_seed) for game, game_seed in enumerate(get_worlds_seeds(seed=seed, nb_worlds=nb_games))]
+    workers = min(workers or os.cpu_count() or 1, nb_games)
+    if workers > 1:
+        with multiprocessing.Pool(processes=workers) as pool:
+            results = pool.map(play_game_star, arguments, chunksize=max(1, nb_games // (4 * workers)))
+    else:
+        results = [play_game_star(game_arguments) for game_arguments in arguments]
+    return np.concatenate(results) if results else np.zeros(0, dtype=RESULT_DTYPE)
+
+
+def get_mean_interval(values: np.ndarray) -> Tuple[float, float]:
+    """Mean and half width of its 95% confidence interval (normal approximation)."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return float(values.mean()) if len(values) else 0.0, float('inf')
+    return float(values.mean()), float(Z_95 * values.std(ddof=1) / np.sqrt(len(values)))
+
+def get_wins(results: np.ndarray, nb_agents: int) -> np.ndarray:
+    """wins[i, j]: games in which agent i scored more than agent j (a draw counts 1/2 each),
+    every pair of snakes of different agents in a game counts."""
+    wins = np.zeros((nb_agents, nb_agents))
+    order = np.argsort(results['game'], kind='stable')
+    _, starts = np.unique(results['game'][order], return_index=True)
+    for game_results in np.split(results[order], starts[1:]):
+        agent, score = game_results['agent'], game_results['score']
+        i, j = np.nonzero(agent[:, None] != agent[None, :])
+        np.add.at(wins, (agent[i], agent[j]), (score[i] > score[j]) + 0.5 * (score[i] == score[j]))
+    return wins
+
+def get_ratings(wins: np.ndarray, iterations: int = 1000) -> np.ndarray:
+    """Bradley-Terry strengths fitted to 'wins' (minorization-maximization), on the Elo scale (mean 1500).
+    A draw between every pair is added (prior) so that an agent that never won keeps a finite rating."""
+    wins = wins + 0.5 * (1 - np.eye(len(wins)))
+    games = wins + wins.T
+    strengths = np.ones(len(wins))
+    for _ in range(iterations):
+        updated = wins.sum(axis=1) / (games / (strengths[:, None] + strengths[None, :])).sum(axis=1)
+        updated /= np.exp(np.log(updated).mean())
+        if np.allclose(updated, strengths, rtol=1e-10, atol=0):
+            break
+        strengths = updated
+    ratings = 400 * np.log10(strengths)
+    return 1500 + ratings - ratings.mean()
+
+def get_report(agents: List[Agent], results: np.ndarray) -> List[dict]:
+    """One line per agent, best rating first."""
+    ratings = get_ratings(get_wins(results=results, nb_agents=len(agents)))
+    report = []
+    for agent_index, agent in enumerate(agents):
+        agent_results = results[results['agent'] == agent_index]
+        line = {'agent': agent.name, 'rating': float(ratings[agent_index]), 'nb_games': len(agent_results)}
+        for column in ('score', 'survival', 'kills', 'orbs'):
+            line[column], line[f'{column}_ci'] = get_mean_interval(agent_results[column])
+        report.append(line)
+    return sorted(report, key=lambda line: line['rating'], reverse=True)
+
+def get_report_str(report: List[dict]) -> str:
+    width = max([len('agent')] + [len(line['agent']) for line in report])
+    lines = [f'{"agent":<{width}} {"rating":>7} {"games":>6} {"score":>17} {"survival (ticks)":>17} {"kills/game":>15} {"orbs/game":>15}']
+    for line in report:
+        lines.append(f'{line["agent"]:<{width}} {line["rating"]:>7.0f} {line["nb_games"]:>6} '
+                     f'{line["score"]:>9.1f} ± {line["score_ci"]:<5.1f} {line["survival"]:>9.1f} ± {line["survival_ci"]:<5.1f} '
+                     f'{line["kills"]:>7.2f} ± {line["kills_ci"]:<5.2f} {line["orbs"]:>7.2f} ± {line["orbs_ci"]:<5.2f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Tournament between saved agents (frozen greedy q_tables) and random bots')
+    parser.add_argument('agents', nargs='+', help=f'agent files (path or path:radar_nb_cells), or {RANDOM_AGENT}')
+    parser.add_argument('--no-random', action='store_true', help=f'do not enter the {RANDOM_AGENT} baseline')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--size', type=int, nargs='+', default=[40], help='grid size (one value for a square grid, or columns rows)')
+    parser.add_argument('--bots', type=int, default=10, help='random bots in every game (besides the agents)')
+    parser.add_argument('--orbs', type=int, default=30)
+    parser.add_argument('--ticks', type=int, default=2000, help='maximum ticks per game')
+    parser.add_argument('--copies', type=int, default=1, help='snakes per agent in every game')
+    parser.add_argument('--no-respawn', action='store_true', help='do not replace dead bots')
+    args = parser.parse_args()
+    agents = [Agent.parse(text) for text in args.agents]
+    if not args.no_random and all(agent.path != RANDOM_AGENT for agent in agents):
+        agents.append(Agent(path=RANDOM_AGENT))
+    nb_col, nb_row = (args.size * 2)[:2]
+    settings = TournamentSettings(nb_col=nb_col, nb_row=nb_row, nb_bots=args.bots, nb_orbs=args.orbs, max_ticks=args.ticks,
+                                  copies=args.copies, respawn=not args.no_respawn)
+    results = run_tournament(agents=agents, settings=settings, nb_games=args.games, seed=args.seed, workers=args.workers)
+    print(get_report_str(get_report(agents=agents, results=results)))
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,72 @@
+import copy
 import logging
 import os.path
 import pickle
-import random
-from collections import Counter
+from collections import Counter, deque
 from typing import List, Dict, Tuple
 from enum import Enum
 
+import numpy as np
+
 from src.utils import conf
-from src.engine.Orb import Orb
-from src.engine.Snake import Snake, Direction
+from src.engine.ChunkedMap import ChunkedMap, CellType
+from src.engine.DistanceField import DistanceField
+from src.engine.ExperienceReplay import QTableArray, ReplayBuffer, ACTION_INDEX
+from src.engine.Metrics import MetricsLog
+from src.engine.Orb import Orb, OrbStore
+from src.engine.OrbSpawner import OrbSpawner
+from src.engine.Planner import RolloutPlanner
+from src.engine.Profiler import TickProfiler
+from src.engine.Recorder import EpisodeRecorder
+from src.engine.Snake import Snake, SnakeStore, Direction, pack_cell, CELL_SHIFT, CELL_MASK
 
 logger = logging.getLogger(__name__)
 
 FILE_AGENT = f'agent_v{conf['AI']['version']}.qtable'
+FILE_METRICS = f'agent_v{conf['AI']['version']}.metrics'
+
+# Below this number of bots, the per-bot loop is cheaper than building the occupancy grid
+BATCHED_DIRECTIONS_MIN_BOTS = conf['engine']['batched_directions_min_bots']
+
+# Directions indexed like list(Direction): UP, RIGHT, DOWN, LEFT
+DIRECTIONS = list(Direction)
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+DIRECTION_DELTAS = np.array([(d.value['x'], d.value['y']) for d in DIRECTIONS], dtype=np.int64)
+# AUTHORIZED_DIRECTIONS[i] -> the 3 directions a snake going DIRECTIONS[i] can take (same order as Snake.authorized_direction())
+AUTHORIZED_DIRECTIONS = np.array([[j for j in range(4) if j != (i + 2) % 4] for i in range(4)], dtype=np.int64)
 
 class GameMode(Enum):
     LEARN = 'learn'
     PLAY  = 'play (no learning)'
     BOTS  = 'full bots (no learning)'
 
-class CellType(Enum):
-    EMPTY      = 0
-    ORB        = 1
-    SNAKE      = 2
-    MAIN_SNAKE = 3 # player or main bot
-
 class Reward(Enum):
     DEFAULT   = -1
     COLLISION = -500
     ORB       = 30
 
+class WorldSnapshot:
+    """The mutable state of a World at one moment (see World.snapshot()), can be restored any number of times."""
+
+    __slots__ = ('map', 'snakes', 'orbs', 'nb_spawner_ticks', 'rng_state', 'game_over', 'nb_deaths', 'nb_games', 'settings',
+                 'score_history')
+
+    def __init__(self, world: 'World'):
+        self.map = world.map.copy()
+        self.snakes = world.snakes.copy()
+        self.orbs = world.orbs.copy()
+        self.nb_spawner_ticks = world.orb_spawner.nb_ticks
+        self.rng_state = world.rng.bit_generator.state
+        self.game_over = world.game_over
+        self.nb_deaths = world.nb_deaths
+        self.nb_games = world.nb_games
+        self.settings = world.settings.copy()
+        self.score_history = world.score_history.copy()
+
 class World:
 
-    def __init__(self, nb_col: int, nb_row: int, game_mode: GameMode, auto_retry: bool):
+    def __init__(self, nb_col: int, nb_row: int, game_mode: GameMode, auto_retry: bool,
+                 seed: int | np.random.SeedSequence | None = None):
 
         logger.debug(f'[{os.path.basename(__file__)}] : Creating empty world and map.')
         self.nb_col = nb_col
@@ -40,28 +74,80 @@ class World:
         self.game_over = False
         self.game_mode = game_mode
         self.auto_retry = auto_retry
-        self.score_history = []
+        # every random choice of this World (spawns, bots, exploration) comes from its own generator:
+        # same seed = same game, and several worlds in one process do not disturb each other
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        # scores of the last episodes only (every episode goes to the metrics file, see start_metrics())
+        self.score_history: deque[int] = deque(maxlen=conf['metrics']['rolling_window'])
+        # snakes (main snake and bots) that died since the creation of the World
+        self.nb_deaths = 0
+        # game overs since the creation of the World ('score_history' only keeps the last ones)
+        self.nb_games = 0
+        # snakes that died during the last tick by hitting the body of another snake -> id of that snake
+        self.killers: Dict[int, int] = {}
+        self.metrics: MetricsLog | None = None
         # saves the main snake q_table between tries (the snake is deleted when it dies)
         self.last_q_table = {}
+        # where LEARN mode loads (and the menu saves) the q_table, None = always start from an empty q_table
+        self.agent_file: str | None = FILE_AGENT
         self.settings = {
             'nb_snakes': 0,
             'nb_orbs': 0
         }
-        self.map = get_empty_map(nb_col=nb_col, nb_row=nb_row)
-        self.snakes: Dict[int, Snake] = {}
-        self.orbs: Dict[int, Orb] = {}
-
-    def create_snakes(self, quantity: int, first_is_a_player: bool = False, change_settings: bool = True) -> None:
-        """Creates and spawns snakes (ready to play)."""
+        # CellType of every cell, stored by chunks that only exist where there is something (see ChunkedMap)
+        self.map = ChunkedMap(nb_col=nb_col, nb_row=nb_row)
+        self.snakes = SnakeStore()
+        self.orbs = OrbStore()
+        # where the new orbs appear (uniformly or in the regions with few orbs) and the bursts of orbs over time
+        self.orb_spawner = OrbSpawner()
+        # 'sequential' (snakes move one by one) or 'simultaneous' (all snakes move at once, see move_snakes_simultaneously())
+        self.resolution = conf['engine']['resolution']
+        # 'random' (random direction that does not collide) or 'distance_field' (go to the nearest orb, see DistanceField)
+        self.bots_policy = conf['bots']['policy']
+        # navigation costs of the current tick (only computed for the 'distance_field' bots policy)
+        self.distance_field: DistanceField | None = None
+        # timings of the phases of update(), None = not measured (no cost)
+        self.profiler: TickProfiler | None = None
+        if conf['engine']['profiler']['enabled']:
+            self.enable_profiler()
+        # binary recording of the episode (see start_recording()), None = not recorded
+        self.recorder: EpisodeRecorder | None = None
+        # False: update() leaves the q_tables untouched (ex: simulations of a RolloutPlanner)
+        self.learns = True
+        # batched q_table updates from past transitions (see enable_experience_replay()), None = online updates
+        self.replay_buffer: ReplayBuffer | None = None
+        self.q_table_array: QTableArray | None = None
+        self.replay_batch_size = 0
+        self.replay_every_k_ticks = 1
+        self.replay_min_size = 0
+        self.nb_learning_ticks = 0
+        # in LEARN mode, snakes that learn: 'main' (the main snake) or 'bots' (every bot, into one shared q_table)
+        self.learners = conf['AI']['learners']
+        if conf['AI']['experience_replay']['enabled']:
+            self.enable_experience_replay()
+        # snakes whose direction comes from look-ahead rollouts: 'none', 'main' (the main snake) or 'bots' (every bot),
+        # never the player (in PLAY mode the main snake is the player, see get_planned_snake_ids())
+        self.planner_snakes = conf['planner']['snakes']
+        self.planner: RolloutPlanner | None = RolloutPlanner() if self.planner_snakes != 'none' else None
+
+    def create_snakes(self, quantity: int, first_is_a_player: bool = False, change_settings: bool = True,
+                      only_bots: bool = False) -> None:
+        """Creates and spawns snakes (ready to play).
+        The first one is the player or the main snake, unless 'only_bots' (ex: to replace dead bots).
+        Stops early when there is no room left for a snake."""
         logger.info(f'---------------- CREATING {quantity} SNAKES ----------------')
         if change_settings:
             self.settings['nb_snakes'] += quantity
         for i in range(quantity):
-            snake = Snake(length=conf['snakes']['length_initial'], speed=1)
-            snake.positions = self.get_random_n_consecutive_empty_cells(snake.length)
-            self.snakes[snake.id] = snake
+            positions = self.get_random_n_consecutive_empty_cells(conf['snakes']['length_initial'])
+            if positions is None:
+                logger.info(f'[{os.path.basename(__file__)}] - No room left for a snake ({i}/{quantity} created)')
+                break
+            snake = self.snakes.spawn(length=len(positions), speed=1)
+            snake.positions = positions
             self.update_map_state_with_snake_positions(snake_id=snake.id)
-            if i==0:
+            if i==0 and not only_bots:
                 if first_is_a_player:
                     snake.set_snake_as_player()
                     self.set_direction_snake_random(snake_id=snake.id, can_collide=False)
@@ -70,54 +156,212 @@ class World:
                     if self.game_mode == GameMode.LEARN:
                         snake.state = self.get_state_snake(snake_id=snake.id)
                         snake.q_table = self.last_q_table
+            if self.recorder:
+                self.recorder.record_snake_spawn(snake=snake)
             logger.info(f'[{os.path.basename(__file__)}] - NEW SNAKE : {snake.snake_ai_str() if snake.is_main_snake else snake.snake_str()}')
         self.set_direction_bots(game_mode=self.game_mode)
 
         if change_settings and self.game_mode == GameMode.LEARN:
             self.retrieve_history()
+        if self.is_multi_agent():
+            self.share_q_table()
+
+    def create_remote_snake(self) -> Snake | None:
+        """Creates and spawns one snake driven from outside the World (ex: a client of the GameServer):
+        like a player it is not a bot, but it is not the main snake either (its death is not a game over).
+        Returns None when there is no room left."""
+        positions = self.get_random_n_consecutive_empty_cells(conf['snakes']['length_initial'])
+        if positions is None:
+            return None
+        snake = self.snakes.spawn(length=len(positions), speed=1)
+        snake.positions = positions
+        snake.is_bot = False
+        self.update_map_state_with_snake_positions(snake_id=snake.id)
+        self.set_direction_snake_random(snake_id=snake.id, can_collide=False)
+        if self.recorder:
+            self.recorder.record_snake_spawn(snake=snake)
+        return snake
 
     def create_orbs(self, quantity: int, change_settings: bool = True) -> None:
         """Creates and spawns orbs."""
         logger.info(f'---------------- CREATING {quantity} ORBS ----------------')
         if change_settings:
             self.settings['nb_orbs'] += quantity
-        empty_cells = self.get_map_empty_cells()
-        if len(empty_cells) >= quantity:
-            random_cells = random.sample(population=empty_cells, k=quantity)
-            for i in range(quantity):
-                self.create_orb(x=random_cells[i]['x'], y=random_cells[i]['y'])
+        self.orb_spawner.spawn(world=self, quantity=quantity)
 
     def create_orb(self, x: int, y: int) -> None:
         """Creates one orb at position (x,y)"""
-        orb = Orb()
-        orb.set_position(x=x, y=y)
-        self.orbs[orb.id] = orb
-        self.update_map_state_with_orb_position(orb_id=orb.id)
-        logger.debug(f'[{os.path.basename(__file__)}] - NEW ORB at x={orb.x}, y={orb.y}')
+        orb_id = self.orbs.spawn(x=x, y=y)
+        self.update_map_state_with_orb_position(orb_id=orb_id)
+        if self.recorder:
+            self.recorder.record_orb_spawn(orb_id=orb_id, x=x, y=y)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'[{os.path.basename(__file__)}] - NEW ORB at x={x}, y={y}')
 
     def update(self) -> None:
         """Called every ticks"""
 
+        profiler = self.profiler
+        if profiler:
+            profiler.start()
+        recorder = self.recorder
+        if recorder:
+            recorder.start_tick(world=self)
+
         self.update_map_state()
+        self.killers = {}
+        if profiler:
+            profiler.lap('map')
 
         self.set_direction_bots(game_mode=self.game_mode)
+        if profiler:
+            profiler.lap('directions')
+
+        if self.resolution == 'simultaneous':
+            rewards, dead_orbs = self.move_snakes_simultaneously()
+        else:
+            rewards, dead_orbs = self.move_snakes_sequentially()
+        if recorder:
+            recorder.record_moves(world=self, rewards=rewards)
+        if profiler:
+            profiler.lap('moves')
 
         reward_main_snake = None
         is_main_snake_alive = True
+        for snake_id, reward in rewards.items():
+            snake = self.snakes[snake_id]
+            snake.score += reward.value
+            snake.iteration += 1
+            if reward == Reward.ORB:
+                snake.nb_orbs += 1
+            elif not snake.is_alive:
+                self.nb_deaths += 1
+            if snake.is_main_snake:
+                reward_main_snake = reward
+                is_main_snake_alive = snake.is_alive
+
+        if self.learns:
+            if self.is_multi_agent():
+                self.update_q_table_shared(rewards=rewards)
+            else:
+                self.update_q_table(reward=reward_main_snake)
+        if profiler:
+            profiler.lap('q_update')
+        if not is_main_snake_alive:
+            self.handle_game_over()
+            if profiler:
+                profiler.lap('game_over')
+            if self.auto_retry:
+                # the world has been reset: the ids of this tick's dead orbs now belong to new orbs
+                if recorder:
+                    recorder.end_tick(world=self)
+                if profiler:
+                    profiler.end_tick()
+                return
+        self.kill_snakes()
+        if profiler:
+            profiler.lap('kill_snakes')
+        self.kill_orbs(orb_ids=dead_orbs)
+        self.orb_spawner.on_tick(world=self)
+        if profiler:
+            profiler.lap('kill_orbs')
+        self.update_map_state()
+        if recorder:
+            recorder.end_tick(world=self)
+        if profiler:
+            profiler.lap('map')
+            profiler.end_tick()
+
+    def enable_profiler(self, window: int | None = None) -> TickProfiler:
+        """Start measuring the phases of update() (see TickProfiler), over the last 'window' ticks."""
+        if self.profiler is None:
+            self.profiler = TickProfiler(window=window or conf['engine']['profiler']['window'])
+        return self.profiler
+
+    def disable_profiler(self) -> None:
+        self.profiler = None
+
+    def start_metrics(self, path: str = FILE_METRICS) -> MetricsLog:
+        """Appends the metrics of every following episode to 'path' (see MetricsLog, plot them with src.ui.plots)."""
+        self.stop_metrics()
+        self.metrics = MetricsLog(path=path, flush_every=conf['metrics']['flush_every'])
+        return self.metrics
+
+    def stop_metrics(self) -> None:
+        if self.metrics:
+            self.metrics.close()
+            self.metrics = None
+
+    def snapshot(self) -> WorldSnapshot:
+        """Copy of the mutable state (map, bodies, orbs, RNG state...) to go back to with restore()."""
+        return WorldSnapshot(world=self)
+
+    def restore(self, snapshot: WorldSnapshot) -> None:
+        """Puts the World back in the state of the snapshot (the snakes and orbs handles are new objects).
+        The q_tables are shared, not restored: what was learned since the snapshot is kept."""
+        self.map = snapshot.map.copy()
+        self.snakes = snapshot.snakes.copy()
+        self.orbs = snapshot.orbs.copy()
+        self.orb_spawner.nb_ticks = snapshot.nb_spawner_ticks
+        self.rng.bit_generator.state = snapshot.rng_state
+        self.game_over = snapshot.game_over
+        self.nb_deaths = snapshot.nb_deaths
+        self.nb_games = snapshot.nb_games
+        self.settings = snapshot.settings.copy()
+        self.score_history = snapshot.score_history.copy()
+
+    def clone(self, seed: int | None = None) -> 'World':
+        """Independent World in the same state, with the same future (its RNG starts from the same state)
+        unless a seed is given (then the clone gets its own random stream).
+        Only the mutable state is copied: the q_tables (and the replay buffer) and the settings from conf are shared.
+        The clone is neither profiled, recorded, driven by the planner nor logging metrics."""
+        world = copy.copy(self)
+        world.map = self.map.copy()
+        world.snakes = self.snakes.copy()
+        world.orbs = self.orbs.copy()
+        world.orb_spawner = copy.copy(self.orb_spawner)
+        if seed is None:
+            bit_generator = type(self.rng.bit_generator)(self.seed_sequence)
+            bit_generator.state = self.rng.bit_generator.state
+            world.rng = np.random.Generator(bit_generator)
+        else:
+            world.rng = np.random.default_rng(seed)
+        world.settings = self.settings.copy()
+        world.score_history = self.score_history.copy()
+        world.profiler = None
+        world.recorder = None
+        world.planner = None
+        world.metrics = None
+        return world
+
+    def start_recording(self, path: str, keyframe_every: int = 200, compress: bool = True) -> EpisodeRecorder:
+        """Record every following tick into 'path' (see EpisodeRecorder, read it back with EpisodeReader)."""
+        self.stop_recording()
+        self.recorder = EpisodeRecorder(path=path, nb_col=self.nb_col, nb_row=self.nb_row,
+                                        keyframe_every=keyframe_every, compress=compress)
+        return self.recorder
+
+    def stop_recording(self) -> None:
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def move_snakes_sequentially(self) -> Tuple[Dict[int, Reward], List[int]]:
+        """Moves the snakes one by one (dict order): a snake sees the map left by the snakes moved before it.
+        Returns the reward of each snake and the ids of the eaten orbs."""
+        rewards = {}
         dead_orbs = []
 
         for snake_id, snake in self.snakes.items():
 
-            new_head = self.snakes[snake_id].next_position()
-            x = new_head['x']
-            y = new_head['y']
+            x, y = self.snakes[snake_id].next_head()
 
             if self.is_collision(x=x, y=y, snake_id=snake_id):
                 logging.info(f'Snake {snake_id} collided and died.')
                 reward = Reward.COLLISION
                 snake.is_alive = False
-                if snake.is_main_snake:
-                    is_main_snake_alive = False
+                if self.is_inside_map(x=x, y=y):
+                    self.killers[snake_id] = self.get_snake_at_position(x=x, y=y).id
 
             elif self.map[(x,y)] == CellType.ORB:
                 reward = Reward.ORB
@@ -129,43 +373,120 @@ class World:
                 reward = Reward.DEFAULT
                 self.snakes[snake_id].move(grow=False)
 
+            if self.profiler:
+                self.profiler.lap('moves')
             self.update_map_state()
+            if self.profiler:
+                self.profiler.lap('map')
+            rewards[snake_id] = reward
+
+        return rewards, dead_orbs
+
+    def move_snakes_simultaneously(self) -> Tuple[Dict[int, Reward], List[int]]:
+        """Moves all the snakes at once, the outcome does not depend on the snakes order:
+            1. every new head is computed from the map at the start of the tick
+            2. collisions are resolved over these proposed moves:
+                - wall
+                - head-to-head: every snake whose head lands on the same cell dies (even if it is an orb)
+                - head-to-body: the head lands on the body of another snake as it is after the move
+                  (tails move forward, except for the snakes that eat an orb or die)
+               a dying snake keeps its tail, so the pass is repeated until no more snake dies
+            3. the survivors move
+        Returns the reward of each snake and the ids of the eaten orbs."""
+        orb_ids = dict(zip(self.orbs.cells(), self.orbs.ids().tolist()))
+
+        new_heads = {}
+        heads_count = Counter()
+        for snake_id, snake in self.snakes.items():
+            new_heads[snake_id] = snake.next_head()
+            heads_count[new_heads[snake_id]] += 1
+        eats = {snake_id: self.is_inside_map(*head) and head in orb_ids for snake_id, head in new_heads.items()}
 
-            self.snakes[snake_id].score += reward.value
-            self.snakes[snake_id].iteration += 1
-            if snake.is_main_snake:
-                reward_main_snake = reward
+        # bodies as they are after the move (the tail cell is freed unless the snake grows)
+        occupancy = np.zeros((self.nb_col, self.nb_row), dtype=np.int64)
+        tails = {}
+        for snake_id, snake in self.snakes.items():
+            cells = snake.cells()
+            if not eats[snake_id]:
+                tails[snake_id] = next(cells, None)
+            for x, y in cells:
+                occupancy[x, y] = snake_id
+
+        dead = set()
+        nb_dead = -1
+        while nb_dead != len(dead):
+            nb_dead = len(dead)
+            for snake_id, snake in self.snakes.items():
+                x, y = new_heads[snake_id]
+                if snake_id in dead:
+                    continue
+                if (self.is_inside_map(x=x, y=y)
+                        and heads_count[(x, y)] == 1
+                        and occupancy[x, y] in (0, snake_id)):
+                    continue
+                logging.info(f'Snake {snake_id} collided and died.')
+                dead.add(snake_id)
+                snake.is_alive = False
+                if self.is_inside_map(x=x, y=y) and occupancy[x, y] not in (0, snake_id):
+                    self.killers[snake_id] = int(occupancy[x, y])
+                # it does not move: its tail stays where it is
+                if tails.get(snake_id) is not None:
+                    tail_x, tail_y = tails[snake_id]
+                    occupancy[tail_x, tail_y] = snake_id
+
+        rewards = {}
+        dead_orbs = []
+        for snake_id in self.snakes:
+            if snake_id in dead:
+                rewards[snake_id] = Reward.COLLISION
+            elif eats[snake_id]:
+                rewards[snake_id] = Reward.ORB
+                dead_orbs.append(orb_ids[new_heads[snake_id]])
+                logging.debug(f'Snake {snake_id} ate an orb')
+            else:
+                rewards[snake_id] = Reward.DEFAULT
 
-        self.update_q_table(reward=reward_main_snake)
-        if not is_main_snake_alive:
-            self.handle_game_over()
-        self.kill_snakes()
-        self.kill_orbs(orb_ids=dead_orbs)
-        self.update_map_state()
+        for snake_id, snake in self.snakes.items():
+            if snake.is_alive:
+                snake.move(grow=eats[snake_id])
+
+        return rewards, dead_orbs
 
     # ----------------- MAP ----------------- #
 
     def update_map_state(self) -> None:
-        """Refresh the World.map dictionary to reflect latest state."""
-        self.map = get_empty_map(nb_col=self.nb_col, nb_row=self.nb_row)
-        for orb_id, _orb in self.orbs.items():
-            self.update_map_state_with_orb_position(orb_id=orb_id)
-        for snake_id, _snake in self.snakes.items():
-            self.update_map_state_with_snake_positions(snake_id=snake_id)
+        """Refresh World.map to reflect latest state (orbs, then snakes in dict order: the last one wins)."""
+        self.map = ChunkedMap(nb_col=self.nb_col, nb_row=self.nb_row)
+        orbs = self.orbs.positions()
+        self.map.set_cells(x=orbs[:, 0], y=orbs[:, 1], values=CellType.ORB.value)
+        bodies = [np.array(snake.body, dtype=np.int64) for snake in self.snakes.values()]
+        if bodies:
+            cell_types = [CellType.MAIN_SNAKE.value if snake.is_main_snake else CellType.SNAKE.value for snake in self.snakes.values()]
+            cells = np.concatenate(bodies)
+            self.map.set_cells(x=cells >> CELL_SHIFT, y=cells & CELL_MASK,
+                               values=np.repeat(cell_types, [len(body) for body in bodies]))
+
+    def get_cell_array(self) -> np.ndarray:
+        """Same content as World.map but as a (nb_col, nb_row) array of CellType values, built from the entities."""
+        cells = np.zeros((self.nb_col, self.nb_row), dtype=np.uint8)
+        orbs = self.orbs.positions()
+        cells[orbs[:, 0], orbs[:, 1]] = CellType.ORB.value
+        for snake in self.snakes.values():
+            body = list(snake.cells())
+            if body:
+                x, y = zip(*body)
+                cells[x, y] = CellType.MAIN_SNAKE.value if snake.is_main_snake else CellType.SNAKE.value
+        return cells
 
     def update_map_state_with_snake_positions(self, snake_id: int) -> None:
         #FIXME: DOES NOT SET MAP CELL BACK TO EMPTY WHEN SNAKE MOVES (without eating)
         #FIXME: EITHER USE update_map_state() instead or pass as a param the old cells occupied by the snake (before moving)
-        for cell in self.snakes[snake_id].positions:
-            x, y = cell['x'], cell['y']
-            if self.snakes[snake_id].is_main_snake:
-                self.map[(x, y)] = CellType.MAIN_SNAKE
-            else:
-                self.map[(x, y)] = CellType.SNAKE
+        cell_type = CellType.MAIN_SNAKE if self.snakes[snake_id].is_main_snake else CellType.SNAKE
+        for cell in self.snakes[snake_id].cells():
+            self.map[cell] = cell_type
 
     def update_map_state_with_orb_position(self, orb_id: int) -> None:
-        x, y = self.orbs[orb_id].x, self.orbs[orb_id].y
-        self.map[(x, y)] = CellType.ORB
+        self.map[self.orbs.position(orb_id=orb_id)] = CellType.ORB
 
     def get_map_str(self) -> str:
         """used for debugging"""
@@ -181,18 +502,31 @@ class World:
         """used for debugging"""
         print(self.get_map_str())
 
+    def get_occupancy_grid(self) -> np.ndarray:
+        """Array indexed by [x, y] holding the id of the snake on each cell (0 = no snake).
+        If several snakes share a cell, the first one (dict order) wins, like get_snake_at_position()."""
+        occupancy = np.zeros((self.nb_col, self.nb_row), dtype=np.int64)
+        for snake_id, snake in reversed(list(self.snakes.items())):
+            for x, y in snake.cells():
+                occupancy[x, y] = snake_id
+        return occupancy
+
+    def get_distance_field(self, occupancy: np.ndarray) -> DistanceField:
+        """Distance to the nearest orb over the cells without snakes + danger near snake heads."""
+        orb_cells = self.orbs.positions()
+        heads = np.array([snake.head for snake in self.snakes.values()], dtype=np.int64).reshape(-1, 2)
+        return DistanceField.compute(
+            occupancy=occupancy, orb_cells=orb_cells, heads=heads,
+            danger_radius=conf['bots']['danger_radius'], danger_weight=conf['bots']['danger_weight']
+        )
+
     def get_map_empty_cells(self) -> List[dict]:
-        """Get all the map cells that are empty"""
-        empty_cells = []
-        for y in range(0, self.nb_row):
-            for x in range(0, self.nb_col):
-                if self.map[(x,y)] == CellType.EMPTY:
-                    empty_cells.append( {'x':x, 'y':y} )
-        return empty_cells
+        """Get all the map cells that are empty (chunk by chunk, to draw some prefer ChunkedMap.sample_empty_cells())"""
+        return [{'x': x, 'y': y} for x, y in self.map.get_empty_cells().tolist()]
 
-    def get_random_n_consecutive_empty_cells(self, n: int) -> List[dict]:
-        empty_cells = get_n_consecutive_empty_cells_from_grid(n=n, grid=self.map, nb_cols=self.nb_col, nb_rows=self.nb_row, empty_value=CellType.EMPTY)
-        return random.choice(empty_cells)
+    def get_random_n_consecutive_empty_cells(self, n: int) -> List[dict] | None:
+        """Random 'n' aligned empty cells (ex: to spawn a snake), None if there is no room left."""
+        return self.map.sample_n_consecutive_empty_cells(n=n, rng=self.rng)
 
     # ----------------- DIRECTION ----------------- #
 
@@ -208,17 +542,100 @@ class World:
         return self.set_direction_snake(snake_id=player.id, direction=direction)
 
     def set_direction_bots(self, game_mode: GameMode) -> None:
-        """For all bots, set a new random direction that should not collide.
-        If the GameMode is LEARN, the main bot get a direction based on its q_table."""
+        """For all bots, set a new direction that should not collide (random or following World.bots_policy).
+        If the GameMode is LEARN, the main bot get a direction based on its q_table.
+        When there are many bots, their directions are chosen in one batch (see set_direction_bots_batched()).
+        The snakes driven by the planner are planned first, within one time budget for the tick (see RolloutPlanner.choose_directions()),
+        the ones it had no time for are driven as usual."""
+        bot_ids = []
+        planned = self.planner.choose_directions(world=self, snake_ids=self.get_planned_snake_ids()) if self.planner else {}
         for snake_id, snake in self.snakes.items():
-            if snake.is_main_snake and game_mode == GameMode.LEARN:
-                if random.random() > snake.exploration and snake.state in snake.q_table:
+            if snake_id in planned:
+                continue
+            if snake.is_greedy:
+                self.set_direction_snake_greedy(snake_id=snake_id)
+            elif game_mode == GameMode.LEARN and (snake.is_main_snake or snake.is_bot and self.learners == 'bots'):
+                if self.rng.random() > snake.exploration and snake.state in snake.q_table:
                     self.set_direction_snake_best_from_q_table(snake_id=snake_id)
                 else:
                     snake.exploration *= 0.99
                     self.set_direction_snake_random(snake_id=snake_id, can_collide=True)
             elif snake.is_bot:
+                bot_ids.append(snake_id)
+
+        if self.bots_policy == 'distance_field':
+            self.set_direction_bots_from_distance_field(snake_ids=bot_ids)
+        elif len(bot_ids) >= BATCHED_DIRECTIONS_MIN_BOTS:
+            self.set_direction_bots_batched(snake_ids=bot_ids)
+        else:
+            for snake_id in bot_ids:
+                self.set_direction_snake_random(snake_id=snake_id, can_collide=False)
+
+        for snake_id, direction in planned.items():
+            self.set_direction_snake(snake_id=snake_id, direction=direction)
+
+    def get_planned_snake_ids(self) -> List[int]:
+        """Ids of the snakes driven by the RolloutPlanner (see World.planner_snakes), bots only:
+        a planned direction is set after the player's one and would override it."""
+        if self.planner_snakes == 'main':
+            main_snake = self.get_main_snake()
+            return [main_snake.id] if main_snake and main_snake.is_bot else []
+        if self.planner_snakes == 'bots':
+            return [snake_id for snake_id, snake in self.snakes.items() if snake.is_bot]
+        return []
+
+    def set_direction_bots_batched(self, snake_ids: List[int]) -> None:
+        """Same contract as get_direction_authorized_random_that_does_not_collide() but for all the given bots at once:
+        the 3 candidate heads of every bot are tested against the occupancy grid in one lookup,
+        then each bot gets a random safe direction (a random authorized one if none is safe)."""
+        snakes, candidates, cells, is_safe = self.get_candidates_bots(snake_ids=snake_ids, occupancy=self.get_occupancy_grid())
+        # random keys: safe candidates always rank first, ties are broken randomly
+        keys = self.rng.random(size=candidates.shape) + ~is_safe
+        self.set_direction_bots_from_keys(snakes=snakes, candidates=candidates, keys=keys)
+
+    def set_direction_bots_from_distance_field(self, snake_ids: List[int]) -> None:
+        """Goal-seeking bots: compute the DistanceField once for this tick, then every bot
+        goes to its safe neighbour cell with the lowest cost (nearest orb, away from snake heads)."""
+        occupancy = self.get_occupancy_grid()
+        self.distance_field = self.get_distance_field(occupancy=occupancy)
+        snakes, candidates, cells, is_safe = self.get_candidates_bots(snake_ids=snake_ids, occupancy=occupancy)
+        x = np.clip(cells[..., 0], 0, self.nb_col - 1)
+        y = np.clip(cells[..., 1], 0, self.nb_row - 1)
+        cost = self.distance_field.cost[x, y]
+        # unsafe candidates always rank last, ties are broken randomly (costs are integers)
+        keys = np.where(is_safe, cost, cost.max(initial=0) + 1) + self.rng.random(size=candidates.shape) * 0.5
+        self.set_direction_bots_from_keys(snakes=snakes, candidates=candidates, keys=keys)
+
+    def get_candidates_bots(self, snake_ids: List[int], occupancy: np.ndarray) -> Tuple[List[Snake], np.ndarray, np.ndarray, np.ndarray]:
+        """For all the given bots at once: their 3 authorized directions (indexes of DIRECTIONS),
+        the cells they lead to and whether these cells are safe (inside the map and not another snake).
+        Bots without a direction yet (just spawned) rely on their body: they get a random direction right away."""
+        batched_ids = []
+        for snake_id in snake_ids:
+            if self.snakes[snake_id].direction is None:
                 self.set_direction_snake_random(snake_id=snake_id, can_collide=False)
+            else:
+                batched_ids.append(snake_id)
+
+        snakes = [self.snakes[snake_id] for snake_id in batched_ids]
+        ids = np.array(batched_ids, dtype=np.int64)
+        heads = np.array([snake.head for snake in snakes], dtype=np.int64).reshape(-1, 2)
+        candidates = AUTHORIZED_DIRECTIONS[[DIRECTION_INDEX[snake.direction] for snake in snakes]].reshape(-1, 3) # (nb_bots, 3)
+        cells = heads[:, None, :] + DIRECTION_DELTAS[candidates]                                                  # (nb_bots, 3, 2)
+
+        x, y = cells[..., 0], cells[..., 1]
+        inside = (0 <= x) & (x < self.nb_col) & (0 <= y) & (y < self.nb_row)
+        owner = occupancy[np.clip(x, 0, self.nb_col - 1), np.clip(y, 0, self.nb_row - 1)]
+        # a snake never collides with itself (see is_collision())
+        is_safe = inside & ((owner == 0) | (owner == ids[:, None]))
+        return snakes, candidates, cells, is_safe
+
+    @staticmethod
+    def set_direction_bots_from_keys(snakes: List[Snake], candidates: np.ndarray, keys: np.ndarray) -> None:
+        """Each bot takes its candidate direction with the lowest key."""
+        chosen = candidates[np.arange(len(snakes)), np.argmin(keys, axis=1)] if snakes else []
+        for snake, direction_index in zip(snakes, chosen):
+            snake.set_direction(DIRECTIONS[direction_index])
 
     def set_direction_snake_random(self, snake_id: int, can_collide: bool) -> None:
         """Set a random new direction for the snake.
@@ -232,19 +649,19 @@ class World:
     def get_direction_authorized_random(self, snake_id: int) -> Direction:
         """Get one random authorized direction for the Snake"""
         authorized = self.snakes[snake_id].authorized_direction()
-        return random.choice(authorized)
+        return authorized[self.rng.integers(len(authorized))]
 
     def get_directions_authorized_shuffled(self, snake_id: int) -> List[Direction]:
         """Get all authorized direction for the Snake, shuffled."""
         authorized = self.snakes[snake_id].authorized_direction()
-        return random.sample(authorized, k=len(authorized))
+        return [authorized[i] for i in self.rng.permutation(len(authorized))]
 
     def get_direction_authorized_random_that_does_not_collide(self, snake_id: int) -> Direction:
         """Get a random authorized direction that will not kill the snake (last one otherwise)."""
         directions = self.get_directions_authorized_shuffled(snake_id=snake_id)
         for direction in directions:
-            new_head = self.snakes[snake_id].next_position(direction=direction)
-            if not self.is_collision(x=new_head['x'], y=new_head['y'], snake_id=snake_id):
+            x, y = self.snakes[snake_id].next_head(direction=direction)
+            if not self.is_collision(x=x, y=y, snake_id=snake_id):
                 return direction
         return directions[0]
 
@@ -256,28 +673,58 @@ class World:
         #FIXME: set_snake_direction() can prevent the snake from changing direction (if not authorized)
         self.set_direction_snake(snake_id=snake_id, direction=Direction[action])
 
+    def set_direction_snake_greedy(self, snake_id: int) -> None:
+        """Frozen policy: the best direction of the q_table for the current state (never explores nor learns),
+        a random one (like an exploring snake) for a state it has never seen."""
+        snake = self.snakes[snake_id]
+        snake.state = self.get_state_snake(snake_id=snake_id)
+        if snake.state in snake.q_table:
+            self.set_direction_snake_best_from_q_table(snake_id=snake_id)
+        else:
+            self.set_direction_snake_random(snake_id=snake_id, can_collide=True)
+
     # ----------------- AI ----------------- #
 
+    def set_ai_parameters(self, **parameters) -> None:
+        """AI parameters (exploration, learning_rate, discount_factor, radar_nb_cells) of the snakes created from now on,
+        instead of the ones from conf (ex: a hyperparameter sweep). The existing snakes keep theirs."""
+        unknown = parameters.keys() - self.snakes.ai_defaults.keys()
+        if unknown:
+            raise ValueError(f'Unknown AI parameters: {sorted(unknown)}')
+        self.snakes.ai_defaults.update(parameters)
+
     def save_q_table(self) -> None:
+        if self.agent_file is None:
+            return
         logger.warning(f'--------- SAVING Q_TABLE ({len(self.last_q_table)}) + '
-                    f'SCORE HISTORY ({len(self.score_history)}) TO {FILE_AGENT} ---------')
-        with open(FILE_AGENT, 'wb') as file:
-            pickle.dump((self.last_q_table, self.score_history), file)
+                    f'SCORE HISTORY ({len(self.score_history)}) TO {self.agent_file} ---------')
+        with open(self.agent_file, 'wb') as file:
+            pickle.dump((self.last_q_table, list(self.score_history)), file)
 
     def load_q_table(self) -> None:
-        if os.path.exists(FILE_AGENT):
+        if self.agent_file is None:
+            return
+        if os.path.exists(self.agent_file):
             main_snake = self.get_main_snake()
-            with open(FILE_AGENT, 'rb') as file:
-                main_snake.q_table, self.score_history = pickle.load(file)
+            with open(self.agent_file, 'rb') as file:
+                main_snake.q_table, score_history = pickle.load(file)
+            self.score_history = deque(score_history, maxlen=self.score_history.maxlen)
             logger.warning(f'--------- LOADING Q_TABLE ({len(main_snake.q_table)}) + '
-                           f'SCORE HISTORY ({len(self.score_history)}) FROM {FILE_AGENT} ---------')
+                           f'SCORE HISTORY ({len(self.score_history)}) FROM {self.agent_file} ---------')
         else:
-            logger.warning(f'{FILE_AGENT} not found: no QTable and score history.')
+            logger.warning(f'{self.agent_file} not found: no QTable and score history.')
 
     def update_q_table(self, reward: Reward):
-        """Updates the Snake q_table and state based on the direction/action it chose."""
+        """Updates the Snake q_table and state based on the direction/action it chose
+        (right away, or later in a batch with experience replay: see store_transition())."""
         main_snake = self.get_main_snake()
         next_state = self.get_state_snake(snake_id=main_snake.id)
+        if self.profiler:
+            self.profiler.lap('radar')
+        if self.replay_buffer is not None:
+            self.store_transition(snake=main_snake, reward=reward, next_state=next_state)
+            main_snake.state = next_state
+            return
         action_performed = main_snake.direction.name
 
         if main_snake.state not in main_snake.q_table:
@@ -294,6 +741,98 @@ class World:
         main_snake.q_table[main_snake.state][action_performed] += delta
         main_snake.state = next_state
 
+    def is_multi_agent(self) -> bool:
+        """Every bot learns into the q_table of the main snake (see update_q_table_shared())."""
+        return self.game_mode == GameMode.LEARN and self.learners == 'bots'
+
+    def share_q_table(self) -> None:
+        """Gives the q_table of the main snake to every bot (each one keeps its own state)."""
+        main_snake = self.get_main_snake()
+        q_table = main_snake.q_table if main_snake else self.last_q_table
+        for snake_id, snake in self.snakes.items():
+            if snake.is_bot and snake.q_table is not q_table:
+                snake.q_table = q_table
+                snake.state = self.get_state_snake(snake_id=snake_id)
+
+    def update_q_table_shared(self, rewards: Dict[int, Reward]) -> None:
+        """Same as update_q_table() for every bot that played this tick, as one batch on the shared q_table:
+        one vectorized TD update (see QTableArray.td_update()), or the transitions go to the ReplayBuffer."""
+        if self.q_table_array is None:
+            self.q_table_array = QTableArray()
+        q_table_array = self.q_table_array
+        transitions = []
+        for snake_id, reward in rewards.items():
+            snake = self.snakes[snake_id]
+            if not snake.is_bot:
+                continue
+            self.bind_q_table_array(q_table=snake.q_table)
+            next_state = self.get_state_snake(snake_id=snake_id)
+            if snake.state is not None:
+                transitions.append((q_table_array.get_row(snake.state), ACTION_INDEX[snake.direction.name], reward.value,
+                                    q_table_array.get_row(next_state), reward == Reward.COLLISION,
+                                    snake.learning_rate, snake.discount_factor))
+            snake.state = next_state
+        if self.profiler:
+            self.profiler.lap('radar')
+        if not transitions:
+            return
+        states, actions, rewards_values, next_states, dones, learning_rates, discount_factors = map(np.array, zip(*transitions))
+
+        if self.replay_buffer is not None:
+            self.replay_buffer.add_batch(states=states, actions=actions, rewards=rewards_values, next_states=next_states, dones=dones)
+            self.nb_learning_ticks += 1
+            if self.nb_learning_ticks % self.replay_every_k_ticks == 0 and len(self.replay_buffer) >= max(self.replay_min_size, 1):
+                self.replay_q_table(learning_rate=learning_rates.mean(), discount_factor=discount_factors.mean())
+            return
+        q_table_array.td_update(states=states, actions=actions, rewards=rewards_values, next_states=next_states, dones=dones,
+                                learning_rate=learning_rates, discount_factor=discount_factors)
+        q_table_array.write_rows(rows=np.concatenate((states, next_states)))
+
+    def enable_experience_replay(self, capacity: int | None = None, batch_size: int | None = None,
+                                 every_k_ticks: int | None = None, min_size: int | None = None) -> ReplayBuffer:
+        """Instead of one TD update per tick, transitions go into a ReplayBuffer and every 'every_k_ticks' ticks
+        a batch of 'batch_size' random past transitions updates the q_table (see replay_q_table())."""
+        replay_conf = conf['AI']['experience_replay']
+        self.replay_buffer = ReplayBuffer(capacity=capacity or replay_conf['capacity'])
+        self.q_table_array = QTableArray()
+        self.replay_batch_size = batch_size or replay_conf['batch_size']
+        self.replay_every_k_ticks = every_k_ticks or replay_conf['every_k_ticks']
+        self.replay_min_size = min_size if min_size is not None else replay_conf['min_size']
+        return self.replay_buffer
+
+    def disable_experience_replay(self) -> None:
+        self.replay_buffer = None
+        self.q_table_array = None
+
+    def bind_q_table_array(self, q_table: dict) -> None:
+        """Batched updates go to this q_table: if it is a new one (ex: new main snake after a game over),
+        the transitions of the ReplayBuffer point to rows of the previous one and are dropped."""
+        if self.q_table_array.bind(q_table=q_table) and self.replay_buffer is not None:
+            self.replay_buffer.clear()
+
+    def store_transition(self, snake: Snake, reward: Reward, next_state: tuple) -> None:
+        """Adds the transition of this tick to the ReplayBuffer, then replays a batch every 'replay_every_k_ticks' ticks."""
+        q_table_array = self.q_table_array
+        self.bind_q_table_array(q_table=snake.q_table)
+        if snake.state is not None:
+            self.replay_buffer.add(
+                state=q_table_array.get_row(snake.state),
+                action=ACTION_INDEX[snake.direction.name],
+                reward=reward.value,
+                next_state=q_table_array.get_row(next_state),
+                done=reward == Reward.COLLISION
+            )
+        self.nb_learning_ticks += 1
+        if self.nb_learning_ticks % self.replay_every_k_ticks == 0 and len(self.replay_buffer) >= max(self.replay_min_size, 1):
+            self.replay_q_table(learning_rate=snake.learning_rate, discount_factor=snake.discount_factor)
+
+    def replay_q_table(self, learning_rate: float, discount_factor: float) -> None:
+        """One batched TD update over random transitions of the ReplayBuffer, copied back into the q_table."""
+        states, actions, rewards, next_states, dones = self.replay_buffer.sample(batch_size=self.replay_batch_size, rng=self.rng)
+        self.q_table_array.td_update(states=states, actions=actions, rewards=rewards, next_states=next_states, dones=dones,
+                                     learning_rate=learning_rate, discount_factor=discount_factor)
+        self.q_table_array.write_rows(rows=np.concatenate((states, next_states)))
+
     def get_state_snake(self, snake_id):
         """
         Calculate a representation of the environment (what the bot sees)
@@ -307,7 +846,7 @@ class World:
         direction, value is set to 'Snake.radar_nb_cells' (the max).
         """
         snake = self.snakes[snake_id]
-        position_head = snake.positions[-1]['x'], snake.positions[-1]['y']
+        position_head = snake.head
 
         state = { # Possible values = {-1, 0, 1, 2, 3} (where -1 = the snake is on the same cell as the orb and 3 = didn't find any orb in this direction)
             'orb':       { Direction.UP: -1, Direction.RIGHT: -1, Direction.DOWN: -1, Direction.LEFT: -1 },
@@ -388,37 +927,52 @@ class World:
         for snake_id, snake in self.snakes.items():
             if not snake.is_alive:
                 self.transform_snake_into_orb(snake_id=snake_id)
-        self.snakes = {snake_id: snake for snake_id, snake in self.snakes.items() if snake.is_alive}
+                del self.snakes[snake_id]
+                if self.recorder:
+                    self.recorder.record_snake_remove(snake_id=snake_id)
+                if self.planner:
+                    self.planner.forget(snake_id=snake_id)
 
     def kill_orbs(self, orb_ids: List[int]):
         """Remove 'dead' (eaten) orbs from the game and spawn one new"""
         quantity = 0
-        for orb_id, orb in self.orbs.items():
-            if orb_id in orb_ids:
-                orb.is_alive = False
+        for orb_id in orb_ids:
+            if orb_id in self.orbs:
+                del self.orbs[orb_id]
+                if self.recorder:
+                    self.recorder.record_orb_remove(orb_id=orb_id)
                 quantity +=1
-        self.orbs = {orb_id: orb for orb_id, orb in self.orbs.items() if orb.is_alive}
         self.create_orbs(quantity=quantity, change_settings=False)
 
     def transform_snake_into_orb(self, snake_id: int):
         """Transform the snake body into orbs."""
-        for cell in self.snakes[snake_id].positions:
-            self.create_orb(x=cell['x'], y=cell['y'])
+        for x, y in self.snakes[snake_id].cells():
+            self.create_orb(x=x, y=y)
 
     def handle_game_over(self):
         self.game_over = True
+        self.nb_games += 1
         main_snake = self.get_main_snake()
         self.score_history.append(main_snake.score)
-        self.last_q_table |= main_snake.q_table
+        if self.metrics:
+            self.metrics.append(score=main_snake.score, length=main_snake.iteration, orbs=main_snake.nb_orbs,
+                                q_table_size=len(main_snake.q_table), exploration=main_snake.exploration)
+        if self.learns:
+            self.last_q_table |= main_snake.q_table
         if self.auto_retry:
             self.reset_world()
 
     def reset_world(self) -> None:
         """Put the World in the same state as it was when instantiating it."""
         logger.info('---------------- RESETTING WORLD ----------------')
-        self.map = get_empty_map(nb_col=self.nb_col, nb_row=self.nb_row)
-        self.snakes: Dict[int, Snake] = {}
-        self.orbs: Dict[int, Orb] = {}
+        self.map = ChunkedMap(nb_col=self.nb_col, nb_row=self.nb_row)
+        self.snakes.clear()
+        self.orbs.clear()
+        self.orb_spawner.reset()
+        if self.recorder:
+            self.recorder.record_reset()
+        if self.planner:
+            self.planner.forget()
         self.game_over = False
 
         self.create_orbs(
@@ -434,15 +988,15 @@ class World:
     # ----------------- OTHERS ----------------- #
 
     def get_snake_at_position(self, x: int, y: int) -> Snake | None:
+        cell = pack_cell(x=x, y=y)
         for snake_id, snake in self.snakes.items():
-            for cell in snake.positions:
-                if cell['x'] == x and cell['y'] == y:
-                    return snake
+            if cell in snake.body:
+                return snake
 
     def get_orb_at_position(self, x: int, y: int) -> Orb | None:
-        for orb_id, orb in self.orbs.items():
-            if orb.x == x and orb.y == y:
-                return orb
+        orb_id = self.orbs.get_id_at_position(x=x, y=y)
+        if orb_id is not None:
+            return self.orbs[orb_id]
 
     def is_inside_map(self, x: int, y: int) -> bool:
         return (0 <= x < self.nb_col) and (0 <= y < self.nb_row)
@@ -459,10 +1013,12 @@ class World:
                 return snake
 
     def remove_orb_at_position(self, x: int, y: int) -> bool:
-        for orb_id, orb in self.orbs.items():
-            if orb.x == x and orb.y == y:
-                del self.orbs[orb_id]
-                return True
+        orb_id = self.orbs.get_id_at_position(x=x, y=y)
+        if orb_id is not None:
+            del self.orbs[orb_id]
+            if self.recorder:
+                self.recorder.record_orb_remove(orb_id=orb_id)
+            return True
         return False
 
     def get_state(self) -> dict:
@@ -506,6 +1062,11 @@ class World:
                 f'Exploration: {round(main_snake.exploration, 3)} - QTable: {len(main_snake.q_table)}')
 
 
+def get_worlds_seeds(seed: int | None, nb_worlds: int) -> List[np.random.SeedSequence]:
+    """Independent seeds for worlds running in parallel (ex: one per worker) derived from one seed:
+    World(..., seed=seeds[i]) gives reproducible and non-overlapping random streams."""
+    return np.random.SeedSequence(seed).spawn(nb_worlds)
+
 def get_empty_map(nb_col: int, nb_row: int) -> dict:
     map = {}
     for row in range(0, nb_row):
@@ -557,9 +1118,13 @@ def get_n_consecutive_empty_cells_from_grid(n: int, grid: dict, nb_cols: int, nb
                 consecutive_row = []
                 consecutive_col[x] = []
 
+    # (only n=1 gives duplicates: a cell is both a row and a column streak) - a set keeps this linear
     no_duplicate = []
+    seen = set()
     for element in consecutive:
-        if element not in no_duplicate:
+        key = tuple((coord['x'], coord['y']) for coord in element)
+        if key not in seen:
+            seen.add(key)
             no_duplicate.append(element)
 
     return no_duplicate
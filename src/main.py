@@ -6,11 +6,11 @@ from src.ui.game_window import GameWindow
 from src.utils import conf, setup_logging
 
 
-def main(debug_level: int) -> None:
+def main(debug_level: int, record_path: str | None = None, replay_path: str | None = None) -> None:
 
     setup_logging(level=debug_level)
 
-    _window = GameWindow(debug_level=debug_level)
+    _window = GameWindow(debug_level=debug_level, record_path=record_path, replay_path=replay_path)
     arcade.run()
 
 if __name__ == '__main__':
@@ -23,5 +23,17 @@ if __name__ == '__main__':
         default=0,
         help='-v : full logs / -vv full logs + map debug'
     )
+    parser.add_argument(
+        '--record',
+        type=str,
+        default=None,
+        help='record the game into this file'
+    )
+    parser.add_argument(
+        '--replay',
+        type=str,
+        default=None,
+        help='play back a recorded game (see --record) instead of showing the menu'
+    )
     args = parser.parse_args()
-    main(args.verbose)
\ No newline at end of file
+    main(args.verbose, record_path=args.record, replay_path=args.replay)
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Load generator for the GameServer: many bot clients in one process, each one drives its snake and decodes every frame.
+
+    python -m src.server.BotClients --clients 200 --duration 30
+    python -m src.server.BotClients --clients 20 --read-delay-ms 200   # slow clients: throttled then dropped
+
+Reports the frames received, the resyncs (KEYFRAME after missed ticks), the dropped clients and the percentiles
+of the delivery delay of the ticks (time.time() on reception - when the server sent it, server on the same machine).
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+
+from src.utils import conf
+from src.engine.LoadTest import PERCENTILES
+from src.server.Protocol import FRAME, KEYFRAME, DELTA, DIRECTIONS, ClientState
+
+
+class BotClient:
+    """One connection: turns now and then ('turn_probability' per tick received), like a ScriptedPlayer without looking."""
+
+    def __init__(self, turn_probability: float = 0.1, read_delay_s: float = 0.0, seed: int | np.random.SeedSequence | None = None):
+        self.turn_probability = turn_probability
+        self.read_delay_s = read_delay_s
+        self.rng = np.random.default_rng(seed)
+        self.state = ClientState()
+        self.nb_frames = 0
+        self.nb_keyframes = 0
+        self.nb_bytes = 0
+        self.delays: List[float] = []
+        self.dropped = False # the server closed the connection
+
+    async def run(self, host: str, port: int, duration_s: float) -> 'BotClient':
+        reader, writer = await asyncio.open_connection(host=host, port=port)
+        try:
+            async with asyncio.timeout(duration_s):
+                while True:
+                    (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                    payload = await reader.readexactly(length)
+                    self.on_frame(payload=payload, writer=writer)
+                    if self.read_delay_s:
+                        await asyncio.sleep(self.read_delay_s)
+        except TimeoutError:
+            pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.dropped = True
+        finally:
+            writer.close()
+        return self
+
+    def on_frame(self, payload: bytes, writer: asyncio.StreamWriter) -> None:
+        message = self.state.apply(payload)
+        self.nb_bytes += FRAME.size + len(payload)
+        if message not in (KEYFRAME, DELTA):
+            return
+        self.nb_frames += 1
+        self.nb_keyframes += message == KEYFRAME
+        self.delays.append(time.time() - self.state.sent_at)
+        if self.rng.random() < self.turn_probability:
+            writer.write(bytes([self.rng.integers(len(DIRECTIONS))]))
+
+
+class BotClientsResult:
+    """Measures of all the bot clients of a run ('delays' in seconds)."""
+
+    def __init__(self, clients: List[BotClient], elapsed: float):
+        self.nb_clients = len(clients)
+        self.nb_dropped = sum(client.dropped for client in clients)
+        self.nb_frames = sum(client.nb_frames for client in clients)
+        self.nb_keyframes = sum(client.nb_keyframes for client in clients)
+        self.nb_bytes = sum(client.nb_bytes for client in clients)
+        self.delays = np.array([delay for client in clients for delay in client.delays], dtype=np.float64)
+        self.elapsed = elapsed
+
+    def get_delay_percentiles_ms(self) -> dict:
+        if not len(self.delays):
+            return {p: 0.0 for p in PERCENTILES}
+        return dict(zip(PERCENTILES, (np.percentile(self.delays, PERCENTILES) * 1000).tolist()))
+
+    def get_summary_str(self) -> str:
+        percentiles = ' - '.join(f'p{p:g} {ms:.2f}ms' for p, ms in self.get_delay_percentiles_ms().items())
+        frames_per_s = self.nb_frames / self.elapsed / self.nb_clients if self.elapsed and self.nb_clients else 0.0
+        return (f'{self.nb_clients} clients - {self.nb_dropped} dropped - {frames_per_s:.1f} frames/s per client - '
+                f'{self.nb_keyframes} keyframes - {self.nb_bytes / 1e6:.1f}MB received - delay {percentiles}')
+
+
+async def run_bot_clients(host: str, port: int, nb_clients: int, duration_s: float, turn_probability: float = 0.1,
+                          read_delay_s: float = 0.0, seed: int | None = None) -> BotClientsResult:
+    """'nb_clients' clients connected at once for 'duration_s' seconds."""
+    clients = [BotClient(turn_probability=turn_probability, read_delay_s=read_delay_s, seed=client_seed)
+               for client_seed in np.random.SeedSequence(seed).spawn(nb_clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client.run(host=host, port=port, duration_s=duration_s) for client in clients))
+    return BotClientsResult(clients=clients, elapsed=time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Bot clients for the MegaWorm server')
+    parser.add_argument('--host', default=conf['server']['host'])
+    parser.add_argument('--port', type=int, default=conf['server']['port'])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--turn-probability', type=float, default=0.1)
+    parser.add_argument('--read-delay-ms', type=float, default=0, help='pause after each frame (simulates slow clients)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    result = asyncio.run(run_bot_clients(host=args.host, port=args.port, nb_clients=args.clients, duration_s=args.duration,
+                                         turn_probability=args.turn_probability, read_delay_s=args.read_delay_ms / 1000,
+                                         seed=args.seed))
+    print(result.get_summary_str())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Multiplayer server: one World ticked on a fixed schedule, every TCP client drives its own snake.
+
+    python -m src.server.GameServer --port 8765 --bots 50 --orbs 100 --size 128 --tick-ms 50
+
+Clients send directions (one byte each, see Protocol) and receive, every tick, a DELTA of the World
+(changed cells, heads and tails). The DELTA is encoded once per tick and the same bytes go to every client.
+The tick loop never waits for a client: a client whose socket buffer is full skips ticks (and gets a KEYFRAME
+once it has caught up), it is dropped after 'max_missed_ticks' skipped ticks in a row.
+Load it with src.server.BotClients.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import List, Callable
+
+import numpy as np
+
+from src.utils import conf, setup_logging
+from src.engine.LoadTest import PERCENTILES
+from src.engine.Snake import Snake
+from src.engine.World import World, GameMode
+from src.server.Protocol import (DIRECTIONS, encode_welcome, encode_spawn, encode_keyframe, encode_delta,
+                                 get_snakes_ends)
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteClient:
+    """One connection: its snake, the last direction it asked for and whether it is behind."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.snake: Snake | None = None # handle of its snake, None = no snake (dead and not respawned yet)
+        self.direction = None # last direction received since the previous tick
+        self.needs_keyframe = True
+        self.missed_ticks = 0 # ticks skipped in a row because the client does not read fast enough
+
+    @property
+    def snake_id(self) -> int:
+        return self.snake.id if self.snake else 0
+
+    def get_snake(self, world: World) -> Snake | None:
+        """Its snake if it is still alive: the slot of a dead snake is reused by the next spawned one (see EntityStore),
+        maybe the snake of another client, so the id alone is not enough."""
+        if self.snake is not None and world.snakes.get(self.snake.id) is self.snake:
+            return self.snake
+        return None
+
+
+class GameServer:
+
+    def __init__(self, world: World, tick_s: float | None = None, max_buffer_bytes: int | None = None,
+                 max_missed_ticks: int | None = None):
+        self.world = world
+        self.tick_s = tick_s if tick_s is not None else conf['server']['tick_s']
+        self.max_buffer_bytes = max_buffer_bytes if max_buffer_bytes is not None else conf['server']['max_buffer_bytes']
+        self.max_missed_ticks = max_missed_ticks if max_missed_ticks is not None else conf['server']['max_missed_ticks']
+        self.clients: List[RemoteClient] = []
+        self.server: asyncio.Server | None = None
+        self.tick = 0
+        # cell array sent with the last tick: the next DELTA is computed against it
+        self.cells = world.get_cell_array()
+        self.tick_durations = deque(maxlen=1000) # seconds spent in step() (simulation + encoding + writes)
+        self.nb_late_ticks = 0   # ticks that started after their schedule
+        self.nb_dropped = 0      # clients disconnected for being too slow
+        self.nb_bytes_sent = 0
+
+    async def start(self, host: str | None = None, port: int | None = None) -> asyncio.Server:
+        """Accepts clients (port 0 = any free port, see get_port()), call run() to tick the World."""
+        host = host if host is not None else conf['server']['host']
+        port = port if port is not None else conf['server']['port']
+        self.server = await asyncio.start_server(self.handle_client, host=host, port=port)
+        return self.server
+
+    def get_port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        for client in list(self.clients):
+            self.remove_client(client=client)
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def run(self, nb_ticks: int | None = None, log_every_s: float | None = None) -> None:
+        """Ticks the World every 'tick_s' seconds ('nb_ticks' times, forever if None).
+        A late tick is not caught up: the schedule starts again from it."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        next_log = time.perf_counter() + log_every_s if log_every_s else None
+        last_tick = self.tick + nb_ticks if nb_ticks is not None else None
+        while last_tick is None or self.tick < last_tick:
+            self.step()
+            if next_log and time.perf_counter() >= next_log:
+                logger.warning(self.get_summary_str())
+                next_log += log_every_s
+            next_tick += self.tick_s
+            delay = next_tick - loop.time()
+            if delay < 0:
+                self.nb_late_ticks += 1
+                next_tick = loop.time()
+                delay = 0
+            # (also lets the clients connections run, even when late)
+            await asyncio.sleep(delay)
+
+    def step(self) -> None:
+        """One tick: apply the clients directions, update the World, respawn the dead clients and broadcast."""
+        start = time.perf_counter()
+        world = self.world
+        for client in self.clients:
+            snake = client.get_snake(world)
+            if client.direction is not None and snake:
+                world.set_direction_snake(snake_id=snake.id, direction=client.direction)
+            client.direction = None
+        world.update()
+        self.tick += 1
+        for client in self.clients:
+            if client.get_snake(world) is None:
+                self.spawn_snake(client=client)
+
+        cells = world.get_cell_array()
+        snakes = get_snakes_ends(world)
+        sent_at = time.time()
+        delta = encode_delta(tick=self.tick, sent_at=sent_at, previous_cells=self.cells, cells=cells, snakes=snakes)
+        keyframe = None
+        def get_keyframe() -> bytes:
+            nonlocal keyframe
+            if keyframe is None:
+                keyframe = encode_keyframe(tick=self.tick, sent_at=sent_at, cells=cells, snakes=snakes)
+            return keyframe
+        self.cells = cells
+        for client in list(self.clients):
+            self.send_tick(client=client, delta=delta, get_keyframe=get_keyframe)
+        self.tick_durations.append(time.perf_counter() - start)
+
+    def send_tick(self, client: RemoteClient, delta: bytes, get_keyframe: Callable[[], bytes]) -> None:
+        """Writes the tick without waiting: a client that has not read its previous frames skips this one."""
+        if client.writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+            client.missed_ticks += 1
+            client.needs_keyframe = True
+            if client.missed_ticks > self.max_missed_ticks:
+                logger.info(f'Client of snake {client.snake_id} dropped: {client.missed_ticks} ticks behind')
+                self.nb_dropped += 1
+                self.remove_client(client=client)
+            return
+        client.missed_ticks = 0
+        frame = delta
+        if client.needs_keyframe:
+            frame = get_keyframe()
+            client.needs_keyframe = False
+        client.writer.write(frame)
+        self.nb_bytes_sent += len(frame)
+
+    def spawn_snake(self, client: RemoteClient) -> None:
+        """Gives a new snake to the client (tried again next tick if the map is full)."""
+        client.snake = self.world.create_remote_snake()
+        if client.snake:
+            client.writer.write(encode_spawn(snake_id=client.snake.id))
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = RemoteClient(writer=writer)
+        self.clients.append(client)
+        client.snake = self.world.create_remote_snake()
+        writer.write(encode_welcome(snake_id=client.snake_id, nb_col=self.world.nb_col, nb_row=self.world.nb_row))
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                # only the last command of a tick matters
+                if data[-1] < len(DIRECTIONS):
+                    client.direction = DIRECTIONS[data[-1]]
+        except ConnectionError:
+            pass
+        finally:
+            self.remove_client(client=client)
+
+    def remove_client(self, client: RemoteClient) -> None:
+        """Closes the connection, the snake of the client turns into orbs."""
+        if client not in self.clients:
+            return
+        self.clients.remove(client)
+        snake = client.get_snake(self.world)
+        if snake:
+            snake.is_alive = False
+            self.world.kill_snakes()
+        client.writer.transport.abort()
+
+    def get_summary_str(self) -> str:
+        durations = np.array(self.tick_durations) * 1000
+        percentiles = np.percentile(durations, PERCENTILES).tolist() if len(durations) else [0.0] * len(PERCENTILES)
+        percentiles_str = ' - '.join(f'p{p:g} {ms:.2f}ms' for p, ms in zip(PERCENTILES, percentiles))
+        return (f'Tick {self.tick} - {len(self.clients)} clients - {len(self.world.snakes)} snakes - '
+                f'{self.nb_late_ticks} late ticks - {self.nb_dropped} dropped - '
+                f'{self.nb_bytes_sent / 1e6:.1f}MB sent - step {percentiles_str}')
+
+
+def get_server_world(nb_col: int, nb_row: int, nb_bots: int, nb_orbs: int, seed: int | None = None) -> World:
+    """A World without main snake (no game over): only bots, the clients snakes are added as they connect."""
+    world = World(nb_col=nb_col, nb_row=nb_row, game_mode=GameMode.BOTS, auto_retry=False, seed=seed)
+    world.learns = False
+    world.create_orbs(quantity=nb_orbs)
+    world.create_snakes(quantity=nb_bots, only_bots=True)
+    return world
+
+async def serve(world: World, host: str, port: int, tick_s: float, log_every_s: float) -> None:
+    server = GameServer(world=world, tick_s=tick_s)
+    await server.start(host=host, port=port)
+    logger.warning(f'Serving on {host}:{server.get_port()}')
+    try:
+        await server.run(log_every_s=log_every_s)
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='MegaWorm multiplayer server (TCP)')
+    parser.add_argument('--host', default=conf['server']['host'])
+    parser.add_argument('--port', type=int, default=conf['server']['port'])
+    parser.add_argument('--bots', type=int, default=20)
+    parser.add_argument('--orbs', type=int, default=50)
+    parser.add_argument('--size', type=int, nargs='+', default=[64], help='grid size (one value for a square grid, or columns rows)')
+    parser.add_argument('--tick-ms', type=float, default=conf['server']['tick_s'] * 1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--log-every-s', type=float, default=5)
+    parser.add_argument('-v', '--verbose', action='count', default=0)
+    args = parser.parse_args()
+    setup_logging(level=args.verbose)
+    nb_col, nb_row = (args.size * 2)[:2]
+    world = get_server_world(nb_col=nb_col, nb_row=nb_row, nb_bots=args.bots, nb_orbs=args.orbs, seed=args.seed)
+    try:
+        asyncio.run(serve(world=world, host=args.host, port=args.port, tick_s=args.tick_ms / 1000, log_every_s=args.log_every_s))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Messages between the GameServer and its clients (all little-endian, see the *.Struct below).
+
+Every message from the server is a frame: payload length (u32) + payload, the payload starts with its type (u8):
+    WELCOME   your snake id (0 = none, the map is full), nb_col, nb_row
+    SPAWN     your new snake id (after a death)
+    KEYFRAME  tick, sent at (time.time()), zlib(cell array (nb_col x nb_row, u8 CellType values)), snakes
+    DELTA     tick, sent at, number of changed cells n, n x (x), n x (y), n x (new value), snakes
+'snakes' = number of snakes, then (id, head x, head y, tail x, tail y) as u16 for every snake.
+
+A DELTA only holds what changed since the previous tick: a client that missed one (see GameServer) gets a KEYFRAME.
+A client sends one byte per command: the index of the direction in DIRECTIONS.
+"""
+import struct
+import zlib
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.engine.Snake import Direction
+
+FRAME = struct.Struct('<I')                 # payload length
+WELCOME_MESSAGE = struct.Struct('<BHHH')    # type, snake id, nb_col, nb_row
+SPAWN_MESSAGE = struct.Struct('<BH')        # type, snake id
+TICK_HEADER = struct.Struct('<BId')         # type, tick, sent at
+DELTA_SIZE = struct.Struct('<I')            # number of changed cells
+SNAKES_SIZE = struct.Struct('<H')           # number of snakes
+
+WELCOME, SPAWN, KEYFRAME, DELTA = range(4)
+
+DIRECTIONS = list(Direction)
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+def encode_welcome(snake_id: int, nb_col: int, nb_row: int) -> bytes:
+    return encode_frame(WELCOME_MESSAGE.pack(WELCOME, snake_id, nb_col, nb_row))
+
+def encode_spawn(snake_id: int) -> bytes:
+    return encode_frame(SPAWN_MESSAGE.pack(SPAWN, snake_id))
+
+def encode_snakes(snakes: np.ndarray) -> bytes:
+    """'snakes': (n, 5) array of (id, head x, head y, tail x, tail y), see get_snakes_ends()."""
+    return SNAKES_SIZE.pack(len(snakes)) + snakes.astype('<u2').tobytes()
+
+def encode_keyframe(tick: int, sent_at: float, cells: np.ndarray, snakes: np.ndarray) -> bytes:
+    return encode_frame(TICK_HEADER.pack(KEYFRAME, tick, sent_at)
+                        + zlib.compress(cells.astype(np.uint8).tobytes(), 1)
+                        + encode_snakes(snakes))
+
+def encode_delta(tick: int, sent_at: float, previous_cells: np.ndarray, cells: np.ndarray, snakes: np.ndarray) -> bytes:
+    """Only the cells whose value changed since 'previous_cells' (the cells of the previous tick)."""
+    x, y = np.nonzero(previous_cells != cells)
+    return encode_frame(TICK_HEADER.pack(DELTA, tick, sent_at) + DELTA_SIZE.pack(len(x))
+                        + x.astype('<u2').tobytes() + y.astype('<u2').tobytes() + cells[x, y].astype(np.uint8).tobytes()
+                        + encode_snakes(snakes))
+
+def get_snakes_ends(world) -> np.ndarray:
+    """(id, head x, head y, tail x, tail y) of every snake of the World."""
+    ends = [(snake_id, *snake.head, *snake.tail) for snake_id, snake in world.snakes.items() if snake.body]
+    return np.array(ends, dtype=np.int64).reshape(-1, 5)
+
+
+class ClientState:
+    """What a client knows of the World, rebuilt from the frames of the server (see apply())."""
+
+    def __init__(self):
+        self.snake_id = 0
+        self.nb_col = 0
+        self.nb_row = 0
+        self.tick = -1
+        self.sent_at = 0.0
+        self.cells: np.ndarray | None = None
+        # snake id -> (head x, head y, tail x, tail y)
+        self.snakes: Dict[int, Tuple[int, int, int, int]] = {}
+
+    def apply(self, payload: bytes | memoryview) -> int:
+        """Updates the state with one frame payload (without its length) and returns its type."""
+        message = payload[0]
+        if message == WELCOME:
+            _message, self.snake_id, self.nb_col, self.nb_row = WELCOME_MESSAGE.unpack_from(payload, 0)
+        elif message == SPAWN:
+            _message, self.snake_id = SPAWN_MESSAGE.unpack_from(payload, 0)
+        elif message == KEYFRAME:
+            _message, self.tick, self.sent_at = TICK_HEADER.unpack_from(payload, 0)
+            decompressor = zlib.decompressobj()
+            cells = decompressor.decompress(payload[TICK_HEADER.size:])
+            self.cells = np.frombuffer(cells, dtype=np.uint8).reshape(self.nb_col, self.nb_row).copy()
+            self.read_snakes(payload=memoryview(decompressor.unused_data), offset=0)
+        elif message == DELTA:
+            if self.cells is None:
+                raise ValueError('DELTA received before any KEYFRAME')
+            _message, self.tick, self.sent_at = TICK_HEADER.unpack_from(payload, 0)
+            offset = TICK_HEADER.size
+            (nb_cells,) = DELTA_SIZE.unpack_from(payload, offset)
+            offset += DELTA_SIZE.size
+            x = np.frombuffer(payload, dtype='<u2', count=nb_cells, offset=offset)
+            y = np.frombuffer(payload, dtype='<u2', count=nb_cells, offset=offset + 2 * nb_cells)
+            values = np.frombuffer(payload, dtype=np.uint8, count=nb_cells, offset=offset + 4 * nb_cells)
+            self.cells[x, y] = values
+            self.read_snakes(payload=payload, offset=offset + 5 * nb_cells)
+        else:
+            raise ValueError(f'Unknown message {message}')
+        return message
+
+    def read_snakes(self, payload: bytes | memoryview, offset: int) -> None:
+        (nb_snakes,) = SNAKES_SIZE.unpack_from(payload, offset)
+        snakes = np.frombuffer(payload, dtype='<u2', count=5 * nb_snakes, offset=offset + SNAKES_SIZE.size).reshape(-1, 5)
+        self.snakes = {snake_id: (head_x, head_y, tail_x, tail_y) for snake_id, head_x, head_y, tail_x, tail_y in snakes.tolist()}
@@ -5,6 +5,7 @@ import arcade
 
 from src.utils import conf
 from src.ui.views.menu_view import MenuView
+from src.ui.views.replay_view import ReplayView
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +14,16 @@ WINDOW_TITLE = conf['game_name']
 
 class GameWindow(arcade.Window):
 
-    def __init__(self, visible: bool = True, debug_level: int = 0):
+    def __init__(self, visible: bool = True, debug_level: int = 0, record_path: str | None = None, replay_path: str | None = None):
 
         logger.debug(f'[{os.path.basename(__file__)}] - Initializing Arcade Window')
         super().__init__(width=WINDOW_WIDTH, height=WINDOW_HEIGHT, title=WINDOW_TITLE, center_window=True, visible=visible)
-        # "activate" the MenuView
         self.debug_level = debug_level
-        self.show_view(MenuView())
+        if replay_path:
+            # no menu: play back a recorded episode (see ReplayView)
+            replay_view = ReplayView(path=replay_path)
+            replay_view.setup()
+            self.show_view(replay_view)
+        else:
+            # "activate" the MenuView
+            self.show_view(MenuView(record_path=record_path))
@@ -0,0 +1,43 @@
+"""Learning curves from a metrics file (see src.engine.Metrics), downsampled so that any number of episodes plots at once.
+
+    python -m src.ui.plots [agent_v<version>.metrics] [--points 1000]
+"""
+import argparse
+import os
+
+from src.engine.Metrics import read_metrics, downsample
+
+CURVES = ('score', 'length', 'orbs', 'q_table_size', 'exploration')
+
+
+def plot_learning_curves(path: str, nb_points: int = 1000, show: bool = True):
+    """One plot per metric: mean per bucket of episodes, min / max as a band. Returns the matplotlib figure."""
+    # matplotlib is only imported when a plot is requested
+    import matplotlib.pyplot as plt
+
+    metrics = read_metrics(path)
+    figure, axes = plt.subplots(len(CURVES), 1, sharex=True, figsize=(10, 2 * len(CURVES)))
+    for ax, name in zip(axes, CURVES):
+        x, low, mean, high = downsample(metrics[name], nb_points=nb_points)
+        ax.fill_between(x, low, high, alpha=0.3, linewidth=0)
+        ax.plot(x, mean, linewidth=1)
+        ax.set_ylabel(name)
+    axes[-1].set_xlabel(f'episode ({len(metrics)} in total)')
+    figure.suptitle(os.path.basename(path))
+    if show:
+        plt.show()
+    return figure
+
+def show_learning_curves(path: str) -> None:
+    """Same as plot_learning_curves() when there is something to plot (used when closing a LEARN game)."""
+    if os.path.exists(path) and len(read_metrics(path)):
+        plot_learning_curves(path=path)
+
+
+if __name__ == '__main__':
+    from src.engine.World import FILE_METRICS
+    parser = argparse.ArgumentParser(description='Plot the learning curves of a metrics file.')
+    parser.add_argument('path', nargs='?', default=FILE_METRICS)
+    parser.add_argument('--points', type=int, default=1000, help='max number of points per curve')
+    args = parser.parse_args()
+    plot_learning_curves(path=args.path, nb_points=args.points)
@@ -3,15 +3,18 @@ import os
 from enum import Enum
 
 import arcade
-import matplotlib.pyplot as plt
 
 from src.engine.Snake import Direction
-from src.engine.World import World, CellType, GameMode
+from src.engine.World import World, CellType, GameMode, FILE_METRICS
+from src.ui.plots import show_learning_curves
 from src.utils import conf
 
-# Window size depends on grid dimension
-WINDOW_WIDTH = (conf['grid']['cell_width'] + conf['grid']['margin']) * conf['grid']['nb_col'] + conf['grid']['margin']
-WINDOW_HEIGHT = (conf['grid']['cell_height'] + conf['grid']['margin']) * conf['grid']['nb_row'] + conf['grid']['margin']
+def get_window_size(nb_col: int, nb_row: int) -> tuple[int, int]:
+    """Window size depends on grid dimension"""
+    return ((conf['grid']['cell_width'] + conf['grid']['margin']) * nb_col + conf['grid']['margin'],
+            (conf['grid']['cell_height'] + conf['grid']['margin']) * nb_row + conf['grid']['margin'])
+
+WINDOW_WIDTH, WINDOW_HEIGHT = get_window_size(nb_col=conf['grid']['nb_col'], nb_row=conf['grid']['nb_row'])
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,15 @@ class CellColor(Enum):
     SNAKE = conf['snakes']['color']
     MAIN_SNAKE = conf['snakes']['main']['color']
 
+# CELL_COLORS[CellType value] -> color
+CELL_COLORS = [CellColor[cell_type.name].value for cell_type in CellType]
+
+def get_cell_center(col, row):
+    """Window coordinates of the center of a cell (works on arrays of cells too)."""
+    x = col * conf['grid']['cell_width'] + (conf['grid']['cell_width'] / 2) + conf['grid']['margin'] * (col - 1)
+    y = row * conf['grid']['cell_height'] + (conf['grid']['cell_height'] / 2) + conf['grid']['margin'] * (row - 1)
+    return x, y
+
 class GameView(arcade.View):
 
     def __init__(self, world: World, game_mode: GameMode):
@@ -41,17 +53,23 @@ class GameView(arcade.View):
         self.nb_col = conf['grid']['nb_col']
         self.map = None
         self.grid_sprite_list = None
+        self.painted = 0 # sprites of grid_sprite_list in use (one per non-empty cell), the others are hidden
         self.orb_texture = None
         self.ai_info_text = None
+        self.profiler_text = None
 
         # DEBUG
         self.grid_coordinates = []
 
     def setup(self):
         """Set up the game here. Call to restart the game."""
+        # the empty cells are not drawn: they are the background
+        arcade.set_background_color(CellColor.EMPTY.value)
         self.create_grid_sprite_list()
         self.resync_grid_with_map()
         self.ai_info_text = arcade.Text(text=self.world.get_ai_info_text(), x=7, y=7, color=(255, 255, 255, 255))
+        # shown when the World profiler is enabled (key P)
+        self.profiler_text = arcade.Text(text='', x=7, y=25, color=(255, 255, 0, 255), font_size=9)
 
     def on_draw(self):
         """Render the screen."""
@@ -60,6 +78,8 @@ class GameView(arcade.View):
         self.resync_grid_with_map()
         self.grid_sprite_list.draw()
         self.ai_info_text.draw()
+        if self.world.profiler:
+            self.profiler_text.draw()
         if self.window.debug_level >= 2:
             for text in self.grid_coordinates:
                 text.draw()
@@ -71,13 +91,16 @@ class GameView(arcade.View):
             self.world.update()
             if not self.world.game_over:
                 self.ai_info_text.text = self.world.get_ai_info_text()
+            if self.world.profiler:
+                self.profiler_text.text = self.world.profiler.get_summary_str()
             self.elapsed_time = 0.0
 
     def on_close(self) -> None:
+        self.world.stop_recording()
+        self.world.stop_metrics()
         if self.game_mode == GameMode.LEARN:
             self.world.save_q_table()
-            plt.plot(self.world.score_history)
-            plt.show()
+            show_learning_curves(path=FILE_METRICS)
 
     def on_key_press(self, key, modifiers):
         """Called whenever a key is pressed"""
@@ -99,6 +122,12 @@ class GameView(arcade.View):
         if key == arcade.key.R:
             self.world.reset_world()
 
+        elif key == arcade.key.P:
+            if self.world.profiler:
+                self.world.disable_profiler()
+            else:
+                self.world.enable_profiler()
+
         elif key == arcade.key.NUM_ADD:
             self.refresh_time *= 1.05
         elif key == arcade.key.NUM_SUBTRACT:
@@ -106,34 +135,31 @@ class GameView(arcade.View):
             logger.info(f'{self.refresh_time=}')
 
     def create_grid_sprite_list(self) -> None:
-        """Creates the grid representing the map (similar to World.map)
-        but filled with Sprites aimed to be displayed."""
+        """Creates the (empty) list of the Sprites aimed to be displayed: one per non-empty cell of World.map,
+        added as needed by resync_grid_with_map() so that drawing does not depend on the map size."""
         self.grid_sprite_list = arcade.SpriteList()
-        for row in range(self.nb_row):
-            for col in range(self.nb_col):
-                x = col * conf['grid']['cell_width'] + (conf['grid']['cell_width'] / 2) + conf['grid']['margin'] * (col - 1)
-                y = row * conf['grid']['cell_height'] + (conf['grid']['cell_height'] / 2) + conf['grid']['margin'] * (row - 1)
-                sprite = arcade.SpriteSolidColor(width=conf['grid']['cell_width'], height=conf['grid']['cell_width'],
-                                                 color=CellColor.EMPTY.value)
-                sprite.center_x = x
-                sprite.center_y = y
-                self.grid_sprite_list.append(sprite)
-                if self.window.debug_level >= 2:
+        self.painted = 0
+        if self.window.debug_level >= 2:
+            for row in range(self.nb_row):
+                for col in range(self.nb_col):
+                    x, y = get_cell_center(col=col, row=row)
                     self.grid_coordinates.append(
                         arcade.Text(f'{col}, {row}', x=x, y=y, color=(255, 0, 0, 255), font_size=8))
 
     def resync_grid_with_map(self) -> None:
-        """Set the color of every Sprite/square of self.grid_sprite_list based on
-        World.map which knows if a square (coordinate x,y) is empty, an orb or a snake."""
+        """Moves and colors the Sprites of self.grid_sprite_list onto the non-empty cells of World.map
+        (see ChunkedMap.get_non_empty_cells()): an orb or a snake. The sprites left over are hidden."""
         self.map = self.world.get_state()['map']
-        for row in range(self.nb_row):
-            for col in range(self.nb_col):
-                pos = row * self.nb_col + col
-                if self.map[(col, row)] == CellType.EMPTY:
-                    self.grid_sprite_list[pos].color = CellColor.EMPTY.value
-                elif self.map[(col, row)] == CellType.ORB:
-                    self.grid_sprite_list[pos].color = CellColor.ORB.value
-                elif self.map[(col, row)] == CellType.SNAKE:
-                    self.grid_sprite_list[pos].color = CellColor.SNAKE.value
-                else:
-                    self.grid_sprite_list[pos].color = CellColor.MAIN_SNAKE.value
+        cols, rows, values = self.map.get_non_empty_cells()
+        while len(self.grid_sprite_list) < len(values):
+            self.grid_sprite_list.append(arcade.SpriteSolidColor(width=conf['grid']['cell_width'],
+                                                                 height=conf['grid']['cell_width'],
+                                                                 color=CellColor.EMPTY.value))
+        xs, ys = get_cell_center(col=cols, row=rows)
+        for sprite, x, y, value in zip(self.grid_sprite_list, xs.tolist(), ys.tolist(), values.tolist()):
+            sprite.position = x, y
+            sprite.color = CELL_COLORS[value]
+            sprite.visible = True
+        for i in range(len(values), self.painted):
+            self.grid_sprite_list[i].visible = False
+        self.painted = len(values)
@@ -5,22 +5,28 @@ import time
 import arcade
 import arcade.gui
 from arcade.gui import UIAnchorLayout, UIBoxLayout, UIFlatButton, UILabel
-import matplotlib.pyplot as plt
 
 from src.ui.components.Radio import Radio
 from src.utils import conf
-from src.engine.World import World
-from src.ui.views.game_view import GameView, GameMode
+from src.engine.LoadTest import ScriptedPlayer, LoadTestResult, run_ticks
+from src.engine.World import World, GameMode, FILE_METRICS
+from src.ui.plots import show_learning_curves
+from src.ui.views.game_view import GameView
 from src.ui.components.Counter import Counter
 
 logger = logging.getLogger(__name__)
 
+# without UI, the BOTS / PLAY simulation logs its measures every LOG_EVERY_TICKS ticks
+LOG_EVERY_TICKS = 1000
+
 class MenuView(arcade.gui.UIView):
 
-    def __init__(self):
+    def __init__(self, record_path: str | None = None):
 
         logger.debug(f'[{os.path.basename(__file__)}] - Initializing MenuView')
         super().__init__()
+        # the game started from this menu is recorded in this file (see World.start_recording())
+        self.record_path = record_path
         # Arcade’s GUI module provides classes to interact with the user using buttons, labels etc...
         # Each view should have its own UIManager
         # call the add() function of UIManager to add widget to the GUI
@@ -81,6 +87,10 @@ class MenuView(arcade.gui.UIView):
             quantity=nb_snakes,
             first_is_a_player=first_is_a_player
         )
+        if self.record_path:
+            world.start_recording(path=self.record_path)
+        if game_mode_chosen == GameMode.LEARN:
+            world.start_metrics(path=FILE_METRICS)
         show_ui = self.radio_with_ui.current_value=='Yes'
         if show_ui:
             game_view = GameView(
@@ -93,13 +103,14 @@ class MenuView(arcade.gui.UIView):
             if game_mode_chosen == GameMode.LEARN:
                 start_game_in_headless(world=world)
             else:
-                raise Exception('Headless mode not available if not in learn mode')
+                start_simulation_in_headless(world=world)
 
 def start_game_in_headless(world: World) -> None:
     try:
         print('Running game without UI... Press ctrl+C to save q_table + history and then exit.')
         refresh_time = conf['refresh_time']
         start = time.time()
+        start_profiler = time.time()
         while True:
             time.sleep(refresh_time)
             if not world.game_over:
@@ -107,10 +118,36 @@ def start_game_in_headless(world: World) -> None:
                 should_log = not world.game_over and time.time() - start >= 1
                 if should_log:
                     logger.warning(world.get_ai_info_text())
+                    if world.planner:
+                        logger.warning(world.planner.get_summary_str())
                     start = time.time()
+                if world.profiler and time.time() - start_profiler >= conf['engine']['profiler']['log_every_s']:
+                    logger.warning(world.profiler.get_summary_str())
+                    start_profiler = time.time()
     except KeyboardInterrupt:
+        world.stop_recording()
+        world.stop_metrics()
         world.save_q_table()
-        plt.plot(world.score_history)
-        plt.show()
+        show_learning_curves(path=FILE_METRICS)
+    finally:
+        print('This window can be closed')
+
+def start_simulation_in_headless(world: World) -> None:
+    """BOTS or PLAY mode (with a ScriptedPlayer) at full speed, to measure the engine under load (see src.engine.LoadTest).
+    Dead bots are replaced so that the number of snakes stays the one chosen in the menu."""
+    print('Running simulation without UI at full speed... Press ctrl+C to exit.')
+    player = ScriptedPlayer() if world.game_mode == GameMode.PLAY else None
+    world.learns = False
+    results = []
+    start = time.perf_counter()
+    try:
+        while not world.game_over:
+            results.append(run_ticks(world=world, nb_ticks=LOG_EVERY_TICKS, player=player))
+            logger.warning(results[-1].get_summary_str())
+    except KeyboardInterrupt:
+        pass
     finally:
+        world.stop_recording()
+        if results:
+            logger.warning(f'Total: {LoadTestResult.merge(results=results, elapsed=time.perf_counter() - start).get_summary_str()}')
         print('This window can be closed')
\ No newline at end of file
@@ -0,0 +1,103 @@
+import logging
+import os
+
+import arcade
+
+from src.engine.Recorder import EpisodeReader, Replay
+from src.engine.World import GameMode
+from src.ui.views.game_view import GameView, get_window_size
+
+logger = logging.getLogger(__name__)
+
+SPEED_MIN, SPEED_MAX = 0.1, 1000.0
+
+class ReplayView(GameView):
+    """Plays a recorded episode (see World.start_recording()) without running the engine.
+    At speed x1, one tick is shown every 'refresh_time' seconds (same pace as PLAY / BOTS modes).
+    Faster, the ticks in between are replayed but not drawn, and jumps farther than a segment go through keyframes.
+
+    Keys: SPACE play/pause - RIGHT/LEFT one tick (paused) - UP/DOWN speed x2 / x0.5
+          PAGE UP/PAGE DOWN +/- 10% of the episode - HOME/END start/end - 0..9 jump to 0%..90%"""
+
+    def __init__(self, path: str):
+
+        logger.debug(f'[{os.path.basename(__file__)}] - Initializing ReplayView')
+        self.replay = Replay(reader=EpisodeReader(path))
+        super().__init__(world=self.replay.world, game_mode=GameMode.BOTS)
+        # the recording keeps the grid size it was made with
+        self.nb_col, self.nb_row = self.replay.reader.nb_col, self.replay.reader.nb_row
+        self.window.set_size(*get_window_size(nb_col=self.nb_col, nb_row=self.nb_row))
+        self.window.center_window()
+        self.speed = 1.0
+        self.is_paused = False
+        self.ticks_to_play = 0.0 # fraction of tick left over from the previous frames
+
+    def setup(self):
+        self.replay.seek(tick=0)
+        super().setup()
+        self.ai_info_text.text = self.get_replay_info_text()
+
+    def on_update(self, delta_time):
+        if self.is_paused:
+            return
+        nb_ticks = self.get_nb_ticks_to_play(delta_time=delta_time)
+        if nb_ticks:
+            self.seek(tick=self.replay.tick + nb_ticks)
+            if self.replay.tick >= self.replay.reader.nb_ticks:
+                self.is_paused = True
+                self.ai_info_text.text = self.get_replay_info_text()
+
+    def get_nb_ticks_to_play(self, delta_time: float) -> int:
+        """Number of ticks to replay for this frame (the others are skipped, only the last one is drawn)."""
+        self.ticks_to_play += delta_time * self.speed / self.refresh_time
+        nb_ticks = int(self.ticks_to_play)
+        self.ticks_to_play -= nb_ticks
+        return nb_ticks
+
+    def seek(self, tick: int) -> None:
+        self.replay.seek(tick=tick)
+        self.ai_info_text.text = self.get_replay_info_text()
+
+    def get_replay_info_text(self) -> str:
+        text = f'Tick {self.replay.tick}/{self.replay.reader.nb_ticks} - Speed x{self.speed:g}{" - PAUSED" if self.is_paused else ""}'
+        main_snake = self.world.get_main_snake()
+        if main_snake:
+            text += f' - Loop: {main_snake.iteration} - Score: {main_snake.score}'
+        return text
+
+    def set_speed(self, speed: float) -> None:
+        self.speed = min(max(speed, SPEED_MIN), SPEED_MAX)
+        self.ai_info_text.text = self.get_replay_info_text()
+
+    def on_close(self) -> None:
+        pass
+
+    def on_key_press(self, key, modifiers):
+        """Called whenever a key is pressed"""
+        nb_ticks = self.replay.reader.nb_ticks
+        if key == arcade.key.SPACE:
+            self.is_paused = not self.is_paused
+            self.ticks_to_play = 0.0
+            if not self.is_paused and self.replay.tick >= nb_ticks:
+                self.seek(tick=0)
+            self.ai_info_text.text = self.get_replay_info_text()
+        elif key == arcade.key.RIGHT:
+            self.is_paused = True
+            self.seek(tick=self.replay.tick + 1)
+        elif key == arcade.key.LEFT:
+            self.is_paused = True
+            self.seek(tick=self.replay.tick - 1)
+        elif key == arcade.key.UP:
+            self.set_speed(speed=self.speed * 2)
+        elif key == arcade.key.DOWN:
+            self.set_speed(speed=self.speed / 2)
+        elif key == arcade.key.PAGEUP:
+            self.seek(tick=self.replay.tick + max(1, nb_ticks // 10))
+        elif key == arcade.key.PAGEDOWN:
+            self.seek(tick=self.replay.tick - max(1, nb_ticks // 10))
+        elif key == arcade.key.HOME:
+            self.seek(tick=0)
+        elif key == arcade.key.END:
+            self.seek(tick=nb_ticks)
+        elif arcade.key.KEY_0 <= key <= arcade.key.KEY_9:
+            self.seek(tick=nb_ticks * (key - arcade.key.KEY_0) // 10)
@@ -1,8 +1,32 @@
+import copy
+import functools
 import json
 import logging
+import os
 
-with open('src/game_conf.json') as f:
-    conf = json.load(f)
+# the configuration is found next to this file whatever the current directory, MEGAWORM_CONF points to another one
+CONF_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_conf.json')
+CONF_ENV_VAR = 'MEGAWORM_CONF'
+
+@functools.lru_cache(maxsize=None)
+def read_conf(path: str) -> dict:
+    """Parsed content of a configuration file (read once per path, do not modify it: load_conf() copies it)."""
+    with open(path) as f:
+        return json.load(f)
+
+def get_conf_path() -> str:
+    return os.environ.get(CONF_ENV_VAR) or CONF_FILE
+
+def load_conf(path: str | None = None) -> dict:
+    """Replaces the content of 'conf' by the one of 'path' (default: get_conf_path()) and returns it.
+    The module constants computed from conf at import (ex: World.FILE_AGENT) keep the previous values:
+    to change them, set MEGAWORM_CONF before the first import instead."""
+    conf.clear()
+    conf.update(copy.deepcopy(read_conf(path or get_conf_path())))
+    return conf
+
+conf: dict = {}
+load_conf()
 
 def setup_logging(level):
     if level == 0:
@@ -1,14 +1,12 @@
 import pytest
-import json
 
-from src.engine.World import World
-from src.ui.views.game_view import GameMode
+from src.engine.World import World, GameMode
+from src.utils import read_conf, get_conf_path
 
 
 @pytest.fixture(scope='session')
 def game_conf():
-    with open('src/game_conf.json') as f:
-        return json.load(f)
+    return read_conf(get_conf_path())
 
 @pytest.fixture()
 def an_empty_world(game_conf):
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.engine.ChunkedMap import ChunkedMap, CellType
+from src.engine.World import World, GameMode, get_empty_map
+
+
+def test_behaves_like_the_dense_map():
+    chunked_map = ChunkedMap(nb_col=10, nb_row=7, chunk_size=4)
+    dense_map = get_empty_map(nb_col=10, nb_row=7)
+    assert chunked_map == dense_map and len(chunked_map) == 70
+    for cell, cell_type in [((0, 0), CellType.ORB), ((9, 6), CellType.SNAKE), ((5, 3), CellType.MAIN_SNAKE), ((0, 0), CellType.EMPTY)]:
+        chunked_map[cell] = cell_type
+        dense_map[cell] = cell_type
+    assert chunked_map == dense_map
+    assert (10, 0) not in chunked_map
+    with pytest.raises(KeyError):
+        chunked_map[(-1, 0)]
+    # the emptied chunk is freed
+    assert set(map(tuple, chunked_map.get_chunks().tolist())) == {(2, 1), (1, 0)}
+    assert chunked_map.nb_occupied.sum() == 2 and chunked_map.nb_orbs.sum() == 0
+
+def test_set_cells_counts_and_frees_chunks():
+    chunked_map = ChunkedMap(nb_col=9, nb_row=9, chunk_size=4)
+    chunked_map.set_cells(x=np.array([0, 1, 8, 8]), y=np.array([0, 0, 8, 8]), values=np.array([1, 2, 2, 1]))
+    assert chunked_map[(0, 0)] == CellType.ORB and chunked_map[(8, 8)] == CellType.ORB # the last value wins
+    assert chunked_map.nb_occupied[0, 0] == 2 and chunked_map.nb_orbs[2, 2] == 1
+    chunked_map.set_cells(x=np.array([0, 1]), y=np.array([0, 0]), values=CellType.EMPTY.value)
+    assert chunked_map.get_chunks().tolist() == [[2, 2]]
+    x, y, values = chunked_map.get_non_empty_cells()
+    assert (x.tolist(), y.tolist(), values.tolist()) == ([8], [8], [1])
+
+def test_empty_cells_sampling():
+    chunked_map = ChunkedMap(nb_col=11, nb_row=5, chunk_size=4)
+    chunked_map.set_cells(x=np.arange(11), y=np.full(11, 2), values=CellType.SNAKE.value)
+    assert chunked_map.get_nb_empty() == len(chunked_map.get_empty_cells()) == 44
+    rng = np.random.default_rng(0)
+    cells = chunked_map.sample_empty_cells(quantity=44, rng=rng)
+    assert len({tuple(cell) for cell in cells.tolist()}) == 44
+    assert all(chunked_map[tuple(cell)] == CellType.EMPTY for cell in cells.tolist())
+
+@pytest.mark.parametrize('nb_col, nb_row, filled_rows, expected', [
+    (5, 5, [0, 1, 3, 4], 'horizontal'),  # only row 2 is free
+    (1, 3, [], 'vertical'),
+    (3, 3, [0, 2], 'horizontal'),
+    (2, 3, [1], None),                    # no room for 3 cells
+])
+def test_n_consecutive_empty_cells(nb_col: int, nb_row: int, filled_rows: list, expected: str | None):
+    chunked_map = ChunkedMap(nb_col=nb_col, nb_row=nb_row, chunk_size=2)
+    for y in filled_rows:
+        chunked_map.set_cells(x=np.arange(nb_col), y=np.full(nb_col, y), values=CellType.ORB.value)
+    for seed in range(5):
+        cells = chunked_map.sample_n_consecutive_empty_cells(n=3, rng=np.random.default_rng(seed))
+        if expected is None:
+            assert cells is None
+            continue
+        assert len(cells) == 3 and all(chunked_map[(cell['x'], cell['y'])] == CellType.EMPTY for cell in cells)
+        assert len({cell['y' if expected == 'horizontal' else 'x'] for cell in cells}) == 1
+
+def test_world_memory_follows_content():
+    world = World(nb_col=1024, nb_row=1024, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    world.learns = False
+    world.create_orbs(quantity=20)
+    world.create_snakes(quantity=10, only_bots=True)
+    world.update()
+    # at most one chunk per orb and per snake (a body can straddle two chunks)
+    assert 0 < len(world.map.get_chunks()) <= 20 + 2 * 10
+    assert world.map.nb_orbs.sum() == len(world.orbs)
+    assert np.array_equal(world.map.get_cell_array(), world.get_cell_array())
@@ -0,0 +1,131 @@
+import numpy as np
+
+from src.engine.ContinuousWorld import ContinuousWorld
+from src.engine.Snake import Direction
+from src.engine.World import World, GameMode
+
+
+def get_world(**kwargs) -> ContinuousWorld:
+    world = ContinuousWorld(width=200, height=200, seed=0, **kwargs)
+    world.turn_probability = 0
+    return world
+
+def add_snake(world: ContinuousWorld, head: tuple, angle: float, length: int = 5) -> int:
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    segments = np.array(head) - np.arange(length)[:, None] * world.speed * direction
+    return world.snakes.spawn(segments=segments, angle=angle, speed=world.speed)
+
+def test_move_keeps_the_length_and_turns_toward_the_target():
+    world = get_world()
+    snake_id = add_snake(world, head=(100, 100), angle=0)
+    world.set_target_angle(snake_id=snake_id, angle=np.pi / 2)
+    world.update()
+    snake = world.snakes[snake_id]
+    assert snake.angle == world.turn_rate and snake.length == 5
+    segments = snake.segments()
+    assert np.allclose(segments[0], (100 + world.speed * np.cos(world.turn_rate), 100 + world.speed * np.sin(world.turn_rate)))
+    assert np.allclose(segments[1:], [(100 - k * world.speed, 100) for k in range(4)])
+
+def test_head_into_another_body_dies_and_leaves_orbs():
+    world = get_world(respawn=False)
+    victim = add_snake(world, head=(100, 100), angle=np.pi / 2, length=9)
+    # going right, its head reaches the body of the first snake
+    killer = add_snake(world, head=(100 - world.speed - world.snake_radius, 90), angle=0)
+    world.update()
+    assert killer not in world.snakes and victim in world.snakes
+    assert world.nb_deaths == 1 and len(world.orbs) == 3 # one orb every 2 segments
+
+def test_own_body_and_borders():
+    world = get_world(respawn=False)
+    # curled up on itself: no collision with its own segments
+    coiled = add_snake(world, head=(100, 100), angle=0, length=40)
+    world.set_target_angle(snake_id=coiled, angle=np.pi)
+    leaving = add_snake(world, head=(198, 20), angle=0)
+    world.update()
+    assert coiled in world.snakes and leaving not in world.snakes
+
+def test_eat_orbs_grow_and_respawn():
+    world = get_world()
+    snake_id = add_snake(world, head=(50, 50), angle=0)
+    world.create_orbs(quantity=20)
+    orb_id = world.orbs.spawn(x=50 + world.speed, y=50)
+    world.settings['nb_orbs'] += 1
+    world.update()
+    snake = world.snakes[snake_id]
+    assert orb_id not in world.orbs or world.orbs.position(orb_id) != (50 + world.speed, 50)
+    assert snake.nb_orbs == 1 and snake.growth == 1 and len(world.orbs) == 21
+    world.update()
+    assert snake.length == 6 and snake.growth == 0
+
+def test_many_snakes_keep_their_number():
+    world = ContinuousWorld(width=1000, height=1000, seed=1)
+    world.create_orbs(quantity=200)
+    world.create_snakes(quantity=150)
+    for _ in range(100):
+        world.update()
+    assert len(world.snakes) == 150 and world.nb_deaths > 0
+    heads = world.snakes.heads(ids=world.snakes.ids())
+    assert ((heads >= 0) & (heads < 1000)).all()
+
+def test_spawns_are_clear_of_the_other_snakes():
+    world = ContinuousWorld(width=300, height=300, seed=2, respawn=False)
+    world.turn_probability = 0
+    # long snakes across the plane
+    for y in range(30, 300, 80):
+        add_snake(world, head=(290, y), angle=0, length=70)
+    new_ids = world.create_snakes(quantity=30)
+    assert len(new_ids) > 0
+    for snake_id in new_ids.tolist():
+        others = world.snakes.ids()[world.snakes.ids() != snake_id]
+        points = np.concatenate((world.snakes.segments(ids=others)[0], world.snakes.heads(ids=others)))
+        distances = np.linalg.norm(world.snakes[snake_id].segments()[:, None, :] - points[None, :, :], axis=2)
+        assert distances.min() >= 2 * world.snake_radius
+    # none of them dies on its first move
+    world.update()
+    assert all(snake_id in world.snakes for snake_id in new_ids.tolist())
+
+def test_trail_keeps_its_spacing_while_turning_and_boosting():
+    world = get_world(respawn=False)
+    snake_id = add_snake(world, head=(100, 100), angle=0, length=30)
+    snake = world.snakes[snake_id]
+    for tick in range(40):
+        world.set_target_angle(snake_id=snake_id, angle=tick * 0.3)
+        world.set_boost(snake_id=snake_id, is_boosting=tick % 10 < 5)
+        world.move_snakes(ids=world.snakes.ids())
+        gaps = np.linalg.norm(np.diff(snake.segments(), axis=0), axis=1)
+        assert np.allclose(gaps, world.segment_spacing)
+        assert np.linalg.norm(np.array(snake.head) - snake.segments()[0]) < world.segment_spacing
+
+def test_boost_is_faster_and_costs_length():
+    world = get_world(respawn=False)
+    boosting = add_snake(world, head=(50, 50), angle=0, length=world.boost_min_length + 1)
+    normal = add_snake(world, head=(50, 150), angle=0, length=world.boost_min_length + 1)
+    world.set_boost(snake_id=boosting, is_boosting=True)
+    ticks = int(np.ceil(1 / world.boost_cost))
+    for _ in range(ticks):
+        world.move_snakes(ids=world.snakes.ids())
+    assert world.snakes[boosting].x - 50 == world.boost_factor * (world.snakes[normal].x - 50)
+    # one segment lost (it became an orb), then too short to boost
+    assert world.snakes[boosting].length == world.boost_min_length and len(world.orbs) == 1
+    x = world.snakes[boosting].x
+    world.move_snakes(ids=world.snakes.ids())
+    assert world.snakes[boosting].x - x == world.speed and world.snakes[boosting].length == world.boost_min_length
+
+def test_grid_adapter_moves_like_the_grid_world():
+    grid_world = World(nb_col=12, nb_row=12, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    grid_world.create_snakes(quantity=1)
+    grid_snake = next(iter(grid_world.snakes.values()))
+    grid_snake.positions = [{'x': 3, 'y': 5}, {'x': 4, 'y': 5}, {'x': 5, 'y': 5}]
+    grid_snake.direction = Direction.RIGHT
+    grid_snake.set_snake_as_player()
+    world = ContinuousWorld(width=12, height=12, seed=0, respawn=False)
+    world.use_grid_adapter()
+    snake_id = world.create_snake_from_grid(snake=grid_snake)
+    for direction in [Direction.RIGHT, Direction.UP, Direction.UP, Direction.LEFT, Direction.DOWN]:
+        grid_snake.set_direction(direction)
+        grid_snake.move(grow=False)
+        world.set_direction_snake(snake_id=snake_id, direction=direction)
+        world.update()
+        snake = world.snakes[snake_id]
+        assert snake.direction == direction
+        assert np.allclose(snake.segments(), np.array(list(grid_snake.cells())[::-1]) + 0.5)
@@ -0,0 +1,40 @@
+import pytest
+
+from src.engine.DiffFuzz import CANDIDATES, ReferenceEngine, Scenario, fuzz, run_scenario, shrink
+from src.engine.World import World
+
+
+class OrbLeakWorld(World):
+    """Broken engine: the eaten orbs are not replaced."""
+
+    def kill_orbs(self, orb_ids):
+        for orb_id in orb_ids:
+            if orb_id in self.orbs:
+                del self.orbs[orb_id]
+
+class OrbLeakEngine(ReferenceEngine):
+
+    def __init__(self, scenario: Scenario):
+        super().__init__(scenario)
+        self.world.__class__ = OrbLeakWorld
+
+
+@pytest.mark.parametrize('name', list(CANDIDATES))
+def test_candidates_agree_with_the_reference(name: str):
+    nb_run, divergence = fuzz(candidate=CANDIDATES[name], nb_scenarios=6, seed=3, nb_ticks=40)
+    assert divergence is None and nb_run == 6
+
+def test_scenario_is_reproducible():
+    scenario = Scenario(seed=5, nb_col=12, nb_row=9, nb_snakes=6, nb_orbs=10, nb_ticks=30, resolution='simultaneous')
+    assert run_scenario(scenario, candidate=ReferenceEngine) is None
+
+def test_divergence_is_found_and_shrunk():
+    scenario = Scenario(seed=7, nb_col=20, nb_row=20, nb_snakes=10, nb_orbs=30, nb_ticks=200, bots_policy='distance_field')
+    divergence = run_scenario(scenario, candidate=OrbLeakEngine)
+    assert divergence and 0 < divergence.tick < scenario.nb_ticks and 'orbs' in divergence.differences
+    shrunk = shrink(divergence, candidate=OrbLeakEngine)
+    assert shrunk.scenario.nb_ticks == shrunk.tick <= divergence.tick
+    assert shrunk.scenario.nb_snakes <= scenario.nb_snakes and shrunk.scenario.nb_orbs == 1
+    # local minimum: no simpler scenario diverges
+    assert all(run_scenario(smaller, candidate=OrbLeakEngine) is None for smaller in shrunk.scenario.get_smaller())
+    assert 'Divergence after tick' in repr(shrunk)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.engine.DistanceField import get_distance_field, get_danger_field, DistanceField
+
+
+def test_get_distance_field_no_source():
+    distance = get_distance_field(passable=np.ones((3, 2), dtype=bool), sources=np.empty((0, 2)))
+    assert (distance == 3 * 2).all()
+
+def test_get_distance_field_open_grid():
+    distance = get_distance_field(passable=np.ones((4, 3), dtype=bool), sources=np.array([[0, 0], [3, 2]]))
+    for x in range(4):
+        for y in range(3):
+            assert distance[x, y] == min(x + y, (3 - x) + (2 - y))
+
+def test_get_distance_field_goes_around_walls():
+    # x=1 is a wall except at y=2: from (0,0) the orb at (2,0) is 2 + 2 + 2 moves away
+    passable = np.ones((3, 3), dtype=bool)
+    passable[1, 0] = passable[1, 1] = False
+    distance = get_distance_field(passable=passable, sources=np.array([[2, 0]]))
+    assert distance[0, 0] == 6
+    assert distance[1, 0] == 3 * 3 # not passable = unreachable
+
+def test_get_distance_field_unreachable_area():
+    passable = np.ones((3, 1), dtype=bool)
+    passable[1, 0] = False
+    distance = get_distance_field(passable=passable, sources=np.array([[0, 0]]))
+    assert distance.tolist() == [[0], [3], [3]]
+
+@pytest.mark.parametrize('radius, weight, expected', [
+    (0, 5, [[0, 0, 0], [0, 5, 0], [0, 0, 0]]),
+    (1, 1, [[0, 1, 0], [1, 2, 1], [0, 1, 0]]),
+    (1, 0, [[0, 0, 0], [0, 0, 0], [0, 0, 0]]),
+])
+def test_get_danger_field(radius, weight, expected):
+    assert get_danger_field(shape=(3, 3), heads=np.array([[1, 1]]), radius=radius, weight=weight).tolist() == expected
+
+def test_get_danger_field_sums_heads_and_clips_to_map():
+    danger = get_danger_field(shape=(2, 1), heads=np.array([[0, 0], [1, 0]]), radius=1, weight=1)
+    assert danger.tolist() == [[3], [3]]
+
+def test_distance_field_cost():
+    occupancy = np.zeros((3, 1), dtype=np.int64)
+    field = DistanceField.compute(occupancy=occupancy, orb_cells=np.array([[2, 0]]), heads=np.array([[0, 0]]),
+                                  danger_radius=1, danger_weight=1)
+    assert field.cost.tolist() == [[2 + 2], [1 + 1], [0]]
@@ -0,0 +1,115 @@
+import pytest
+
+from src.engine.EntityStore import EntityStore
+from src.engine.Orb import Orb, OrbStore
+from src.engine.Snake import Snake, SnakeStore
+
+
+def test_orb_store_spawn_and_reuse_slots():
+    store = OrbStore(capacity=2)
+    ids = [store.spawn(x=i, y=2 * i) for i in range(5)]
+    assert ids == [0, 1, 2, 3, 4]
+    assert store.capacity >= 5
+    assert len(store) == 5
+    del store[1]
+    del store[3]
+    assert 1 not in store
+    assert list(store) == [0, 2, 4]
+    # the lowest free slot is reused first
+    assert store.spawn(x=9, y=9) == 1
+    assert store.spawn(x=8, y=8) == 3
+    assert store.position(orb_id=1) == (9, 9)
+    assert store.get_id_at_position(x=8, y=8) == 3
+    assert store.get_id_at_position(x=7, y=7) is None
+
+def test_orb_store_handles():
+    store = OrbStore()
+    orb_id = store.spawn(x=3, y=4)
+    orb = store[orb_id]
+    assert isinstance(orb, Orb)
+    assert isinstance(orb.x, int)
+    assert (orb.x, orb.y) == (3, 4)
+    assert orb is store[orb_id] # handles are pooled
+    orb.set_position(x=5, y=6)
+    assert store.cells() == [(5, 6)]
+    assert store.positions().tolist() == [[5, 6]]
+    with pytest.raises(KeyError):
+        _ = store[orb_id + 1]
+
+def test_removed_orb_handle_is_not_reused():
+    store = OrbStore()
+    orb = store[store.spawn(x=1, y=1)]
+    assert orb.is_alive
+    del store[orb.id]
+    assert not orb.is_alive
+    assert store.spawn(x=2, y=2) == orb.id
+    assert not orb.is_alive and store[orb.id] is not orb
+
+def test_every_store_creates_its_handles():
+    with pytest.raises(TypeError):
+        EntityStore()
+    store = SnakeStore()
+    slot = store.allocate()
+    snake = store[slot]
+    assert isinstance(snake, Snake) and snake.id == slot and len(snake.body) == 0
+
+def test_put_orb_created_outside_store():
+    orb = Orb()
+    orb.x, orb.y = 1, 2
+    store = OrbStore()
+    store[7] = orb
+    assert orb.store is store
+    assert orb.id == 7
+    assert store.cells() == [(1, 2)]
+    # slot 7 is no longer free
+    assert [store.spawn(x=0, y=0) for _ in range(8)] == [0, 1, 2, 3, 4, 5, 6, 8]
+
+def test_snake_store():
+    store = SnakeStore(capacity=1)
+    first = store.spawn(length=3, speed=1)
+    second = store.spawn(length=4, speed=1)
+    assert (first.id, second.id) == (1, 2) # id 0 = no snake
+    assert second.score == 4
+    first.score += 10
+    first.is_alive = False
+    assert store.arrays['score'][first.id] == 13
+    assert store.arrays['is_alive'].tolist()[:3] == [False, False, True]
+    first.body.append(0)
+    del store[first.id]
+    # the slot is reused, with fresh fields and a new handle: the old one is stale
+    third = store.spawn(length=3, speed=2)
+    assert third is not first
+    assert third.id == 1
+    assert third.is_alive and third.score == 3 and third.speed == 2
+    assert len(third.body) == 0
+    assert store.get(first.id) is not first and store.get(third.id) is third
+
+def test_snake_store_clear():
+    store = SnakeStore()
+    for _ in range(3):
+        store.spawn(length=3, speed=1)
+    store.clear()
+    assert len(store) == 0
+    assert store.spawn(length=3, speed=1).id == 1
+
+def test_add_snake_created_outside_store():
+    snake = Snake(length=3, speed=1)
+    snake.exploration = 0.5
+    store = SnakeStore()
+    store.spawn(length=3, speed=1)
+    snake_id = store.add(snake)
+    assert snake_id == 2
+    assert store[snake_id] is snake
+    assert snake.exploration == 0.5
+
+def test_put_snake_in_a_used_slot():
+    """Standalone snakes all have the same id: putting one where another snake is must not replace it."""
+    first, second = Snake(length=3, speed=1), Snake(length=3, speed=1)
+    assert first.id == second.id
+    store = SnakeStore()
+    store[first.id] = first
+    store[first.id] = first
+    with pytest.raises(KeyError):
+        store[second.id] = second
+    assert store[first.id] is first and len(store) == 1
+    assert store.add(second) != first.id
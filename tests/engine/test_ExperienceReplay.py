@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.engine.ExperienceReplay import QTableArray, ReplayBuffer, ACTIONS
+from src.engine.World import World, GameMode
+
+
+def test_replay_buffer_ring():
+    buffer = ReplayBuffer(capacity=4)
+    for i in range(6):
+        buffer.add(state=i, action=i % 4, reward=float(i), next_state=i + 1, done=i == 5)
+    assert len(buffer) == 4
+    assert sorted(buffer.states.tolist()) == [2, 3, 4, 5]
+    buffer.add_batch(states=np.array([10, 11]), actions=np.array([0, 1]), rewards=np.array([1.0, 2.0]),
+                     next_states=np.array([12, 13]), dones=np.array([False, True]))
+    assert sorted(buffer.states.tolist()) == [4, 5, 10, 11]
+    states, actions, rewards, next_states, dones = buffer.sample(batch_size=100, rng=np.random.default_rng(0))
+    assert set(states.tolist()) == {4, 5, 10, 11}
+    assert np.array_equal(next_states[states == 11], np.full((states == 11).sum(), 13))
+
+def test_td_update_same_as_online_update():
+    q_table = {(0,): {'UP': 1.0, 'RIGHT': 2.0, 'DOWN': 0.0, 'LEFT': 0.0}, (1,): {'UP': 0.0, 'RIGHT': 5.0, 'DOWN': 0.0, 'LEFT': 3.0}}
+    q_table_array = QTableArray(capacity=1)
+    q_table_array.bind(q_table=q_table)
+    rows = [q_table_array.get_row(state) for state in [(0,), (1,), (2,)]]
+    # (s=(0,), a=UP, r=-1, s'=(1,)) and (s=(1,), a=LEFT, r=-500, done)
+    q_table_array.td_update(states=np.array([rows[0], rows[1]]), actions=np.array([0, 3]), rewards=np.array([-1.0, -500.0]),
+                            next_states=np.array([rows[1], rows[2]]), dones=np.array([False, True]),
+                            learning_rate=0.1, discount_factor=0.9)
+    q_table_array.write_rows(rows=np.array(rows))
+    assert q_table[(0,)]['UP'] == 1.0 + 0.1 * (-1.0 + 0.9 * 5.0 - 1.0)
+    assert q_table[(1,)]['LEFT'] == 3.0 + 0.1 * (-500.0 - 3.0)
+    assert q_table[(2,)] == dict.fromkeys(ACTIONS, 0.0)
+
+def test_td_update_duplicates_add_up():
+    q_table_array = QTableArray()
+    q_table_array.bind(q_table={})
+    row = q_table_array.get_row((0,))
+    q_table_array.td_update(states=np.array([row, row]), actions=np.array([1, 1]), rewards=np.array([10.0, 10.0]),
+                            next_states=np.array([row, row]), dones=np.array([True, True]), learning_rate=0.5, discount_factor=0.9)
+    assert q_table_array.values[row, 1] == 10.0
+
+def test_world_learns_with_experience_replay():
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=True, seed=0)
+    world.enable_experience_replay(capacity=50, batch_size=16, every_k_ticks=2, min_size=10)
+    world.create_orbs(quantity=10)
+    world.create_snakes(quantity=3)
+    for i in range(60):
+        world.update()
+    assert len(world.replay_buffer) == 50 # full: the ring wrapped around
+    assert world.get_main_snake().q_table
+    assert any(value != 0 for actions in world.get_main_snake().q_table.values() for value in actions.values())
+
+def get_learning_world(learners: str) -> World:
+    world = World(nb_col=12, nb_row=12, game_mode=GameMode.LEARN, auto_retry=True, seed=1)
+    world.learners = learners
+    world.create_orbs(quantity=10)
+    world.create_snakes(quantity=6)
+    return world
+
+def test_every_bot_learns_into_the_shared_q_table():
+    world = get_learning_world(learners='bots')
+    q_table = world.get_main_snake().q_table
+    assert all(snake.q_table is q_table and snake.state is not None for snake in world.snakes.values())
+    main_only = get_learning_world(learners='main')
+    for i in range(30):
+        world.update()
+        main_only.update()
+    assert len(world.get_main_snake().q_table) > len(main_only.get_main_snake().q_table)
+    # the bots spawned after a reset share it too
+    world.reset_world()
+    assert all(snake.q_table is world.get_main_snake().q_table for snake in world.snakes.values())
+
+@pytest.mark.parametrize('game_mode', [GameMode.BOTS, GameMode.LEARN])
+def test_experience_replay_through_game_overs(game_mode: GameMode):
+    world = World(nb_col=10, nb_row=10, game_mode=game_mode, auto_retry=True, seed=0)
+    world.agent_file = None
+    buffer = world.enable_experience_replay(capacity=500, batch_size=64, every_k_ticks=2, min_size=10)
+    world.create_orbs(quantity=5)
+    world.create_snakes(quantity=3)
+    for _ in range(3000):
+        world.update()
+    assert len(world.score_history) >= 2 and len(buffer) > 0
+    # the rows of the buffer are rows of the q_table that learns now
+    rows = buffer.states[:len(buffer)]
+    assert rows.max() < len(world.q_table_array.states)
+    assert world.q_table_array.q_table is world.get_main_snake().q_table
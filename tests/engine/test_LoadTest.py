@@ -0,0 +1,51 @@
+from collections import deque
+
+import pytest
+
+from src.engine.LoadTest import ScriptedPlayer, run_load_test, run_ticks, get_load_test_world
+from src.engine.Snake import Direction
+from src.engine.World import GameMode
+
+
+@pytest.mark.parametrize('game_mode', [GameMode.BOTS, GameMode.PLAY])
+def test_load_test_keeps_the_number_of_snakes(game_mode: GameMode):
+    world = get_load_test_world(game_mode=game_mode, nb_col=40, nb_row=40, nb_bots=12, nb_orbs=10, seed=0)
+    world.learns = False
+    player = ScriptedPlayer(seed=0) if game_mode == GameMode.PLAY else None
+    result = run_ticks(world=world, nb_ticks=200, player=player)
+    assert result.nb_ticks == 200 and len(result.latencies) == 200
+    assert result.nb_deaths > 0
+    assert len(world.snakes) == world.settings['nb_snakes']
+    # only one main snake, the player in PLAY mode
+    main_snakes = [snake for snake in world.snakes.values() if snake.is_main_snake]
+    assert len(main_snakes) == 1 and main_snakes[0].is_bot == (game_mode == GameMode.BOTS)
+
+def test_resets_are_counted_with_a_full_score_window():
+    results = []
+    for maxlen in (None, 1):
+        world = get_load_test_world(game_mode=GameMode.PLAY, nb_col=10, nb_row=10, nb_bots=4, nb_orbs=4, seed=2)
+        world.learns = False
+        # only the last scores are kept: a full window does not grow on reset
+        world.score_history = deque([0], maxlen=maxlen)
+        results.append(run_ticks(world=world, nb_ticks=300, player=ScriptedPlayer(seed=2)))
+    assert results[0].nb_resets > 1 and results[1].nb_resets == results[0].nb_resets
+
+def test_scripted_player_avoids_walls():
+    world = get_load_test_world(game_mode=GameMode.PLAY, nb_col=6, nb_row=6, nb_bots=0, nb_orbs=0, seed=1)
+    player = ScriptedPlayer(turn_probability=0, seed=1)
+    snake = world.get_snake_player()
+    snake.positions = [{'x': 3, 'y': 5}, {'x': 4, 'y': 5}, {'x': 5, 'y': 5}]
+    snake.direction = Direction.RIGHT
+    world.update_map_state()
+    assert player.choose_direction(world=world) == Direction.DOWN
+
+def test_load_test_report_is_reproducible():
+    kwargs = dict(game_mode=GameMode.PLAY, nb_col=15, nb_row=15, nb_bots=6, nb_orbs=8, nb_ticks=150, nb_worlds=2, seed=3)
+    result = run_load_test(**kwargs)
+    assert result.nb_worlds == 2 and result.nb_ticks == 300
+    assert result.get_ticks_per_s() > 0
+    percentiles = result.get_latency_percentiles_ms()
+    assert percentiles[50] <= percentiles[99]
+    assert 'deaths/1k ticks' in result.get_summary_str()
+    again = run_load_test(**kwargs, workers=2)
+    assert (again.nb_deaths, again.nb_resets) == (result.nb_deaths, result.nb_resets)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from src.engine.Metrics import MetricsLog, read_metrics, downsample
+from src.engine.World import World, GameMode
+
+
+def test_metrics_log_appends(tmp_path):
+    path = str(tmp_path / 'agent.metrics')
+    metrics = MetricsLog(path=path, flush_every=3)
+    for i in range(5):
+        metrics.append(score=i * 10, length=i, orbs=i % 2, q_table_size=i * 100, exploration=0.5)
+    assert len(read_metrics(path)) == 3 # the last 2 are still buffered
+    metrics.close()
+    # a new log continues the same file
+    metrics = MetricsLog(path=path)
+    metrics.append(score=-500, length=7, orbs=0, q_table_size=600, exploration=0.4)
+    metrics.close()
+    records = read_metrics(path)
+    assert records['episode'].tolist() == list(range(6))
+    assert records['score'].tolist() == [0, 10, 20, 30, 40, -500]
+
+def test_not_a_metrics_file(tmp_path):
+    path = tmp_path / 'agent.metrics'
+    path.write_bytes(b'something else')
+    with pytest.raises(ValueError):
+        read_metrics(str(path))
+
+def test_downsample():
+    x, low, mean, high = downsample(np.arange(10), nb_points=4)
+    # buckets of 3: [0 1 2] [3 4 5] [6 7 8] [9]
+    assert x.tolist() == [1, 4, 7, 9]
+    assert low.tolist() == [0, 3, 6, 9]
+    assert mean.tolist() == [1, 4, 7, 9]
+    assert high.tolist() == [2, 5, 8, 9]
+    assert downsample(np.arange(3), nb_points=10)[2].tolist() == [0, 1, 2]
+
+def test_world_streams_episodes(tmp_path):
+    path = str(tmp_path / 'agent.metrics')
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=True, seed=33)
+    world.score_history = type(world.score_history)(maxlen=1) # bounded in memory
+    world.create_orbs(quantity=8)
+    world.create_snakes(quantity=8)
+    world.start_metrics(path=path)
+    for i in range(60):
+        world.update()
+    world.stop_metrics()
+    records = read_metrics(path)
+    assert len(records) == 2 # (this seed) 2 game overs
+    assert len(world.score_history) == 1 and world.score_history[0] == records['score'][-1]
+    assert (records['length'] > 0).all()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.engine.ChunkedMap import CellType
+from src.engine.OrbSpawner import FenwickTree, OrbSpawner
+from src.engine.World import World, GameMode
+
+
+def test_fenwick_tree_matches_the_cumulated_sum():
+    rng = np.random.default_rng(0)
+    weights = rng.random(13)
+    weights[[0, 5, 12]] = 0
+    tree = FenwickTree(weights=weights)
+    for i, weight in [(3, 0.0), (5, 2.5), (12, 0.1)]:
+        tree.set(i, weight)
+        weights[i] = weight
+    assert tree.total == pytest.approx(weights.sum())
+    cumulated = np.cumsum(weights)
+    for value in rng.random(200) * tree.total:
+        assert tree.find(value) == np.searchsorted(cumulated, value, side='right')
+    # never an index without weight, even at the upper bound
+    assert weights[tree.find(tree.total)] > 0
+
+@pytest.mark.parametrize('sparsity', [0, 2])
+def test_spawn_on_empty_cells_only(sparsity: float):
+    world = World(nb_col=40, nb_row=40, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    world.orb_spawner = OrbSpawner(sparsity=sparsity)
+    world.create_snakes(quantity=20)
+    world.create_orbs(quantity=300)
+    assert len(world.orbs) == 300 and world.map.nb_orbs.sum() == 300
+    assert all(world.map[cell] == CellType.ORB for cell in world.orbs.cells())
+    # not enough empty cells: nothing is created
+    assert world.orb_spawner.spawn(world=world, quantity=world.map.get_nb_empty() + 1) == 0
+
+def test_sparsity_refills_the_regions_without_orbs():
+    world = World(nb_col=64, nb_row=64, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    world.orb_spawner = OrbSpawner(sparsity=4)
+    # the left half of the map already has plenty of orbs
+    for cell in world.rng.permutation(32 * 64)[:200].tolist():
+        world.create_orb(x=cell // 64, y=cell % 64)
+    world.orb_spawner.spawn(world=world, quantity=200)
+    nb_right = sum(x >= 32 for x, _ in world.orbs.cells())
+    assert nb_right > 150
+
+def test_bursts_up_to_max_orbs():
+    world = World(nb_col=30, nb_row=30, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    world.orb_spawner = OrbSpawner(burst_every=3, burst_size=4, max_orbs=10)
+    world.create_orbs(quantity=3)
+    created = [world.orb_spawner.on_tick(world=world) for _ in range(9)]
+    assert created == [0, 0, 4, 0, 0, 3, 0, 0, 0] and len(world.orbs) == 10
+    world.reset_world()
+    assert world.orb_spawner.nb_ticks == 0 and len(world.orbs) == 3
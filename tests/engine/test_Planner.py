@@ -0,0 +1,102 @@
+import pytest
+
+from src.engine import Planner
+from src.engine.Planner import RolloutPlanner
+from src.engine.Snake import Snake, Direction
+from src.engine.World import World, GameMode
+
+
+def get_world_with_main_snake(body, direction: Direction, orbs=()) -> World:
+    world = World(nb_col=6, nb_row=6, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    snake = Snake(length=len(body), speed=1)
+    snake.positions = [{'x': x, 'y': y} for x, y in body]
+    snake.direction = direction
+    snake.is_main_snake = True
+    world.snakes.add(snake)
+    for x, y in orbs:
+        world.create_orb(x=x, y=y)
+    world.update_map_state()
+    return world
+
+@pytest.mark.parametrize('rollout_policy', ['random', 'greedy'])
+def test_planner_avoids_wall_and_takes_orb(rollout_policy: str):
+    # going RIGHT hits the wall, the orb is one cell DOWN
+    world = get_world_with_main_snake(body=[(3, 2), (4, 2), (5, 2)], direction=Direction.RIGHT, orbs=[(5, 1)])
+    planner = RolloutPlanner(depth=4, rollouts_per_tick=30, rollout_policy=rollout_policy, seed=0)
+    assert planner.choose_direction(world=world, snake_id=world.get_main_snake().id) == Direction.DOWN
+
+def test_planner_does_not_change_the_world():
+    world = get_world_with_main_snake(body=[(1, 1), (1, 2), (1, 3)], direction=Direction.UP, orbs=[(4, 4), (0, 0)])
+    snake_id = world.get_main_snake().id
+    rng_state = world.rng.bit_generator.state
+    cells, orbs, score = list(world.snakes[snake_id].cells()), world.orbs.cells(), world.snakes[snake_id].score
+    planner = RolloutPlanner(depth=5, rollouts_per_tick=20, seed=1)
+    direction = planner.choose_direction(world=world, snake_id=snake_id)
+    assert list(world.snakes[snake_id].cells()) == cells
+    assert world.orbs.cells() == orbs
+    assert world.snakes[snake_id].score == score
+    assert world.rng.bit_generator.state == rng_state
+    assert planner.nb_rollouts == 20
+    # the subtree of the chosen direction is kept for the next tick
+    assert planner.trees[snake_id].visits > 0
+    planner.forget(snake_id=snake_id)
+    assert snake_id not in planner.trees
+    assert direction in world.snakes[snake_id].authorized_direction()
+
+def test_world_with_planned_main_snake():
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=True, seed=2)
+    world.planner_snakes = 'main'
+    world.planner = RolloutPlanner(depth=4, rollouts_per_tick=6, rollout_policy='greedy', seed=2)
+    world.create_orbs(quantity=8)
+    world.create_snakes(quantity=4)
+    for i in range(20):
+        world.update()
+    assert world.planner.nb_rollouts > 0
+    assert world.planner.get_rollouts_per_s() > 0
+
+def test_player_is_never_planned():
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.PLAY, auto_retry=False, seed=2)
+    world.planner_snakes = 'main'
+    world.planner = RolloutPlanner(depth=4, rollouts_per_tick=6, seed=2)
+    world.create_snakes(quantity=3, first_is_a_player=True)
+    player = world.get_snake_player()
+    assert player.is_main_snake and world.get_planned_snake_ids() == []
+    direction = next(d for d in player.authorized_direction() if d != player.direction)
+    world.set_direction_player(direction=direction)
+    world.set_direction_bots(game_mode=GameMode.PLAY)
+    assert player.direction == direction and world.planner.nb_rollouts == 0
+
+class FakeClock:
+    """Stands for the time module in Planner: perf_counter() only advances with the rollouts."""
+    def __init__(self):
+        self.now = 0.0
+    def perf_counter(self) -> float:
+        return self.now
+
+def test_time_budget_is_shared_by_the_planned_snakes(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(Planner, 'time', clock)
+    rollout = RolloutPlanner.rollout
+    def rollout_of_1_ms(planner, *args, **kwargs):
+        clock.now += 0.001
+        rollout(planner, *args, **kwargs)
+    monkeypatch.setattr(RolloutPlanner, 'rollout', rollout_of_1_ms)
+    world = World(nb_col=15, nb_row=15, game_mode=GameMode.BOTS, auto_retry=False, seed=3)
+    world.create_orbs(quantity=10)
+    world.create_snakes(quantity=10)
+    snake_ids = world.snakes.ids().tolist()
+    planner = RolloutPlanner(depth=4, rollouts_per_tick=0, time_budget_ms=20, seed=3)
+    directions = planner.choose_directions(world=world, snake_ids=snake_ids)
+    # 20 rollouts, plus the candidates tried by the last planned snake whatever its share (10 x 20 if the budget was per snake)
+    assert planner.nb_rollouts <= 20 + 3
+    assert directions and all(direction in world.snakes[snake_id].authorized_direction() for snake_id, direction in directions.items())
+    # the snakes left without a direction come first on the next tick
+    left = [snake_id for snake_id in snake_ids if snake_id not in directions]
+    if left:
+        assert left[0] in planner.choose_directions(world=world, snake_ids=snake_ids)
+    planner.time_budget_ms = 0
+    assert planner.choose_directions(world=world, snake_ids=snake_ids) == {}
+    # unplanned bots are driven as usual
+    world.planner_snakes, world.planner = 'bots', planner
+    world.update()
+    assert all(snake.direction is not None for snake in world.snakes.values())
@@ -0,0 +1,34 @@
+import pytest
+
+from src.engine.Profiler import TickProfiler
+from src.engine.World import World, GameMode
+
+
+def test_tick_profiler():
+    profiler = TickProfiler(window=2)
+    for _ in range(3):
+        profiler.start()
+        profiler.lap('map')
+        profiler.lap('moves')
+        profiler.lap('map')
+        profiler.end_tick()
+    stats = profiler.get_stats()
+    assert set(stats) == {'map', 'moves'}
+    assert stats['map']['calls'] == 6
+    assert len(profiler.durations['map']) == 2 # window
+    assert profiler.ticks == 3
+    assert sum(values['share'] for values in stats.values()) == pytest.approx(1)
+    assert profiler.get_summary_str().startswith('Tick: ')
+
+def test_world_profiler():
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=False)
+    world.create_orbs(quantity=5)
+    world.create_snakes(quantity=2)
+    assert world.profiler is None
+    profiler = world.enable_profiler(window=10)
+    world.update()
+    assert profiler.ticks == 1
+    assert {'map', 'directions', 'moves', 'radar', 'q_update'} <= set(profiler.get_stats())
+    world.disable_profiler()
+    world.update()
+    assert profiler.ticks == 1
@@ -0,0 +1,102 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.engine.Recorder import EpisodeReader, Replay
+from src.engine.World import World, GameMode
+
+
+def get_state(world: World) -> tuple:
+    return (
+        tuple((snake_id, tuple(snake.cells()), snake.score, snake.iteration, snake.is_main_snake) for snake_id, snake in world.snakes.items()),
+        tuple(zip(world.orbs.ids().tolist(), world.orbs.cells())),
+    )
+
+def record_world(path: str, nb_ticks: int, keyframe_every: int, compress: bool) -> List[tuple]:
+    """Records a seeded world (with game overs and resets) and returns its state after each tick (index 0 = before the first one)."""
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=True, seed=33)
+    world.create_orbs(quantity=8)
+    world.create_snakes(quantity=8)
+    world.start_recording(path=path, keyframe_every=keyframe_every, compress=compress)
+    states = [get_state(world)]
+    for i in range(nb_ticks):
+        world.update()
+        states.append(get_state(world))
+    world.stop_recording()
+    assert len(world.score_history) == 2 # (this seed) the recording goes through resets
+    return states
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_replay_matches_recording(tmp_path, compress: bool):
+    path = str(tmp_path / 'episode.mwrec')
+    states = record_world(path=path, nb_ticks=60, keyframe_every=16, compress=compress)
+    reader = EpisodeReader(path)
+    assert reader.nb_ticks == 60
+    assert len(reader.segments) == 4
+    # one tick at a time from the start
+    replay = Replay(reader=reader)
+    replay.seek(tick=0)
+    assert get_state(replay.world) == states[0]
+    for tick in range(1, 61):
+        assert replay.step()
+        assert get_state(replay.world) == states[tick]
+    assert not replay.step()
+    # random access, backwards too
+    for tick in (45, 3, 16, 17, 60, 0):
+        replay.seek(tick=tick)
+        assert get_state(replay.world) == states[tick]
+
+def test_keyframe_cells(tmp_path):
+    path = str(tmp_path / 'episode.mwrec')
+    record_world(path=path, nb_ticks=60, keyframe_every=10, compress=True)
+    replay = Replay(reader=EpisodeReader(path))
+    replay.seek(tick=30)
+    assert np.array_equal(replay.cells, replay.world.get_cell_array())
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'episode.mwrec'
+    path.write_bytes(b'not a recording at all')
+    with pytest.raises(ValueError):
+        EpisodeReader(str(path))
+
+def test_events_between_ticks_at_a_segment_boundary(tmp_path):
+    path = str(tmp_path / 'episode.mwrec')
+    world = World(nb_col=20, nb_row=20, game_mode=GameMode.BOTS, auto_retry=True, seed=4)
+    world.create_orbs(quantity=5)
+    world.create_snakes(quantity=3)
+    world.start_recording(path=path, keyframe_every=5)
+    states = [get_state(world)]
+    for tick in range(1, 13):
+        world.update()
+        states.append(get_state(world))
+        if tick in (4, 5, 10):
+            # between two ticks, right before / at a keyframe
+            world.create_snakes(quantity=1, change_settings=False, only_bots=True)
+        if tick == 5:
+            # orb ids do not fit in 16 bits
+            world.orbs.spawn(x=0, y=0, orb_id=70000)
+            world.recorder.record_orb_spawn(orb_id=70000, x=0, y=0)
+    world.stop_recording()
+    reader = EpisodeReader(path)
+    replay = Replay(reader=reader)
+    replay.seek(tick=0)
+    # what happens after a tick is replayed with the next one
+    for tick in range(1, 13):
+        assert replay.step()
+        assert get_state(replay.world) == states[tick]
+    assert any(orb_id == 70000 for orb_id, _ in get_state(replay.world)[1])
+    for tick in (12, 6, 11, 5, 3, 10):
+        replay.seek(tick=tick)
+        assert get_state(replay.world) == states[tick]
+
+def test_empty_recording(tmp_path):
+    path = str(tmp_path / 'episode.mwrec')
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=True, seed=0)
+    world.start_recording(path=path)
+    world.create_snakes(quantity=2)
+    world.stop_recording()
+    reader = EpisodeReader(path)
+    assert reader.nb_ticks == 0 and reader.segments == []
+    assert len(reader.get_world(tick=0).snakes) == 0
+    assert not Replay(reader=reader).step()
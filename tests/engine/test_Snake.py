@@ -48,4 +48,27 @@ def test_can_change_direction(direction_snake, direction_desired, expected):
 def test_authorized_directions_based_on_body(positions: List[dict], expected: List[Direction]):
     snake = Snake(length=3, speed=1)
     snake.positions = positions
-    assert snake.authorized_directions_based_on_body() == expected
\ No newline at end of file
+    assert snake.authorized_directions_based_on_body() == expected
+
+
+def test_positions_round_trip():
+    snake = Snake(length=3, speed=1)
+    positions = [{'x': 0, 'y': 0}, {'x': 1, 'y': 0}, {'x': 1, 'y': 1024}]
+    snake.positions = positions
+    assert snake.positions == positions
+    assert list(snake.cells()) == [(0, 0), (1, 0), (1, 1024)]
+    assert snake.tail == (0, 0)
+    assert snake.head == (1, 1024)
+
+@pytest.mark.parametrize('grow, expected', [
+    (False, [(1, 0), (2, 0), (2, 1)]),
+    (True,  [(0, 0), (1, 0), (2, 0), (2, 1)]),
+])
+def test_move(grow: bool, expected: List[tuple]):
+    snake = Snake(length=3, speed=1)
+    snake.positions = [{'x': 0, 'y': 0}, {'x': 1, 'y': 0}, {'x': 2, 'y': 0}]
+    snake.direction = Direction.UP
+    assert snake.next_head() == (2, 1)
+    assert snake.next_position(direction=Direction.RIGHT) == {'x': 3, 'y': 0}
+    snake.move(grow=grow)
+    assert list(snake.cells()) == expected
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from src.engine.SpatialHash import SpatialHash
+
+
+@pytest.mark.parametrize('with_near', [False, True])
+def test_query_pairs_matches_brute_force(with_near: bool):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-5, 105, size=(2000, 2)) # some points outside the plane
+    queries = rng.uniform(0, 100, size=(50, 2))
+    spatial_hash = SpatialHash(width=100, height=100, cell_size=7)
+    spatial_hash.build(points=points, near=queries if with_near else None)
+    query_ids, point_ids = spatial_hash.query_pairs(queries=queries, radius=6)
+    distances = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+    assert sorted(zip(query_ids.tolist(), point_ids.tolist())) == sorted(zip(*np.nonzero(distances < 6)))
+
+def test_radius_larger_than_cells():
+    spatial_hash = SpatialHash(width=10, height=10, cell_size=2)
+    spatial_hash.build(points=np.zeros((0, 2)))
+    assert len(spatial_hash.query_pairs(queries=np.ones((3, 2)), radius=2)[0]) == 0
+    with pytest.raises(ValueError):
+        spatial_hash.query_pairs(queries=np.ones((3, 2)), radius=3)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.engine.Metrics import read_metrics
+from src.engine.Snake import AI_DEFAULTS
+from src.engine.Sweep import (SweepSettings, get_best_configurations, get_configurations, get_run_id, parse_spec,
+                              read_results, run_configuration, run_sweep)
+from src.engine.World import World, GameMode
+
+
+def test_parse_spec():
+    assert parse_spec(['learning_rate=0.05,0.1', 'radar_nb_cells=uniform:1:3', 'exploration=loguniform:0.1:1']) == {
+        'learning_rate': [0.05, 0.1], 'radar_nb_cells': ['uniform', 1, 3], 'exploration': ['loguniform', 0.1, 1.0]}
+    with pytest.raises(ValueError):
+        parse_spec(['speed=1,2'])
+
+def test_configurations_combine_grid_and_random_search():
+    configurations = get_configurations(grid={'learning_rate': [0.05, 0.1], 'discount_factor': [0.8, 0.9]},
+                                        random={'radar_nb_cells': ['uniform', 1, 3], 'exploration': ['loguniform', 0.1, 1.0]},
+                                        nb_samples=3, seed=0)
+    assert len(configurations) == 12
+    assert {(c['learning_rate'], c['discount_factor']) for c in configurations} == {(0.05, 0.8), (0.05, 0.9), (0.1, 0.8), (0.1, 0.9)}
+    assert all(1 <= c['radar_nb_cells'] <= 3 and 0.1 <= c['exploration'] <= 1 for c in configurations)
+    assert configurations == get_configurations(grid={'learning_rate': [0.05, 0.1], 'discount_factor': [0.8, 0.9]},
+                                                random={'radar_nb_cells': ['uniform', 1, 3], 'exploration': ['loguniform', 0.1, 1.0]},
+                                                nb_samples=3, seed=0)
+    assert get_configurations() == [AI_DEFAULTS]
+
+def test_world_ai_parameters():
+    world = World(nb_col=10, nb_row=10, game_mode=GameMode.BOTS, auto_retry=False, seed=0)
+    world.set_ai_parameters(learning_rate=0.5, radar_nb_cells=3)
+    world.create_snakes(quantity=2)
+    assert all(snake.learning_rate == 0.5 and snake.radar_nb_cells == 3 for snake in world.snakes.values())
+    assert world.clone().snakes.ai_defaults['learning_rate'] == 0.5
+    with pytest.raises(ValueError):
+        world.set_ai_parameters(speed=2)
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    parameters = {**AI_DEFAULTS, 'learning_rate': 0.2}
+    full = SweepSettings(out_dir=str(tmp_path / 'full'), nb_ticks=600, nb_col=8, nb_row=8, nb_orbs=4, checkpoint_every=250)
+    resumed = SweepSettings(out_dir=str(tmp_path / 'resumed'), nb_ticks=600, nb_col=8, nb_row=8, nb_orbs=4, checkpoint_every=250)
+    for settings in (full, resumed):
+        os.makedirs(os.path.join(settings.out_dir, 'runs'))
+    full_row = run_configuration(parameters=parameters, seed=3, seed_index=1, settings=full)
+    assert full_row['episodes'] > 1 and full_row['ticks'] == 600
+    assert not os.path.exists(full.get_run_path(full_row['run_id'], 'checkpoint'))
+    # killed at tick 520, after its checkpoint of tick 500
+    update = World.update
+    nb_updates = [0]
+    def interrupted_update(world):
+        nb_updates[0] += 1
+        if nb_updates[0] > 520:
+            raise KeyboardInterrupt
+        update(world)
+    monkeypatch.setattr(World, 'update', interrupted_update)
+    with pytest.raises(KeyboardInterrupt):
+        run_configuration(parameters=parameters, seed=3, seed_index=1, settings=resumed)
+    monkeypatch.setattr(World, 'update', update)
+    assert os.path.exists(resumed.get_run_path(full_row['run_id'], 'checkpoint'))
+    resumed_row = run_configuration(parameters=parameters, seed=3, seed_index=1, settings=resumed)
+    assert {k: v for k, v in resumed_row.items() if k != 'elapsed_s'} == {k: v for k, v in full_row.items() if k != 'elapsed_s'}
+    assert np.array_equal(read_metrics(resumed.get_run_path(full_row['run_id'], 'metrics')),
+                          read_metrics(full.get_run_path(full_row['run_id'], 'metrics')))
+
+def test_sweep_skips_finished_runs_and_reports_the_best(tmp_path):
+    settings = SweepSettings(out_dir=str(tmp_path), nb_ticks=300, nb_col=8, nb_row=8, nb_orbs=4, checkpoint_every=0)
+    configurations = get_configurations(grid={'learning_rate': [0.05, 0.5]})
+    rows = run_sweep(configurations=configurations, settings=settings, nb_seeds=2, seed=1, workers=2)
+    assert len(rows) == 4 and len(read_results(settings.get_results_path())) == 4
+    assert run_sweep(configurations=configurations, settings=settings, nb_seeds=2, seed=1) == read_results(settings.get_results_path())
+    best = get_best_configurations(rows=read_results(settings.get_results_path()))
+    assert len(best) == 2 and best[0]['nb_seeds'] == 2 and best[0]['mean_final_score'] >= best[1]['mean_final_score']
+    assert {row['run_id'] for row in rows} == {get_run_id(parameters=c, seed=1, seed_index=i) for c in configurations for i in range(2)}
@@ -0,0 +1,53 @@
+import pickle
+
+import numpy as np
+
+from src.engine.Tournament import (RANDOM_AGENT, RESULT_DTYPE, Agent, TournamentSettings, get_ratings, get_report, get_wins,
+                                   play_game, run_tournament)
+from src.engine.World import get_worlds_seeds
+
+
+def get_results(games: list) -> np.ndarray:
+    """games: one list of (agent, score) per game"""
+    return np.array([(game, agent, score, 0, 0, 0) for game, scores in enumerate(games) for agent, score in scores], dtype=RESULT_DTYPE)
+
+def test_agent_parse():
+    assert Agent.parse('agent_v7x7-radar=2_v6.qtable:3').path == 'agent_v7x7-radar=2_v6.qtable'
+    assert Agent.parse('agent_v7x7-radar=2_v6.qtable:3').radar_nb_cells == 3
+    assert Agent.parse('C:/agents/a.qtable').path == 'C:/agents/a.qtable'
+
+def test_wins_and_ratings():
+    results = get_results([[(0, 10), (1, 5), (2, 5)], [(0, 7), (1, 1), (2, 3)], [(1, 4), (0, 2), (2, 4)]])
+    assert get_wins(results, nb_agents=3).tolist() == [[0, 2, 2], [1, 0, 1], [1, 2, 0]]
+    ratings = get_ratings(get_wins(results, nb_agents=3))
+    assert ratings[0] > ratings[2] > ratings[1] and np.isclose(ratings.mean(), 1500)
+    # an agent that always wins keeps a finite rating, equal agents get the same one
+    assert np.isfinite(get_ratings(np.array([[0, 100], [0, 0]]))).all()
+    assert np.allclose(get_ratings(np.array([[0, 3], [3, 0]])), 1500)
+
+def test_play_game(tmp_path):
+    path = str(tmp_path / 'agent.qtable')
+    with open(path, 'wb') as file:
+        pickle.dump(({}, []), file)
+    agents = [Agent(path=path, radar_nb_cells=1), Agent(path=RANDOM_AGENT)]
+    settings = TournamentSettings(nb_col=20, nb_row=20, nb_bots=5, nb_orbs=10, max_ticks=300, copies=2)
+    seed = get_worlds_seeds(seed=0, nb_worlds=1)[0]
+    results = play_game(agents=agents, settings=settings, game=1, seed=seed)
+    assert sorted(results['agent'].tolist()) == [0, 0, 1, 1] and (results['game'] == 1).all()
+    assert ((0 < results['survival']) & (results['survival'] <= 300)).all()
+    assert np.array_equal(results, play_game(agents=agents, settings=settings, game=1, seed=seed))
+
+def test_tournament_report(tmp_path):
+    path = str(tmp_path / 'agent.qtable')
+    with open(path, 'wb') as file:
+        pickle.dump(({}, []), file)
+    # an empty q_table plays randomly, even into walls: the random bots survive longer
+    agents = [Agent(path=path), Agent(path=RANDOM_AGENT)]
+    settings = TournamentSettings(nb_col=15, nb_row=15, nb_bots=3, nb_orbs=10, max_ticks=100)
+    results = run_tournament(agents=agents, settings=settings, nb_games=12, seed=1, workers=1)
+    assert len(results) == 24
+    assert np.array_equal(results, run_tournament(agents=agents, settings=settings, nb_games=12, seed=1, workers=3))
+    report = get_report(agents=agents, results=results)
+    assert [line['agent'] for line in report] == [RANDOM_AGENT, 'agent.qtable']
+    assert report[0]['survival'] > report[1]['survival'] and report[0]['nb_games'] == 12
+    assert all(line['score_ci'] > 0 and line['kills'] >= 0 for line in report)
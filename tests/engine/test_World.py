@@ -3,10 +3,10 @@ from typing import Tuple, List
 
 import pytest
 
-from src.ui.views.game_view import GameMode
+from src.engine.World import GameMode
 from src.engine.Orb import Orb
 from src.engine.Snake import Snake, Direction
-from src.engine.World import get_n_consecutive_empty_cells_from_grid, get_empty_map, World, CellType, get_new_position
+from src.engine.World import get_n_consecutive_empty_cells_from_grid, get_empty_map, World, CellType, get_new_position, Reward, get_worlds_seeds
 
 @pytest.mark.parametrize('nb_col, nb_row, nb_snakes', [
     (1, 3, 1),
@@ -238,3 +238,186 @@ def test_get_state_snake(radar_nb_cells: int, snake_positions: List[dict], map:
     world.snakes[snake.id] = snake
     assert world.get_state_snake(snake_id=snake.id) == expected
 
+
+def test_get_occupancy_grid(a_world_with_five_snakes):
+    occupancy = a_world_with_five_snakes.get_occupancy_grid()
+    assert occupancy.shape == (a_world_with_five_snakes.nb_col, a_world_with_five_snakes.nb_row)
+    for snake_id, snake in a_world_with_five_snakes.snakes.items():
+        for cell in snake.positions:
+            assert occupancy[cell['x'], cell['y']] == snake_id
+    assert (occupancy != 0).sum() == sum(len(snake.positions) for snake in a_world_with_five_snakes.snakes.values())
+
+@pytest.mark.parametrize('head, direction, expected', [
+    ( # only UP is free: RIGHT is another snake, LEFT is the wall
+        {'x': 0, 'y': 1}, Direction.UP, Direction.UP
+    ),
+    ( # only RIGHT is free: UP is another snake, DOWN is the wall
+        {'x': 0, 'y': 0}, Direction.RIGHT, Direction.RIGHT
+    ),
+])
+def test_set_direction_bots_batched_avoids_collision(head: dict, direction: Direction, expected: Direction):
+    for i in range(10):
+        world = World(nb_col=5, nb_row=5, game_mode=GameMode.BOTS, auto_retry=False)
+        bot = Snake(length=1, speed=1)
+        bot.positions = [head]
+        bot.direction = direction
+        obstacle = Snake(length=3, speed=1)
+        obstacle.positions = [{'x': 1, 'y': 0}, {'x': 1, 'y': 1}, {'x': 1, 'y': 2}] if direction == Direction.UP else [{'x': 0, 'y': 1}, {'x': 0, 'y': 2}, {'x': 0, 'y': 3}]
+        obstacle.direction = Direction.UP
+        world.snakes.add(bot)
+        world.snakes.add(obstacle)
+        world.set_direction_bots_batched(snake_ids=[bot.id])
+        assert bot.direction == expected
+
+def test_set_direction_bots_batched_no_safe_direction():
+    """Boxed in: the bot still gets one of its authorized directions."""
+    world = World(nb_col=1, nb_row=1, game_mode=GameMode.BOTS, auto_retry=False)
+    bot = Snake(length=1, speed=1)
+    bot.positions = [{'x': 0, 'y': 0}]
+    bot.direction = Direction.LEFT
+    world.snakes[bot.id] = bot
+    world.set_direction_bots_batched(snake_ids=[bot.id])
+    assert bot.direction in [Direction.UP, Direction.DOWN, Direction.LEFT]
+
+def test_set_direction_bots_from_distance_field_goes_to_orb():
+    world = World(nb_col=7, nb_row=7, game_mode=GameMode.BOTS, auto_retry=False)
+    world.bots_policy = 'distance_field'
+    bot = Snake(length=3, speed=1)
+    bot.positions = [{'x': 3, 'y': 0}, {'x': 3, 'y': 1}, {'x': 3, 'y': 2}]
+    bot.direction = Direction.UP
+    bot.is_main_snake = True
+    world.snakes[bot.id] = bot
+    world.create_orb(x=0, y=2)
+    world.set_direction_bots(game_mode=world.game_mode)
+    assert bot.direction == Direction.LEFT
+    assert world.distance_field.distance[0, 2] == 0
+    world.update()
+    assert bot.positions[-1] == {'x': 2, 'y': 2}
+
+def get_world_with_snakes(bodies: List[List[Tuple[int, int]]], directions: List[Direction], resolution: str) -> World:
+    world = World(nb_col=6, nb_row=6, game_mode=GameMode.PLAY, auto_retry=False)
+    world.resolution = resolution
+    for i, (body, direction) in enumerate(zip(bodies, directions)):
+        snake = Snake(length=len(body), speed=1)
+        snake.positions = [{'x': x, 'y': y} for x, y in body]
+        snake.direction = direction
+        snake.is_bot = False # keep the given directions
+        snake.is_main_snake = i == 0
+        world.snakes.add(snake)
+    world.update_map_state()
+    return world
+
+@pytest.mark.parametrize('bodies, directions, expected_alive', [
+    ( # head-to-head on the same cell: both die
+        [[(0, 2), (1, 2)], [(4, 2), (3, 2)]], [Direction.RIGHT, Direction.LEFT], [False, False]
+    ),
+    ( # the first snake follows the tail of the second one (which moves away): both survive
+        [[(0, 0), (1, 0)], [(2, 0), (2, 1), (2, 2)]], [Direction.RIGHT, Direction.UP], [True, True]
+    ),
+    ( # the first snake hits the body of the second one: only the first one dies
+        [[(0, 1), (1, 1)], [(2, 0), (2, 1), (2, 2)]], [Direction.RIGHT, Direction.UP], [False, True]
+    ),
+    ( # wall
+        [[(1, 0), (0, 0)], [(3, 3), (4, 3)]], [Direction.LEFT, Direction.RIGHT], [False, True]
+    ),
+    ( # the second snake enters the tail of the first one, which dies against the wall (so its tail stays): both die
+        [[(2, 0), (1, 0), (0, 0)], [(4, 0), (3, 0)]], [Direction.LEFT, Direction.LEFT], [False, False]
+    ),
+    ( # same, and the third snake enters the tail of the second one
+        [[(2, 0), (1, 0), (0, 0)], [(4, 0), (3, 0)], [(5, 1), (5, 0)]], [Direction.LEFT] * 3, [False, False, False]
+    ),
+])
+def test_move_snakes_simultaneously_does_not_depend_on_order(bodies, directions, expected_alive):
+    for order in (1, -1):
+        world = get_world_with_snakes(bodies=bodies[::order], directions=directions[::order], resolution='simultaneous')
+        snakes = list(world.snakes.values())[::order]
+        world.move_snakes_simultaneously()
+        assert [snake.is_alive for snake in snakes] == expected_alive
+
+@pytest.mark.parametrize('resolution', ['sequential', 'simultaneous'])
+def test_killers(resolution: str):
+    # the first snake hits the body of the second one
+    world = get_world_with_snakes(bodies=[[(0, 1), (1, 1)], [(2, 0), (2, 1), (2, 2)]], directions=[Direction.RIGHT, Direction.UP], resolution=resolution)
+    victim, killer = world.snakes.ids().tolist()
+    world.move_snakes_simultaneously() if resolution == 'simultaneous' else world.move_snakes_sequentially()
+    assert world.killers == {victim: killer}
+    # a wall kills nobody's victim
+    world = get_world_with_snakes(bodies=[[(1, 0), (0, 0)], [(3, 3), (4, 3)]], directions=[Direction.LEFT, Direction.RIGHT], resolution=resolution)
+    world.update()
+    assert world.killers == {}
+
+def test_move_snakes_simultaneously_orb():
+    world = get_world_with_snakes(bodies=[[(0, 0), (1, 0)], [(3, 3), (4, 3)]], directions=[Direction.RIGHT, Direction.RIGHT], resolution='simultaneous')
+    world.create_orb(x=2, y=0)
+    orb_id = next(iter(world.orbs))
+    main_snake, other_snake = world.snakes.values()
+    rewards, dead_orbs = world.move_snakes_simultaneously()
+    assert rewards == {main_snake.id: Reward.ORB, other_snake.id: Reward.DEFAULT}
+    assert dead_orbs == [orb_id]
+    assert main_snake.positions == [{'x': 0, 'y': 0}, {'x': 1, 'y': 0}, {'x': 2, 'y': 0}]
+    assert other_snake.positions == [{'x': 4, 'y': 3}, {'x': 5, 'y': 3}]
+
+def test_update_simultaneous_snakes_stay_inside_map():
+    world = World(nb_col=25, nb_row=25, game_mode=GameMode.BOTS, auto_retry=True)
+    world.resolution = 'simultaneous'
+    world.create_orbs(quantity=20)
+    world.create_snakes(quantity=10)
+    for i in range(50):
+        world.update()
+        for snake in world.snakes.values():
+            for cell in snake.positions:
+                assert world.is_inside_map(x=cell['x'], y=cell['y'])
+
+def get_world_history(world: World, nb_ticks: int) -> List[tuple]:
+    history = []
+    for i in range(nb_ticks):
+        world.update()
+        history.append((
+            tuple((snake_id, tuple(snake.cells()), snake.score) for snake_id, snake in world.snakes.items()),
+            tuple(world.orbs.cells()),
+        ))
+    return history
+
+def get_seeded_world(seed) -> World:
+    world = World(nb_col=12, nb_row=12, game_mode=GameMode.BOTS, auto_retry=True, seed=seed)
+    world.create_orbs(quantity=10)
+    world.create_snakes(quantity=10)
+    return world
+
+def test_same_seed_same_game():
+    first, second = get_seeded_world(seed=42), get_seeded_world(seed=42)
+    other = get_seeded_world(seed=43)
+    # interleaved: the worlds do not share their random stream
+    first_history, other_history, second_history = [], [], []
+    for i in range(30):
+        first_history += get_world_history(first, nb_ticks=1)
+        other_history += get_world_history(other, nb_ticks=1)
+        second_history += get_world_history(second, nb_ticks=1)
+    assert first_history == second_history
+    assert first_history != other_history
+
+def test_get_worlds_seeds():
+    seeds = get_worlds_seeds(seed=7, nb_worlds=3)
+    histories = [get_world_history(get_seeded_world(seed=seed), nb_ticks=10) for seed in seeds]
+    assert histories[0] != histories[1]
+    assert histories == [get_world_history(get_seeded_world(seed=seed), nb_ticks=10) for seed in get_worlds_seeds(seed=7, nb_worlds=3)]
+
+def test_clone_same_future_and_independent():
+    world = get_seeded_world(seed=5)
+    world.update()
+    clone = world.clone()
+    assert clone.snakes is not world.snakes
+    assert get_world_history(clone, nb_ticks=20) == get_world_history(world, nb_ticks=20)
+    # what happens to the clone does not change the original
+    state = [(snake_id, tuple(snake.cells())) for snake_id, snake in world.snakes.items()]
+    clone.reset_world()
+    clone.create_orbs(quantity=5)
+    assert [(snake_id, tuple(snake.cells())) for snake_id, snake in world.snakes.items()] == state
+
+def test_snapshot_restore():
+    world = get_seeded_world(seed=6)
+    snapshot = world.snapshot()
+    history = get_world_history(world, nb_ticks=40)
+    for i in range(2):
+        world.restore(snapshot)
+        assert get_world_history(world, nb_ticks=40) == history
@@ -0,0 +1,92 @@
+import asyncio
+
+from src.server.BotClients import BotClient, run_bot_clients
+from src.server.GameServer import GameServer, RemoteClient, get_server_world
+from src.server.Protocol import FRAME, SPAWN
+
+
+async def run_server_with_clients(nb_clients: int, nb_ticks: int, read_delay_s: float = 0.0, **kwargs):
+    server = GameServer(world=get_server_world(nb_col=30, nb_row=30, nb_bots=10, nb_orbs=20, seed=0), tick_s=0.005, **kwargs)
+    await server.start(host='127.0.0.1', port=0)
+    clients = asyncio.create_task(run_bot_clients(host='127.0.0.1', port=server.get_port(), nb_clients=nb_clients,
+                                                  duration_s=nb_ticks * 0.005, read_delay_s=read_delay_s, seed=0))
+    await asyncio.sleep(0.05) # let the clients connect
+    await server.run(nb_ticks=nb_ticks)
+    result = await clients
+    await server.stop()
+    return server, result
+
+def test_clients_follow_the_world():
+    server, result = asyncio.run(run_server_with_clients(nb_clients=5, nb_ticks=60))
+    assert server.tick == 60 and server.nb_dropped == 0
+    assert result.nb_clients == 5 and result.nb_dropped == 0
+    assert result.nb_frames > 0 and result.nb_keyframes >= 5
+    # the clients snakes are removed with their connection, only bots are left
+    assert all(snake.is_bot for snake in server.world.snakes.values())
+
+def test_client_state_matches_the_server():
+    async def run():
+        server = GameServer(world=get_server_world(nb_col=20, nb_row=20, nb_bots=5, nb_orbs=10, seed=1), tick_s=0.001)
+        await server.start(host='127.0.0.1', port=0)
+        client = BotClient(seed=1)
+        task = asyncio.create_task(client.run(host='127.0.0.1', port=server.get_port(), duration_s=0.5))
+        await asyncio.sleep(0.05)
+        await server.run(nb_ticks=30)
+        await asyncio.sleep(0.05) # the last frame reaches the client
+        assert client.state.tick == server.tick
+        assert (client.state.cells == server.cells).all()
+        assert client.state.snake_id in server.world.snakes or client.state.snake_id == 0
+        await server.stop()
+        await task
+    asyncio.run(run())
+
+class FullTransport:
+    def __init__(self):
+        self.aborted = False
+    def get_write_buffer_size(self) -> int:
+        return 10**9
+    def abort(self) -> None:
+        self.aborted = True
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FullTransport()
+        self.written = []
+    def write(self, data: bytes) -> None:
+        self.written.append(data)
+
+def test_slow_client_is_throttled_then_dropped():
+    server = GameServer(world=get_server_world(nb_col=20, nb_row=20, nb_bots=5, nb_orbs=10, seed=1), tick_s=0.001,
+                        max_buffer_bytes=1000, max_missed_ticks=3)
+    client = RemoteClient(writer=FakeWriter())
+    client.needs_keyframe = False
+    server.clients.append(client)
+    for _ in range(3):
+        server.step()
+    # its buffer is full: no tick written (only its snake spawn), a keyframe will be needed, the server keeps ticking
+    assert [frame[FRAME.size] for frame in client.writer.written] == [SPAWN] and client.needs_keyframe and client.missed_ticks == 3
+    assert client in server.clients
+    server.step()
+    assert client not in server.clients and client.writer.transport.aborted
+    assert server.nb_dropped == 1 and server.tick == 4
+
+def test_dead_clients_do_not_take_over_a_reused_slot():
+    # the slot of a dead snake goes to the next spawned one (lowest first), even to another client respawned in the same tick
+    world = get_server_world(nb_col=20, nb_row=20, nb_bots=2, nb_orbs=0, seed=1)
+    server = GameServer(world=world, tick_s=0.001, max_missed_ticks=100)
+    first, second = RemoteClient(writer=FakeWriter()), RemoteClient(writer=FakeWriter())
+    server.clients.extend([first, second])
+    server.spawn_snake(client=first)
+    world.snakes[2].is_alive = False
+    world.kill_snakes()
+    server.spawn_snake(client=second)
+    assert (first.snake_id, second.snake_id) == (3, 2)
+    first.snake.is_alive = False
+    second.snake.is_alive = False
+    world.kill_snakes()
+    server.step()
+    # both respawned, each with its own snake
+    assert [frame[FRAME.size] for frame in second.writer.written] == [SPAWN, SPAWN]
+    assert first.get_snake(world) and second.get_snake(world) and first.snake_id != second.snake_id
+    server.remove_client(client=second)
+    assert first.get_snake(world) and second.snake_id not in world.snakes
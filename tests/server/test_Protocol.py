@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.engine.World import World, GameMode
+from src.server.GameServer import get_server_world
+from src.server.Protocol import FRAME, KEYFRAME, DELTA, ClientState, encode_welcome, encode_keyframe, encode_delta, get_snakes_ends
+
+
+def get_payload(frame: bytes) -> bytes:
+    (length,) = FRAME.unpack_from(frame, 0)
+    assert len(frame) == FRAME.size + length
+    return frame[FRAME.size:]
+
+def test_deltas_rebuild_the_world():
+    world = World(nb_col=20, nb_row=15, game_mode=GameMode.BOTS, auto_retry=True, seed=2)
+    world.create_orbs(quantity=15)
+    world.create_snakes(quantity=10)
+    state = ClientState()
+    state.apply(get_payload(encode_welcome(snake_id=0, nb_col=world.nb_col, nb_row=world.nb_row)))
+    cells = world.get_cell_array()
+    assert state.apply(get_payload(encode_keyframe(tick=0, sent_at=1.5, cells=cells, snakes=get_snakes_ends(world)))) == KEYFRAME
+    assert np.array_equal(state.cells, cells) and state.sent_at == 1.5
+    for tick in range(1, 40):
+        world.update()
+        previous_cells, cells = cells, world.get_cell_array()
+        frame = encode_delta(tick=tick, sent_at=0.0, previous_cells=previous_cells, cells=cells, snakes=get_snakes_ends(world))
+        assert state.apply(get_payload(frame)) == DELTA
+        assert state.tick == tick
+        assert np.array_equal(state.cells, cells)
+        assert state.snakes == {snake_id: (*snake.head, *snake.tail) for snake_id, snake in world.snakes.items()}
+
+def test_delta_is_smaller_than_keyframe():
+    world = get_server_world(nb_col=64, nb_row=64, nb_bots=10, nb_orbs=50, seed=0)
+    cells = world.get_cell_array()
+    world.update()
+    snakes = get_snakes_ends(world)
+    delta = encode_delta(tick=1, sent_at=0.0, previous_cells=cells, cells=world.get_cell_array(), snakes=snakes)
+    # (a keyframe of an almost empty map compresses well, but not that well)
+    assert len(delta) < len(encode_keyframe(tick=1, sent_at=0.0, cells=world.get_cell_array(), snakes=snakes))
@@ -0,0 +1,52 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+from src.engine.OrbSpawner import OrbSpawner
+from src.server.GameServer import GameServer, get_server_world
+from src.utils import conf, load_conf, read_conf, CONF_FILE, CONF_ENV_VAR
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_load_conf_from_another_file(tmp_path):
+    custom = read_conf(CONF_FILE) | {'game_name': 'TinyWorm'}
+    path = tmp_path / 'conf.json'
+    path.write_text(json.dumps(custom))
+    try:
+        assert load_conf(str(path)) is conf
+        assert conf['game_name'] == 'TinyWorm'
+    finally:
+        load_conf()
+    assert conf == read_conf(CONF_FILE)
+    # the cached content is not modified through conf
+    conf['game_name'] = 'changed'
+    load_conf()
+    assert read_conf(CONF_FILE)['game_name'] != 'changed'
+
+def test_defaults_are_read_from_the_loaded_conf(tmp_path):
+    custom = copy.deepcopy(read_conf(CONF_FILE))
+    custom['orbs']['spawner']['sparsity'] = 7.5
+    custom['server']['tick_s'] = 0.25
+    path = tmp_path / 'conf.json'
+    path.write_text(json.dumps(custom))
+    try:
+        load_conf(str(path))
+        assert OrbSpawner().sparsity == 7.5
+        assert GameServer(world=get_server_world(nb_col=10, nb_row=10, nb_bots=1, nb_orbs=1, seed=0)).tick_s == 0.25
+    finally:
+        load_conf()
+    assert OrbSpawner().sparsity == read_conf(CONF_FILE)['orbs']['spawner']['sparsity']
+
+def test_engine_import_outside_repo_root_without_ui(tmp_path):
+    # from another directory, with another configuration: no arcade / matplotlib loaded
+    custom = read_conf(CONF_FILE) | {'refresh_time': 0.5}
+    path = tmp_path / 'conf.json'
+    path.write_text(json.dumps(custom))
+    code = ('import sys; import src.engine.World; from src.utils import conf; '
+            'print(conf["refresh_time"], sorted({m.split(".")[0] for m in sys.modules} & {"arcade", "pyglet", "matplotlib"}))')
+    env = dict(os.environ, PYTHONPATH=PACKAGE_DIR, **{CONF_ENV_VAR: str(path)})
+    output = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['0.5', '[]']
@@ -1,12 +1,46 @@
 from arcade import SpriteList
 
 from src.ui.game_window import GameWindow
-from src.ui.views.game_view import GameView, GameMode
+from src.engine.World import World, GameMode
+from src.ui.views.game_view import GameView
+from src.ui.views.replay_view import ReplayView
 
 
-def test_create_grid_sprite_list(an_empty_world):
+def test_create_grid_sprite_list(a_world_with_10_orbs):
     _window = GameWindow(visible=False)
-    game_view = GameView(world=an_empty_world, game_mode=GameMode.BOTS)
+    game_view = GameView(world=a_world_with_10_orbs, game_mode=GameMode.BOTS)
     game_view.create_grid_sprite_list()
     assert isinstance(game_view.grid_sprite_list, SpriteList)
-    assert len(game_view.grid_sprite_list) == game_view.nb_row * game_view.nb_col
+    # one sprite per non-empty cell, not per cell
+    assert len(game_view.grid_sprite_list) == 0
+    game_view.resync_grid_with_map()
+    assert game_view.painted == len(game_view.grid_sprite_list) == 10
+    del a_world_with_10_orbs.orbs[next(iter(a_world_with_10_orbs.orbs))]
+    a_world_with_10_orbs.update_map_state()
+    game_view.resync_grid_with_map()
+    assert game_view.painted == 9 and len(game_view.grid_sprite_list) == 10
+    assert [sprite.visible for sprite in game_view.grid_sprite_list] == [True] * 9 + [False]
+
+def test_replay_view_seek_and_speed(tmp_path):
+    world = World(nb_col=8, nb_row=6, game_mode=GameMode.BOTS, auto_retry=True, seed=1)
+    world.create_orbs(quantity=5)
+    world.create_snakes(quantity=3)
+    path = str(tmp_path / 'episode.mwrec')
+    world.start_recording(path=path, keyframe_every=10)
+    for i in range(50):
+        world.update()
+    world.stop_recording()
+
+    _window = GameWindow(visible=False)
+    replay_view = ReplayView(path=path)
+    replay_view.setup()
+    assert replay_view.painted == len(replay_view.world.map.get_non_empty_cells()[2])
+    # x10 during 1s at 0.1s per tick: 100 ticks wanted, stops at the end of the recording
+    replay_view.set_speed(speed=10)
+    replay_view.on_update(delta_time=1)
+    assert replay_view.replay.tick == 50 and replay_view.is_paused
+    replay_view.set_speed(speed=1e6)
+    assert replay_view.speed == 1000
+    replay_view.seek(tick=23)
+    assert replay_view.replay.tick == 23
+    replay_view.on_draw()